@@ -1,370 +1,3444 @@
-from typing import Optional, List, Callable, Any
+from array import array
+import asyncio
+import bisect as _bisect
+import contextlib
+import functools
+import mmap as _mmap
+import operator
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate, chain, islice
+from typing import (
+    Optional, List, Callable, Any, AsyncIterable, AsyncIterator, Dict, FrozenSet, Iterable, Iterator,
+    NamedTuple, Set, Tuple, Type, TypeVar, Union
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+# A node's block: a plain list, or an ``array.array`` or ``numpy.ndarray``
+# for numeric lists.  An ndarray is not a ``MutableSequence`` to the type
+# checker, so blocks are typed loosely.
+Values = Any
+
+# How a list stores numeric blocks: an ``array`` typecode, or a
+# ``numpy.dtype`` for ndarray blocks.
+DType = Any
+
+# A node capacity, or ``"auto"`` to let ``auto_capacity`` choose one.
+Capacity = Union[int, str]
+
+
+# Instrumentation.  Public operations are registered by ``_instrumented``,
+# which leaves them untouched.  ``profile_ops`` installs an ``OpProfile``
+# and a ``sys.setprofile`` hook that notices when a registered operation
+# starts and returns.  With no profile installed the only cost is one
+# ``_profiler is None`` test per node or block the hot paths touch.
+
+_OPS: Dict[Any, str] = {}
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _instrumented(func: _F) -> _F:
+    """Register ``func`` as a public operation for ``profile_ops``."""
+    _OPS[func.__code__] = func.__qualname__
+    return func
+
+
+class OpProfile:
+    """Counters and timings per public operation, filled in by ``profile_ops``.
+
+    Work on behalf of a public call made from inside another one is counted
+    under the outer call.  Work done outside any public call (a builder, a
+    lazy iterator such as ``load_stream``, a query being iterated) or in
+    another thread is counted under ``"(other)"``.  Calls of ``func`` inside
+    worker processes of the parallel functions are not seen.
+    """
+
+    COUNTERS: Tuple[str, ...] = (
+        "calls", "seconds", "nodes_created", "elements_copied", "nodes_visited", "func_calls")
+
+    def __init__(self) -> None:
+        self.ops: Dict[str, Dict[str, float]] = {}
+        self._thread: int = threading.get_ident()
+        self._frame: Any = None
+        self._current: Optional[Dict[str, float]] = None
+        self._start: float = 0.0
+
+    def _counters(self, op: str) -> Dict[str, float]:
+        counters: Optional[Dict[str, float]] = self.ops.get(op)
+        if counters is None:
+            counters = self.ops[op] = dict.fromkeys(self.COUNTERS, 0)
+        return counters
+
+    def _bucket(self) -> Dict[str, float]:
+        if self._current is not None and threading.get_ident() == self._thread:
+            return self._current
+        return self._counters("(other)")
+
+    def _hook(self, frame: Any, event: str, arg: Any) -> None:
+        if event == "call":
+            if self._frame is None and frame.f_code in _OPS:
+                self._frame = frame
+                self._current = self._counters(_OPS[frame.f_code])
+                self._current["calls"] += 1
+                self._start = time.perf_counter()
+        elif event == "return" and frame is self._frame:
+            assert self._current is not None
+            self._current["seconds"] += time.perf_counter() - self._start
+            self._frame = None
+            self._current = None
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        self._bucket()[counter] += amount
+
+    def counted(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """``func``, counting its calls; ufuncs are left alone to keep their fast path."""
+        if np is not None and isinstance(func, np.ufunc):
+            return func
+        counters: Dict[str, float] = self._bucket()
+
+        def counting(*args: Any) -> Any:
+            counters["func_calls"] += 1
+            return func(*args)
+        return counting
+
+    def visiting(self, nodes: Iterator["UnrolledNode"]) -> Iterator["UnrolledNode"]:
+        counters: Dict[str, float] = self._bucket()
+        for node in nodes:
+            counters["nodes_visited"] += 1
+            yield node
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {op: dict(counters) for op, counters in self.ops.items()}
+
+
+_profiler: Optional[OpProfile] = None
+
+
+@contextlib.contextmanager
+def profile_ops() -> Iterator[OpProfile]:
+    """Collect an ``OpProfile`` for the public calls this thread makes in the ``with`` block."""
+    global _profiler
+    previous: Optional[OpProfile] = _profiler
+    hook: Any = sys.getprofile()
+    _profiler = OpProfile()
+    sys.setprofile(_profiler._hook)
+    try:
+        yield _profiler
+    finally:
+        sys.setprofile(hook)
+        _profiler = previous
 
 
 class UnrolledNode:
+    __slots__ = ("values", "next", "capacity", "_hash", "_summary", "_monoids")
+
     def __init__(
         self,
-        values: Optional[List[Any]] = None,
+        values: Optional[Values] = None,
         next_node=None,
         capacity: Optional[int] = 1,
     ) -> None:
-        self.values: Optional[List[Any]] = values
+        self.values: Optional[Values] = values
         self.next: UnrolledNode = next_node
         if capacity:
             self.capacity: int = capacity
         else:
             self.capacity = 1
+        # Hash of the chain starting here, computed on first use.
+        self._hash: Optional[int] = None
+        # Membership summary of the block, built by ``member`` on request.
+        self._summary: Any = None
+        # Monoid summaries of the block, keyed by ``Monoid``; see ``summarize``.
+        self._monoids: Optional[Dict["Monoid", Any]] = None
+        if _profiler is not None:
+            _profiler.count("nodes_created")
 
     def __eq__(self, other) -> bool:
-        if self is None and other is None:
-            return True
-        elif self is not None and other is not None:
-            if self.values != other.values:
+        if not isinstance(other, UnrolledNode):
+            return False
+        left: Optional[UnrolledNode] = self
+        right: Optional[UnrolledNode] = other
+        while left is not None and right is not None:
+            if left is right:
+                return True
+            if left._hash is not None and right._hash is not None and left._hash != right._hash:
                 return False
-            if self.capacity != other.capacity:
+            if not _same_block(left, right):
                 return False
-            return self.next == other.next
-        else:
-            return False
+            left, right = left.next, right.next
+        return left is None and right is None
+
+    def __hash__(self) -> int:
+        if self._hash is not None:
+            return self._hash
+        pending: List[UnrolledNode] = []
+        node: Optional[UnrolledNode] = self
+        while node is not None and node._hash is None:
+            pending.append(node)
+            node = node.next
+        tail: int = 0 if node is None else hash(node)
+        for node in reversed(pending):
+            node._hash = tail = hash((_block_hash(node), tail))
+        return tail
 
     def __str__(self) -> str:
-        if self.values:
+        if self.values is not None and len(self.values):
             return ":".join(str(value) for value in self.values)
         return "None"
 
 
-class UnrolledLinkedList:
+# The blocks of a list live in a persistent 2-3 finger tree (Hinze and
+# Paterson).  Both ends are reachable in O(1), so pushing or replacing the
+# last block is amortized O(1) and every version shares all untouched
+# blocks and subtrees with the version it was derived from.  Leaves are
+# ``UnrolledNode`` objects; their ``next`` field is not used by the tree.
+#
+# Every branch and deep node caches the number of positions below it
+# (``size``) and how many of its leaves are empty ``None`` nodes
+# (``holes``), which makes ``size`` O(1) and positional access O(log n).
+
+
+def _leaf_size(node: UnrolledNode) -> int:
+    """Positions a node occupies in ``to_list``; empty nodes read as one ``None``."""
+    values: Optional[Values] = node.values
+    return len(values) if values is not None and len(values) else 1
+
+
+def _size_of(item: Any) -> int:
+    if type(item) is _Branch:
+        return item.size
+    return _leaf_size(item)
+
+
+def _holes_of(item: Any) -> int:
+    if type(item) is _Branch:
+        return item.holes
+    return 0 if item.values is not None and len(item.values) else 1
+
+
+def _measure(items: Tuple[Any, ...]) -> Tuple[int, int]:
+    """Total ``(size, holes)`` of leaves or branches, in one pass."""
+    size: int = 0
+    holes: int = 0
+    for item in items:
+        if type(item) is _Branch:
+            size += item.size
+            holes += item.holes
+        elif item.values is not None and len(item.values):
+            size += len(item.values)
+        else:
+            size += 1
+            holes += 1
+    return size, holes
+
+
+# Marks a branch whose ``fence`` has not been computed yet.
+_NO_FENCE: Any = object()
+
+
+class _Branch:
+    """Interior 2-3 node grouping leaves (or branches) one level down."""
+
+    __slots__ = ("items", "size", "holes", "digest", "fence", "monoids")
+
+    def __init__(self, items: Tuple[Any, ...]) -> None:
+        self.items: Tuple[Any, ...] = items
+        self.size: int
+        self.holes: int
+        self.size, self.holes = _measure(items)
+        self.digest: Optional[Tuple[int, int]] = None
+        # Last element below the branch, cached by sorted lists.
+        self.fence: Any = _NO_FENCE
+        # Monoid summaries below the branch, cached by ``summarize``.
+        self.monoids: Optional[Dict["Monoid", Any]] = None
+
+
+class _Single:
+    __slots__ = ("item",)
+
+    def __init__(self, item: Any) -> None:
+        self.item: Any = item
+
+
+class _Deep:
+    __slots__ = ("prefix", "middle", "suffix", "size", "holes", "digest", "monoids")
+
     def __init__(
-        self, node_capacity: int = 1, head: Optional[UnrolledNode] = None
+        self,
+        prefix: Tuple[Any, ...],
+        middle: "_Tree",
+        suffix: Tuple[Any, ...],
+        measure: Optional[Tuple[int, int]] = None,
     ) -> None:
-        self.node_capacity: int = node_capacity
-        self.head: Optional[UnrolledNode] = head
+        """``measure`` is the known ``(size, holes)`` of the result, if any."""
+        self.prefix: Tuple[Any, ...] = prefix
+        self.middle: _Tree = middle
+        self.suffix: Tuple[Any, ...] = suffix
+        if measure is None:
+            size, holes = _measure(prefix + suffix)
+            measure = size + _tree_size(middle), holes + _tree_holes(middle)
+        self.size: int
+        self.holes: int
+        self.size, self.holes = measure
+        self.digest: Optional[Tuple[int, int]] = None
+        self.monoids: Optional[Dict["Monoid", Any]] = None
 
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, UnrolledLinkedList):
-            return False
-        return self.head == other.head
 
-    def __str__(self) -> str:
-        result: List[str] = []
-        current_node: Optional[UnrolledNode] = self.head
-        while current_node:
-            if current_node.values:
-                result.append("".join(map(str, current_node.values)))
-            else:
-                result.append("None")
-            current_node = current_node.next
-        return "".join(result)
+_Tree = Union[None, _Single, _Deep]
 
 
-def url_empty() -> UnrolledLinkedList:
-    return UnrolledLinkedList()
+def _tree_size(tree: _Tree) -> int:
+    if tree is None:
+        return 0
+    if isinstance(tree, _Single):
+        return _size_of(tree.item)
+    return tree.size
 
 
-def cons(
-    values: Optional[List[Any]], next_node: Optional[UnrolledNode], capacity: Optional[Any] = 1
-) -> UnrolledNode:
-    return UnrolledNode(values, next_node, capacity)
+def _tree_holes(tree: _Tree) -> int:
+    if tree is None:
+        return 0
+    if isinstance(tree, _Single):
+        return _holes_of(tree.item)
+    return tree.holes
 
 
-def size(url: Optional[UnrolledLinkedList]) -> int:
+def _build(items: List[Any]) -> _Tree:
+    """Bulk-load a tree from ``items`` in O(len(items))."""
+    count: int = len(items)
+    if count == 0:
+        return None
+    if count == 1:
+        return _Single(items[0])
+    if count <= 8:
+        return _Deep(tuple(items[:count // 2]), None, tuple(items[count // 2:]))
+    branches: Tuple[Any, ...] = _group(tuple(items[3:-3]))
+    return _Deep(tuple(items[:3]), _build(list(branches)), tuple(items[-3:]))
 
-    def _size_help(node: Optional[UnrolledNode]) -> int:
-        if node is None:
-            return 0
-        if node.values:
-            return len(node.values) + _size_help(node.next)
-        else:
-            return _size_help(node.next)
 
-    if url is None:
-        return 0
-    return _size_help(url.head)
+def _grown(tree: _Deep, item: Any, sign: int = 1) -> Tuple[int, int]:
+    """Measure of ``tree`` after adding (or, with ``sign=-1``, removing) ``item``."""
+    size, holes = _measure((item,))
+    return tree.size + sign * size, tree.holes + sign * holes
 
 
-def add(url: UnrolledLinkedList, element: Any) -> UnrolledLinkedList:
-    def _add_help(node: Optional[UnrolledNode]) -> Optional[UnrolledNode]:
-        if node is None:
-            return cons([element], None, url.node_capacity)
-        if node.values is not None:
-            if len(node.values) < node.capacity:
-                return cons(node.values + [element], node.next, node.capacity)
+def _push_back(tree: _Tree, item: Any) -> _Tree:
+    if tree is None:
+        return _Single(item)
+    if isinstance(tree, _Single):
+        return _Deep((tree.item,), None, (item,))
+    suffix: Tuple[Any, ...] = tree.suffix
+    if len(suffix) < 4:
+        return _Deep(tree.prefix, tree.middle, suffix + (item,), _grown(tree, item))
+    return _Deep(
+        tree.prefix, _push_back(tree.middle, _Branch(suffix[:3])), (suffix[3], item),
+        _grown(tree, item))
+
+
+def _push_front(tree: _Tree, item: Any) -> _Tree:
+    if tree is None:
+        return _Single(item)
+    if isinstance(tree, _Single):
+        return _Deep((item,), None, (tree.item,))
+    prefix: Tuple[Any, ...] = tree.prefix
+    if len(prefix) < 4:
+        return _Deep((item,) + prefix, tree.middle, tree.suffix, _grown(tree, item))
+    return _Deep(
+        (item, prefix[0]), _push_front(tree.middle, _Branch(prefix[1:])), tree.suffix,
+        _grown(tree, item))
+
+
+def _pop_back(tree: _Tree) -> Tuple[_Tree, Any]:
+    """Split a non-empty tree into everything but its last item, and that item."""
+    if isinstance(tree, _Single):
+        return None, tree.item
+    assert tree is not None
+    suffix: Tuple[Any, ...] = tree.suffix
+    last: Any = suffix[-1]
+    if len(suffix) > 1:
+        return _Deep(tree.prefix, tree.middle, suffix[:-1], _grown(tree, last, -1)), last
+    if tree.middle is not None:
+        middle, branch = _pop_back(tree.middle)
+        return _Deep(tree.prefix, middle, branch.items, _grown(tree, last, -1)), last
+    return _build(list(tree.prefix)), last
+
+
+def _last(tree: _Tree) -> Any:
+    if isinstance(tree, _Single):
+        return tree.item
+    assert tree is not None
+    return tree.suffix[-1]
+
+
+def _first(tree: _Tree) -> Any:
+    if isinstance(tree, _Single):
+        return tree.item
+    assert tree is not None
+    return tree.prefix[0]
+
+
+def _replace_first(tree: _Tree, item: Any) -> _Tree:
+    """Swap the first item of a non-empty tree for ``item`` in O(1)."""
+    if isinstance(tree, _Single):
+        return _Single(item)
+    assert tree is not None
+    size, holes = _grown(tree, item)
+    old_size, old_holes = _measure(tree.prefix[:1])
+    return _Deep((item,) + tree.prefix[1:], tree.middle, tree.suffix,
+                 (size - old_size, holes - old_holes))
+
+
+def _replace_last(tree: _Tree, item: Any) -> _Tree:
+    """Swap the last item of a non-empty tree for ``item`` in O(1)."""
+    if isinstance(tree, _Single):
+        return _Single(item)
+    assert tree is not None
+    size, holes = _grown(tree, item)
+    old_size, old_holes = _measure(tree.suffix[-1:])
+    return _Deep(tree.prefix, tree.middle, tree.suffix[:-1] + (item,),
+                 (size - old_size, holes - old_holes))
+
+
+def _pop_front(tree: _Tree) -> Tuple[Any, _Tree]:
+    """Split a non-empty tree into its first item and everything after it."""
+    if isinstance(tree, _Single):
+        return tree.item, None
+    assert tree is not None
+    prefix: Tuple[Any, ...] = tree.prefix
+    first: Any = prefix[0]
+    if len(prefix) > 1:
+        return first, _Deep(prefix[1:], tree.middle, tree.suffix, _grown(tree, first, -1))
+    if tree.middle is not None:
+        branch, middle = _pop_front(tree.middle)
+        return first, _Deep(branch.items, middle, tree.suffix, _grown(tree, first, -1))
+    return first, _build(list(tree.suffix))
+
+
+def _group(items: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Pack two or more items into 2-3 branches, in order."""
+    branches: List[_Branch] = []
+    start: int = 0
+    while len(items) - start > 4:
+        branches.append(_Branch(items[start:start + 3]))
+        start += 3
+    rest: Tuple[Any, ...] = items[start:]
+    if len(rest) == 4:
+        branches.append(_Branch(rest[:2]))
+        branches.append(_Branch(rest[2:]))
+    else:
+        branches.append(_Branch(rest))
+    return tuple(branches)
+
+
+def _concat(left: _Tree, items: Tuple[Any, ...], right: _Tree) -> _Tree:
+    """``left``, then ``items``, then ``right``, in O(log(min(left, right)))."""
+    if left is None:
+        for item in reversed(items):
+            right = _push_front(right, item)
+        return right
+    if right is None:
+        for item in items:
+            left = _push_back(left, item)
+        return left
+    if isinstance(left, _Single):
+        return _push_front(_concat(None, items, right), left.item)
+    if isinstance(right, _Single):
+        return _push_back(_concat(left, items, None), right.item)
+    size, holes = _measure(items)
+    middle: _Tree = _concat(left.middle, _group(left.suffix + items + right.prefix), right.middle)
+    return _Deep(left.prefix, middle, right.suffix,
+                 (left.size + size + right.size, left.holes + holes + right.holes))
+
+
+def _deep_left(prefix: Tuple[Any, ...], middle: _Tree, suffix: Tuple[Any, ...]) -> _Tree:
+    """A tree from a possibly empty ``prefix``, borrowing from ``middle`` if needed."""
+    if prefix:
+        return _Deep(prefix, middle, suffix)
+    if middle is None:
+        return _build(list(suffix))
+    branch, rest = _pop_front(middle)
+    return _Deep(branch.items, rest, suffix)
+
+
+def _deep_right(prefix: Tuple[Any, ...], middle: _Tree, suffix: Tuple[Any, ...]) -> _Tree:
+    """A tree from a possibly empty ``suffix``, borrowing from ``middle`` if needed."""
+    if suffix:
+        return _Deep(prefix, middle, suffix)
+    if middle is None:
+        return _build(list(prefix))
+    rest, branch = _pop_back(middle)
+    return _Deep(prefix, rest, branch.items)
+
+
+def _split_items(
+    items: Tuple[Any, ...], index: int
+) -> Tuple[Tuple[Any, ...], Any, Tuple[Any, ...], int]:
+    for i, child in enumerate(items):
+        child_size: int = _size_of(child)
+        if index < child_size:
+            return items[:i], child, items[i + 1:], index
+        index -= child_size
+    raise IndexError("Index out of range")
+
+
+def _split(tree: _Tree, index: int) -> Tuple[_Tree, Any, _Tree, int]:
+    """Split a tree around the item holding position ``index``.
+
+    Returns the items before it, the item, the items after it and the
+    offset of ``index`` inside the item; only O(log n) nodes are created.
+    """
+    if isinstance(tree, _Single):
+        return None, tree.item, None, index
+    assert tree is not None
+    prefix_size: int = sum(_size_of(item) for item in tree.prefix)
+    if index < prefix_size:
+        before, item, after, index = _split_items(tree.prefix, index)
+        return _build(list(before)), item, _deep_left(after, tree.middle, tree.suffix), index
+    index -= prefix_size
+    middle_size: int = _tree_size(tree.middle)
+    if index < middle_size:
+        left, branch, right, index = _split(tree.middle, index)
+        before, item, after, index = _split_items(branch.items, index)
+        return (_deep_right(tree.prefix, left, before), item,
+                _deep_left(after, right, tree.suffix), index)
+    before, item, after, index = _split_items(tree.suffix, index - middle_size)
+    return _deep_right(tree.prefix, tree.middle, before), item, _build(list(after)), index
+
+
+def _pick(items: Tuple[Any, ...], index: int) -> Tuple[Any, int]:
+    """Child of ``items`` covering position ``index``, and the index inside it."""
+    for child in items:
+        child_size: int = _size_of(child)
+        if index < child_size:
+            return child, index
+        index -= child_size
+    raise IndexError("Index out of range")
+
+
+def _locate(tree: _Tree, index: int) -> Tuple[UnrolledNode, int]:
+    """Find the leaf holding position ``index`` and the offset inside it.
+
+    Descends one level per step using the cached sizes, so the cost is
+    O(log n) whatever the position.
+    """
+    if not 0 <= index < _tree_size(tree):
+        raise IndexError("Index out of range")
+    item: Any = tree
+    while True:
+        if isinstance(item, _Deep):
+            prefix_size: int = sum(_size_of(child) for child in item.prefix)
+            middle_size: int = _tree_size(item.middle)
+            if index < prefix_size:
+                item, index = _pick(item.prefix, index)
+            elif index < prefix_size + middle_size:
+                item, index = item.middle, index - prefix_size
             else:
-                return cons(node.values, _add_help(node.next), node.capacity)
+                item, index = _pick(item.suffix, index - prefix_size - middle_size)
+        elif isinstance(item, _Single):
+            item = item.item
+        elif isinstance(item, _Branch):
+            item, index = _pick(item.items, index)
         else:
-            return cons(None, _add_help(node.next), node.capacity)
+            if _profiler is not None:
+                _profiler.count("nodes_visited")
+            return item, index
 
-    return UnrolledLinkedList(url.node_capacity, _add_help(url.head))
 
+def _adjust(
+    tree: _Tree, index: int, func: Callable[[UnrolledNode, int], UnrolledNode]
+) -> _Tree:
+    """Replace the leaf holding ``index`` with ``func(leaf, offset)``.
 
-def add_to_end(url: UnrolledLinkedList, element: Any) -> UnrolledLinkedList:
-    def _add_to_end_help(node: Optional[UnrolledNode]) -> Optional[UnrolledNode]:
-        if node is None:
-            return cons([element], None, url.node_capacity)
-        if node.next is None:
-            if node.values is None:
-                return cons(None, None, node.capacity)
-            else:
-                if len(node.values) < node.capacity:
-                    if element is not None:
-                        return cons(node.values + [element], None, node.capacity)
-                    else:
-                        return cons(node.values, cons(None, None, node.capacity), node.capacity)
+    Only the O(log n) nodes on the path to the leaf are copied.
+    """
+    if not 0 <= index < _tree_size(tree):
+        raise IndexError("Index out of range")
+    if _profiler is not None:
+        _profiler.count("nodes_visited")
+
+    def _in_items(items: Tuple[Any, ...], idx: int) -> Tuple[Any, ...]:
+        for i, child in enumerate(items):
+            child_size: int = _size_of(child)
+            if idx < child_size:
+                if isinstance(child, _Branch):
+                    child = _Branch(_in_items(child.items, idx))
                 else:
-                    return cons(node.values, cons(None, None, node.capacity), node.capacity)
-        return cons(node.values, _add_to_end_help(node.next), node.capacity)
-    return UnrolledLinkedList(url.node_capacity, _add_to_end_help(url.head))
+                    child = func(child, idx)
+                return items[:i] + (child,) + items[i + 1:]
+            idx -= child_size
+        raise IndexError("Index out of range")
 
+    def _in_tree(node: _Tree, idx: int) -> _Tree:
+        if isinstance(node, _Single):
+            return _Single(_in_items((node.item,), idx)[0])
+        assert node is not None
+        prefix_size: int = sum(_size_of(item) for item in node.prefix)
+        if idx < prefix_size:
+            return _Deep(_in_items(node.prefix, idx), node.middle, node.suffix)
+        idx -= prefix_size
+        middle_size: int = _tree_size(node.middle)
+        if idx < middle_size:
+            return _Deep(node.prefix, _in_tree(node.middle, idx), node.suffix)
+        return _Deep(node.prefix, node.middle, _in_items(node.suffix, idx - middle_size))
 
-def find(
-    url: Optional[UnrolledLinkedList], predicate: Callable[[Any], bool]
-) -> Optional[Any]:
-    if url is None:
-        return None
-    current_node: Optional[UnrolledNode] = url.head
-    while current_node:
-        if current_node.values is None:
-            if predicate(None):
-                return None
-        else:
-            for value in current_node.values:
-                if predicate(value):
-                    return value
-        current_node = current_node.next
-    return None
+    return _in_tree(tree, index)
 
 
-def member(url: Optional[UnrolledLinkedList], value: Optional[Any]) -> bool:
-    if url is None:
-        return False
-    current_node: Optional[UnrolledNode] = url.head
-    while current_node:
-        if current_node.values:
-            if value:
-                if value in current_node.values:
-                    return True
-        else:
-            if not value:
-                return True
-        current_node = current_node.next
-    return False
+def _adjust_many(
+    tree: _Tree, positions: List[int], func: Callable[[UnrolledNode, int], UnrolledNode]
+) -> _Tree:
+    """Replace every leaf holding one of ``positions`` with ``func(leaf, start)``.
 
+    ``positions`` must be sorted and ``start`` is the first position of the
+    leaf.  One descent serves all of them, so a node on the path to several
+    replaced leaves is copied once.
+    """
+    def _in_items(items: Tuple[Any, ...], base: int, lo: int, hi: int) -> Tuple[Any, ...]:
+        result: List[Any] = list(items)
+        for i, child in enumerate(items):
+            child_base: int = base
+            base += _size_of(child)
+            end: int = lo
+            while end < hi and positions[end] < base:
+                end += 1
+            if end > lo:
+                if isinstance(child, _Branch):
+                    result[i] = _Branch(_in_items(child.items, child_base, lo, end))
+                else:
+                    if _profiler is not None:
+                        _profiler.count("nodes_visited")
+                    result[i] = func(child, child_base)
+                lo = end
+        return tuple(result)
 
-def url_set(
-    url: Optional[UnrolledLinkedList], index: int, value: Any
-) -> UnrolledLinkedList:
-    def _set_help(
-        node: Optional[UnrolledNode], idx: int, val: Any
-    ) -> Optional[UnrolledNode]:
-        if node is None:
-            raise IndexError("Index out of range")
-        if node.values is None:
-            if idx > 0:
-                return cons(None, _set_help(node.next, idx - 1, val), node.capacity)
+    def _in_tree(node: _Tree, base: int, lo: int, hi: int) -> _Tree:
+        if lo == hi:
+            return node
+        if isinstance(node, _Single):
+            return _Single(_in_items((node.item,), base, lo, hi)[0])
+        assert node is not None
+        prefix_end: int = base + sum(_size_of(item) for item in node.prefix)
+        middle_end: int = prefix_end + _tree_size(node.middle)
+        split: int = lo
+        while split < hi and positions[split] < prefix_end:
+            split += 1
+        cut: int = split
+        while cut < hi and positions[cut] < middle_end:
+            cut += 1
+        return _Deep(_in_items(node.prefix, base, lo, split),
+                     _in_tree(node.middle, prefix_end, split, cut),
+                     _in_items(node.suffix, middle_end, cut, hi))
+
+    return _in_tree(tree, 0, 0, len(positions))
+
+
+def _leaves(tree: _Tree, backwards: bool = False) -> Iterator[UnrolledNode]:
+    """The leaf blocks of ``tree`` in order."""
+    if _profiler is not None:
+        return _profiler.visiting(_walk(tree, backwards))
+    return _walk(tree, backwards)
+
+
+def _walk(tree: _Tree, backwards: bool) -> Iterator[UnrolledNode]:
+    """Yield the leaf blocks of ``tree`` in order, using an explicit stack."""
+    stack: List[Any] = [tree]
+    while stack:
+        item: Any = stack.pop()
+        if item is None:
+            continue
+        if isinstance(item, _Branch):
+            stack.extend(item.items if backwards else reversed(item.items))
+        elif isinstance(item, _Deep):
+            if backwards:
+                stack.extend(item.prefix)
+                stack.append(item.middle)
+                stack.extend(item.suffix)
             else:
-                return cons(val, node.next, node.capacity)
-        if idx >= len(node.values):
-            return cons(node.values, _set_help(node.next, idx - len(node.values), val), node.capacity)
-        if node.values is None:
-            return cons([val], node.next, node.capacity)
+                stack.extend(reversed(item.suffix))
+                stack.append(item.middle)
+                stack.extend(reversed(item.prefix))
+        elif isinstance(item, _Single):
+            stack.append(item.item)
         else:
-            if val is None and node.capacity == 1:
-                return cons(None, node.next, node.capacity)
-            else:
-                new_values: List[Any] = node.values[:]
-                new_values[idx] = val
-                return cons(new_values, node.next, node.capacity)
-    if url is None:
-        return UnrolledLinkedList()
-    return UnrolledLinkedList(url.node_capacity, _set_help(url.head, index, value))
+            yield item
 
 
-def from_list(lst: List[Any], capacity: Optional[int] = 1) \
-        -> Optional[UnrolledLinkedList]:
-    if len(lst) == 0:
-        return UnrolledLinkedList()
+def _nodes(node: Optional[UnrolledNode]) -> Iterator[UnrolledNode]:
+    """Walk a node chain front to back with a loop, one node per step."""
+    while node is not None:
+        yield node
+        node = node.next
 
-    def _from_list_help(lst2: List[Any], capacity2: Optional[int] = 1) \
-            -> Optional[UnrolledNode]:
-        if capacity2 is None:
-            capacity2 = 1
-        if len(lst2) == 0 or len(lst2) <= capacity2:
-            if lst2[0] is None and capacity == 1:
-                return cons(None, None, capacity2)
-            return cons(lst2, None, capacity2)
-        if lst2[0] is None:
-            return cons(None, _from_list_help(lst2[capacity2:], capacity2), capacity2)
 
-        return cons(lst2[:capacity2], _from_list_help(lst2[capacity2:], capacity2), capacity2)
-    if capacity is None:
-        capacity = 1
-    return UnrolledLinkedList(capacity, _from_list_help(lst, capacity))
+def _chain(tree: _Tree) -> Optional[UnrolledNode]:
+    """Link the leaves of ``tree`` into a ``next`` chain.
 
+    Leaves whose ``next`` already points at the rebuilt rest of the chain
+    are reused, so lists built from a chain give that chain back.
+    """
+    head: Optional[UnrolledNode] = None
+    for leaf in _leaves(tree, backwards=True):
+        if leaf.next is head:
+            head = leaf
+        else:
+            head = UnrolledNode(leaf.values, head, leaf.capacity)
+    return head
 
-def to_list(url: Optional[UnrolledLinkedList]) -> List[Any]:
-    if url is None:
-        return []
-    result: List[Any] = []
 
-    def _to_list_help(current_node: Optional[UnrolledNode]) -> None:
-        if current_node is None:
-            return
-        if current_node.values:
-            result.extend(current_node.values)
-        else:
-            result.append(None)
-        _to_list_help(current_node.next)
+# Structural hashing.  A block hashes its capacity and elements, and a
+# run of blocks hashes as a polynomial in the block hashes, so equal lists
+# hash alike whatever the shape of their trees.  Each branch and deep node
+# caches its ``(hash, base ** blocks)`` digest the first time it is asked,
+# which a new version only has to redo along the path it copied.
+_HASH_MODULUS: int = (1 << 61) - 1
+_HASH_BASE: int = 1000003
 
-    _to_list_help(url.head)
-    return result
 
+def _block_hash(node: UnrolledNode) -> int:
+    values: Optional[Values] = node.values
+    return hash((node.capacity, None if values is None else tuple(_plain(values))))
 
-def remove(
-    url: Optional[UnrolledLinkedList], element: Any
-) -> Optional[UnrolledLinkedList]:
-    if url is None:
-        return UnrolledLinkedList()
-    if url.head is None:
-        return url
 
-    def _remove_help(node: UnrolledNode) -> Optional[UnrolledNode]:
-        if node is None:
-            return None
-        if node.values:
-            new_values: List[Any] = [value for value in node.values if value != element]
-            if not new_values:
-                return _remove_help(node.next)
-            return cons(new_values, _remove_help(node.next), node.capacity)
-        else:
-            return cons(None, _remove_help(node.next), node.capacity)
-    return UnrolledLinkedList(url.node_capacity, _remove_help(url.head))
+def _digest(item: Any) -> Tuple[int, int]:
+    if item is None:
+        return 0, 1
+    if isinstance(item, _Single):
+        return _digest(item.item)
+    if isinstance(item, (_Branch, _Deep)):
+        if item.digest is None:
+            parts: Tuple[Any, ...] = (
+                item.items if isinstance(item, _Branch) else item.prefix + (item.middle,) + item.suffix)
+            digest, power = 0, 1
+            for part_digest, part_power in map(_digest, parts):
+                digest = (digest * part_power + part_digest) % _HASH_MODULUS
+                power = power * part_power % _HASH_MODULUS
+            item.digest = digest, power
+        return item.digest
+    return _block_hash(item) % _HASH_MODULUS, _HASH_BASE
 
 
-def reverse(url: Optional[UnrolledLinkedList]) -> UnrolledLinkedList:
+def _cached_digest(item: Any) -> Optional[Tuple[int, int]]:
+    return item.digest if isinstance(item, (_Branch, _Deep)) else None
 
-    def _reverse_help(
-        node: UnrolledNode, prev: Optional[UnrolledNode] = None
-    ) -> UnrolledNode:
-        if node is None:
-            return prev
-        if node.values:
-            return _reverse_help(node.next, UnrolledNode(node.values[::-1], prev, node.capacity))
-        else:
-            return _reverse_help(node.next, UnrolledNode(None, prev, node.capacity))
 
-    if url is None:
-        return UnrolledLinkedList()
-    if url.head is None:
+def _span(item: Any) -> int:
+    if item is None or isinstance(item, (_Single, _Deep)):
+        return _tree_size(item)
+    return _size_of(item)
+
+
+def _expand(stack: List[Any]) -> None:
+    """Replace the tree, branch or single on top of ``stack`` by its children."""
+    item: Any = stack.pop()
+    if isinstance(item, _Branch):
+        stack.extend(reversed(item.items))
+    elif isinstance(item, _Deep):
+        stack.extend(reversed(item.suffix))
+        stack.append(item.middle)
+        stack.extend(reversed(item.prefix))
+    else:
+        stack.append(item.item)
+
+
+def _same_leaves(left: _Tree, right: _Tree) -> bool:
+    """Whether two trees hold equal blocks, in order.
+
+    Both trees are unfolded side by side, always opening the larger of the
+    two pieces on top.  A piece shared by both versions is skipped without
+    being opened, and two aligned pieces with different cached digests
+    prove the trees differ, so versions that only differ near one spot
+    are compared in about the cost of that difference.
+    """
+    lefts: List[Any] = [left]
+    rights: List[Any] = [right]
+    while True:
+        while lefts and lefts[-1] is None:
+            lefts.pop()
+        while rights and rights[-1] is None:
+            rights.pop()
+        if not lefts or not rights:
+            return not lefts and not rights
+        x: Any = lefts[-1]
+        y: Any = rights[-1]
+        if x is y:
+            lefts.pop()
+            rights.pop()
+            continue
+        x_leaf: bool = isinstance(x, UnrolledNode)
+        y_leaf: bool = isinstance(y, UnrolledNode)
+        if x_leaf and y_leaf:
+            if not _same_block(x, y):
+                return False
+            lefts.pop()
+            rights.pop()
+            continue
+        x_span: int = _span(x)
+        y_span: int = _span(y)
+        if x_span == y_span:
+            x_digest: Optional[Tuple[int, int]] = _cached_digest(x)
+            y_digest: Optional[Tuple[int, int]] = _cached_digest(y)
+            if x_digest is not None and y_digest is not None and x_digest != y_digest:
+                return False
+        if not x_leaf and (y_leaf or x_span >= y_span):
+            _expand(lefts)
+        if not y_leaf and (x_leaf or y_span >= x_span):
+            _expand(rights)
+
+
+def _same_block(left: UnrolledNode, right: UnrolledNode) -> bool:
+    if left.capacity != right.capacity:
+        return False
+    if left.values is None or right.values is None:
+        return left.values is right.values
+    if type(left.values) is type(right.values) and not _is_ndarray(left.values):
+        return left.values == right.values
+    if len(left.values) != len(right.values):
+        return False
+    return list(_plain(left.values)) == list(_plain(right.values))
+
+
+class _Unlinked:
+    """Marks a list whose ``head`` chain has not been built yet.
+
+    Pickles by name, so copies of a list still recognise it.
+    """
+
+    def __reduce__(self) -> str:
+        return "_UNLINKED"
+
+
+_UNLINKED: Any = _Unlinked()
+
+_L = TypeVar("_L", bound="UnrolledLinkedList")
+
+
+class UnrolledLinkedList:
+    def __init__(
+        self,
+        node_capacity: Capacity = 1,
+        head: Optional[UnrolledNode] = None,
+        dtype: Optional[DType] = None,
+        min_fill: float = 0.0,
+    ) -> None:
+        # Storage for new numeric blocks, or ``None`` for plain lists.
+        self.dtype: Optional[DType] = _check_dtype(dtype)
+        # Nodes holding fewer than ``min_fill * capacity`` elements are
+        # merged with a neighbour by the operations that shrink nodes.
+        self.min_fill: float = _check_min_fill(min_fill)
+        self._tree: _Tree = _build(list(_nodes(head)))
+        self.node_capacity: int = _resolve_capacity(node_capacity, _tree_size(self._tree), self.dtype)
+        self._head: Optional[UnrolledNode] = head
+        # True when no block before the last one can take an ``add``;
+        # ``None`` until someone needs to know.
+        self._dense: Optional[bool] = None
+        # Every element, for O(1) ``member``; built by ``indexed``.
+        self._index: Optional[FrozenSet[Any]] = None
+
+    @classmethod
+    def _from_tree(
+        cls: Type[_L],
+        node_capacity: int,
+        tree: _Tree,
+        dense: Optional[bool] = None,
+        dtype: Optional[DType] = None,
+        min_fill: float = 0.0,
+    ) -> _L:
+        url: _L = cls.__new__(cls)
+        url.node_capacity = node_capacity
+        url.dtype = dtype
+        url.min_fill = min_fill
+        url._tree = tree
+        url._head = _UNLINKED
+        url._dense = dense
+        url._index = None
         return url
-    return UnrolledLinkedList(url.node_capacity, _reverse_help(url.head))
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # The ``head`` chain is rebuilt from the tree on demand, and blocks
+        # viewing a memory-mapped file are copied out of it.
+        state: Dict[str, Any] = dict(self.__dict__)
+        state["_head"] = _UNLINKED
+        leaves: List[UnrolledNode] = list(_leaves(self._tree))
+        if any(isinstance(node.values, memoryview) for node in leaves):
+            state["_tree"] = _build([_leaf(_portable(node.values), node.capacity) for node in leaves])
+        return state
 
-def m_concat(
-    url1: Optional[UnrolledLinkedList], url2: Optional[UnrolledLinkedList]
-) -> Optional[UnrolledLinkedList]:
+    @property
+    def head(self) -> Optional[UnrolledNode]:
+        if self._head is _UNLINKED:
+            self._head = _chain(self._tree)
+        return self._head
 
-    def _reverse_node(
-        node: Optional[UnrolledNode], prev: Optional[UnrolledNode] = None
-    ) -> Optional[UnrolledNode]:
-        if node is None:
-            return prev
-        new_node: UnrolledNode = UnrolledNode(node.values, prev, node.capacity)
-        return _reverse_node(node.next, new_node)
-
-    def _m_concat_help(
-        node1: Optional[UnrolledNode], node2: Optional[UnrolledNode]
-    ) -> Optional[UnrolledNode]:
-        if node1 is None:
-            return node2
-        return _m_concat_help(node1.next,
-                              cons(node1.values, node2, node1.capacity))
+    @head.setter
+    def head(self, head: Optional[UnrolledNode]) -> None:
+        self._tree = _build(list(_nodes(head)))
+        self._head = head
+        self._dense = None
+        self._index = None
 
-    if url1 is None:
-        return url2
-    if url2 is None:
-        return url1
-    capacity: int = max(url1.node_capacity, url2.node_capacity)
-    return UnrolledLinkedList(
-        capacity, _m_concat_help(_reverse_node(url1.head), url2.head)
-    )
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, UnrolledLinkedList):
+            return False
+        return _same_leaves(self._tree, other._tree)
 
+    def __hash__(self) -> int:
+        """Structural hash; raises ``TypeError`` if an element is unhashable."""
+        return _digest(self._tree)[0]
 
-def iterator(lst: Optional[UnrolledLinkedList]):
-    if lst is None:
-        return
-    current_node: Optional[UnrolledNode] = lst.head
-
-    def _iterator_help():
-        nonlocal current_node
-        while current_node:
-            if current_node.values is None:
-                yield None
-                current_node = current_node.next
-            if current_node.values:
-                current_value: Any = current_node.values[0]
-                yield current_value
-                current_node = cons(current_node.values[1:],
-                                    current_node.next, current_node.capacity)
+    def __len__(self) -> int:
+        return _tree_size(self._tree)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        """An element, or a slice as a list of the same kind.
+
+        A slice with step 1 is a view: it shares every block that lies
+        wholly inside the range and trims only the two blocks at its ends,
+        in O(log n) whatever its length.  Other steps copy the elements.
+        """
+        if not isinstance(index, slice):
+            return url_get(self, index + len(self) if index < 0 else index)
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            picked: UnrolledLinkedList = from_list(to_list(self)[index], self.node_capacity, self.dtype)
+            return _derive(self, picked._tree, picked._dense)
+        if start == 0 and stop >= len(self):
+            return self._from_tree(self.node_capacity, self._tree, self._dense, self.dtype, self.min_fill)
+        _, rest = split_at(self, start)
+        part, _ = split_at(rest, max(0, stop - start))
+        return self._from_tree(self.node_capacity, part._tree, part._dense, self.dtype, self.min_fill)
+
+    def __iter__(self) -> Iterator[Any]:
+        return chain.from_iterable(map(_elements, _leaves(self._tree)))
+
+    def __reversed__(self) -> Iterator[Any]:
+        return chain.from_iterable(
+            reversed(_elements(node)) for node in _leaves(self._tree, backwards=True))
+
+    def iter_chunks(self) -> Iterator[Values]:
+        """Yield the block of every node in order, without copying.
+
+        The blocks are the nodes' own ``values`` (a list, an ``array`` or an
+        ``ndarray``) and must not be modified.  An empty ``None`` node yields
+        ``[None]``.
+        """
+        return map(_items, _leaves(self._tree))
+
+    async def aiter_chunks(self) -> AsyncIterator[Values]:
+        """Like ``iter_chunks``, for ``async for``; yields to the event loop after each block."""
+        for block in self.iter_chunks():
+            yield block
+            await asyncio.sleep(0)
+
+    @staticmethod
+    def builder(capacity: Capacity = 1, dtype: Optional[DType] = None) -> "UnrolledLinkedListBuilder":
+        """A mutable builder that fills nodes in place; see ``UnrolledLinkedListBuilder``."""
+        return UnrolledLinkedListBuilder(capacity, dtype)
+
+    def query(self) -> "Query":
+        """Start a lazy ``map``/``filter``/``take`` pipeline over this list."""
+        return Query(self)
+
+    def __str__(self) -> str:
+        result: List[str] = []
+        for node in _leaves(self._tree):
+            if node.values is not None and len(node.values):
+                result.append("".join(map(str, node.values)))
             else:
-                current_node = current_node.next
-    return _iterator_help()
+                result.append("None")
+        return "".join(result)
 
 
-def url_filter(
-    url: Optional[UnrolledLinkedList], predicate: Callable[[Any], bool]
-) -> UnrolledLinkedList:
-    if url is None:
-        return UnrolledLinkedList()
+class UnrolledLinkedListBuilder:
+    """Transient for bulk construction of an ``UnrolledLinkedList``.
 
-    def _filter_help(node: Optional[UnrolledNode]) -> Optional[UnrolledNode]:
-        if node is None:
-            return None
-        if node.values is not None:
-            filtered_values: List[Any] = [value for value in node.values if predicate(value)]
-            if not filtered_values:
-                return _filter_help(node.next)
-            return cons(filtered_values, _filter_help(node.next), node.capacity)
-        else:
-            if predicate(None):
-                return cons([], _filter_help(node.next), node.capacity)
+    Elements are appended in place to the node being filled, and full
+    nodes are pushed onto the block tree.  ``freeze`` seals the last node
+    and returns an ordinary immutable list in O(1); the builder cannot be
+    used afterwards.  A builder belongs to the thread that created it.
+    """
+
+    def __init__(self, capacity: Capacity = 1, dtype: Optional[DType] = None) -> None:
+        self.dtype: Optional[DType] = _check_dtype(dtype)
+        self.capacity: int = _resolve_capacity(capacity, 0, self.dtype) or 1
+        self._tree: _Tree = None
+        self._block: List[Any] = []
+        self._owner: int = threading.get_ident()
+        self._frozen: bool = False
+
+    def _check(self) -> None:
+        if self._frozen:
+            raise RuntimeError("Builder has already been frozen")
+        if threading.get_ident() != self._owner:
+            raise RuntimeError("Builder used outside the thread that created it")
+
+    def _seal(self) -> None:
+        self._tree = _push_back(self._tree, _chunk_leaf(self._block, self.capacity, self.dtype))
+        self._block = []
+
+    def append(self, element: Any) -> "UnrolledLinkedListBuilder":
+        self._check()
+        self._block.append(element)
+        if len(self._block) == self.capacity:
+            self._seal()
+        return self
+
+    def extend(self, iterable: Iterable[Any]) -> "UnrolledLinkedListBuilder":
+        self._check()
+        source: Iterator[Any] = iter(iterable)
+        while True:
+            missing: int = self.capacity - len(self._block)
+            self._block.extend(islice(source, missing))
+            if len(self._block) < self.capacity:
+                return self
+            self._seal()
+
+    def freeze(self) -> UnrolledLinkedList:
+        self._check()
+        if self._block:
+            self._seal()
+        self._frozen = True
+        return UnrolledLinkedList._from_tree(self.capacity, self._tree, True, self.dtype)
+
+
+class Query:
+    """Lazy pipeline over the blocks of an ``UnrolledLinkedList``.
+
+    ``map``, ``filter`` and ``take`` only record a stage.  Nothing runs
+    until the query is iterated, reduced or collected; then every stage
+    is applied to one source block before the next block is read, so no
+    intermediate lists of nodes are built.  Results match ``url_map``,
+    ``url_filter`` and ``reduce``: empty ``None`` nodes are mapped through
+    ``func(None)``, survive filters, and are skipped by ``reduce``.
+    """
+
+    def __init__(
+        self, source: UnrolledLinkedList, stages: Tuple[Tuple[str, Any], ...] = ()
+    ) -> None:
+        self._source: UnrolledLinkedList = source
+        self._stages: Tuple[Tuple[str, Any], ...] = stages
+
+    def _then(self, kind: str, arg: Any) -> "Query":
+        return Query(self._source, self._stages + ((kind, arg),))
+
+    def map(self, func: Callable[[Any], Any]) -> "Query":
+        return self._then("map", func)
+
+    def filter(self, predicate: Callable[[Any], bool]) -> "Query":
+        return self._then("filter", predicate)
+
+    def take(self, count: int) -> "Query":
+        return self._then("take", max(count, 0))
+
+    def _blocks(self) -> Iterator[Optional[Values]]:
+        """Run the stages block by block; ``None`` stands for an empty node."""
+        stages: Tuple[Tuple[str, Any], ...] = self._stages
+        if _profiler is not None:
+            stages = tuple((kind, arg if kind == "take" else _profiler.counted(arg)) for kind, arg in stages)
+        remaining: List[int] = [arg if kind == "take" else 0 for kind, arg in stages]
+        for node in _leaves(self._source._tree):
+            if any(kind == "take" and left == 0 for (kind, _), left in zip(stages, remaining)):
+                return
+            block: Optional[Values] = None
+            if node.values is not None and len(node.values):
+                block = _plain(node.values)
+            for i, (kind, arg) in enumerate(stages):
+                if kind == "map":
+                    if block is None:
+                        mapped: Any = arg(None)
+                        block = None if mapped is None else [mapped]
+                    else:
+                        block = [arg(value) for value in block]
+                elif kind == "filter":
+                    if block is None:
+                        arg(None)
+                        continue
+                    block = [value for value in block if arg(value)]
+                    if not block:
+                        break
+                else:
+                    count: int = 1 if block is None else len(block)
+                    if block is not None and count > remaining[i]:
+                        block = block[:remaining[i]]
+                    remaining[i] = max(remaining[i] - count, 0)
             else:
-                return cons(None, _filter_help(node.next), node.capacity)
-    return UnrolledLinkedList(url.node_capacity, _filter_help(url.head))
+                yield block
 
+    def __iter__(self) -> Iterator[Any]:
+        return chain.from_iterable([None] if block is None else block for block in self._blocks())
 
-def url_map(
-    url: Optional[UnrolledLinkedList], func: Callable[[Any], Any]
+    @_instrumented
+    def reduce(self, func: Callable[[Any, Any], Any], init: Any) -> Any:
+        blocks: Iterator[Values] = (block for block in self._blocks() if block is not None)
+        return functools.reduce(func, chain.from_iterable(blocks), init)
+
+    @_instrumented
+    def collect(self, capacity: Optional[int] = None) -> UnrolledLinkedList:
+        """Materialize the result; nodes are packed the way ``from_list`` packs them.
+
+        The result keeps the fill policy of the source, which full blocks
+        already meet.
+        """
+        builder: UnrolledLinkedListBuilder = UnrolledLinkedListBuilder(
+            capacity or self._source.node_capacity, self._source.dtype)
+        for block in self._blocks():
+            if block is None:
+                builder.append(None)
+            else:
+                builder.extend(block)
+        built: UnrolledLinkedList = builder.freeze()
+        return UnrolledLinkedList._from_tree(
+            built.node_capacity, built._tree, built._dense, built.dtype, self._source.min_fill)
+
+
+@_instrumented
+def url_empty(capacity: Capacity = 1) -> UnrolledLinkedList:
+    return UnrolledLinkedList(capacity)
+
+
+@_instrumented
+def cons(
+    values: Optional[Values], next_node: Optional[UnrolledNode], capacity: Optional[Any] = 1
+) -> UnrolledNode:
+    return UnrolledNode(values, next_node, capacity)
+
+
+def _leaf(values: Optional[Values], capacity: int) -> UnrolledNode:
+    return UnrolledNode(values, None, capacity)
+
+
+def _chunk_leaf(chunk: List[Any], capacity: int, dtype: Optional[DType]) -> UnrolledNode:
+    """Leaf for a freshly built ``chunk``; a lone ``None`` at capacity 1 is a ``None`` node."""
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(chunk))
+    if chunk[0] is None and capacity == 1:
+        return _leaf(None, capacity)
+    return _leaf(_pack(chunk, dtype), capacity)
+
+
+def _derive(
+    url: UnrolledLinkedList, tree: _Tree, dense: Optional[bool] = None
 ) -> UnrolledLinkedList:
-    if url is None:
-        return UnrolledLinkedList()
+    """A new list over ``tree`` with the capacity, dtype and fill policy of ``url``."""
+    return UnrolledLinkedList._from_tree(url.node_capacity, tree, dense, url.dtype, url.min_fill)
 
-    def _map_help(
-        node: Optional[UnrolledNode], func2: Callable[[Any], Any]
-    ) -> Optional[UnrolledNode]:
-        if node is None:
-            return None
-        if node.values is None:
-            return cons(func2(None), _map_help(node.next, func2), node.capacity)
-        else:
-            mapped_values: List[Any] = [func2(value) for value in node.values]
-            return cons(mapped_values, _map_help(node.next, func2), node.capacity)
-    return UnrolledLinkedList(url.node_capacity, _map_help(url.head, func))
 
+# Shared references.  Lists are immutable, so threads that share one
+# logical list share a reference to its current version instead.  Reading
+# the reference is a single attribute load, which is atomic, so readers
+# never lock and always see a whole version.  Writers build the next
+# version without any lock and then install it with a compare-and-set
+# that holds a lock only for an identity test and a store; a writer whose
+# version went stale in the meantime rebuilds from the newer one.
 
-def reduce(
+
+class Contention(NamedTuple):
+    """Counters of an ``Atom`` created with ``counters=True``."""
+
+    # Successful ``swap`` calls.
+    swaps: int
+    # Times a ``swap`` rebuilt its value because another writer got in first.
+    retries: int
+    # ``compare_and_set`` calls, outside ``swap``, that found a newer value.
+    failed_sets: int
+
+
+class Atom:
+    """Thread-safe reference to an ``UnrolledLinkedList`` (or any value).
+
+    ``deref`` returns the current value without locking.  ``swap(func,
+    *args)`` computes ``func(current, *args)`` and installs it, retrying
+    with the newer value if another writer replaced it in between, so no
+    update is lost and writers never wait for each other's rebuilds;
+    ``func`` may run more than once and should have no side effects.
+    ``compare_and_set(old, new)`` installs ``new`` only if the current
+    value is ``old`` (by identity).
+    """
+
+    def __init__(self, value: Any = None, counters: bool = False) -> None:
+        self._value: Any = value
+        self._lock: threading.Lock = threading.Lock()
+        self._counters: Optional[List[int]] = [0, 0, 0] if counters else None
+
+    def deref(self) -> Any:
+        return self._value
+
+    def compare_and_set(self, old: Any, new: Any) -> bool:
+        with self._lock:
+            if self._value is old:
+                self._value = new
+                return True
+            if self._counters is not None:
+                self._counters[2] += 1
+            return False
+
+    def swap(self, func: Callable[..., Any], *args: Any) -> Any:
+        while True:
+            old: Any = self._value
+            new: Any = func(old, *args)
+            with self._lock:
+                if self._value is old:
+                    self._value = new
+                    if self._counters is not None:
+                        self._counters[0] += 1
+                    return new
+                if self._counters is not None:
+                    self._counters[1] += 1
+
+    def reset(self, value: Any) -> Any:
+        """Install ``value`` unconditionally and return it."""
+        with self._lock:
+            self._value = value
+        return value
+
+    def contention(self) -> Contention:
+        if self._counters is None:
+            raise ValueError("Atom was created without counters")
+        with self._lock:
+            return Contention(*self._counters)
+
+    def __repr__(self) -> str:
+        return f"Atom({self._value!r})"
+
+
+# ``array`` typecodes a list can store its blocks in.  A block only uses
+# the array when every element has exactly the matching Python type, so
+# converting to and from the array never changes an element.  With NumPy
+# installed, any other integer or float dtype stores blocks as ndarrays
+# under the same rule, and the kernels below run on whole blocks.  Floats
+# are only stored at double precision: a narrower type would round them.
+_INT_TYPECODES: str = "bBhHiIlLqQ"
+_FLOAT_TYPECODES: str = "d"
+
+
+def _check_dtype(dtype: Optional[DType]) -> Optional[DType]:
+    if dtype is None:
+        return None
+    if isinstance(dtype, str) and len(dtype) == 1:
+        if dtype not in _INT_TYPECODES + _FLOAT_TYPECODES:
+            raise ValueError(f"Unsupported dtype: {dtype!r}")
+        return dtype
+    if np is None:
+        raise ValueError(f"Unsupported dtype without numpy: {dtype!r}")
+    try:
+        numpy_dtype = np.dtype(dtype)
+    except TypeError:
+        raise ValueError(f"Unsupported dtype: {dtype!r}") from None
+    if not _exact(numpy_dtype):
+        raise ValueError(f"Unsupported dtype: {dtype!r}")
+    return numpy_dtype
+
+
+def _exact(numpy_dtype: Any) -> bool:
+    """Whether a NumPy dtype holds Python ints or floats without changing them."""
+    return numpy_dtype.kind in "iu" or numpy_dtype.kind == "f" and numpy_dtype.itemsize == 8
+
+
+def _kind(dtype: DType) -> type:
+    if isinstance(dtype, str):
+        return int if dtype in _INT_TYPECODES else float
+    return int if dtype.kind in "iu" else float
+
+
+# Automatic capacities.  Every whole-list operation pays Python overhead
+# per node, while the block copies of point updates run in C, so the grid
+# benchmark favours large blocks for almost every operation.  ndarray
+# blocks can be larger still because their kernels are vectorized.  Only
+# appends to the last block copy it whole each time, so a list built by
+# many ``add``/``add_to_end`` calls does better with smaller blocks.
+_AUTO_CAPACITY: int = 512
+_AUTO_CAPACITY_NDARRAY: int = 4096
+_AUTO_CAPACITY_MIN: int = 16
+_AUTO_APPEND_DIVISOR: int = 8
+_APPENDS: Tuple[str, ...] = ("add", "add_to_end")
+
+
+def auto_capacity(
+    length: int = 0, dtype: Optional[DType] = None, profile: Optional[OpProfile] = None
+) -> int:
+    """A node capacity for a list of about ``length`` elements (0 if unknown).
+
+    The choice depends on how blocks are stored (``dtype``) and, when a
+    ``profile`` from ``profile_ops`` is given, on the operations it saw:
+    when appends are most of the calls, blocks are kept small.
+    """
+    dtype = _check_dtype(dtype)
+    numpy_blocks: bool = dtype is not None and not isinstance(dtype, str)
+    capacity: int = _AUTO_CAPACITY_NDARRAY if numpy_blocks else _AUTO_CAPACITY
+    if profile is not None:
+        calls: Dict[str, float] = {op: counters["calls"] for op, counters in profile.ops.items()}
+        if sum(calls.get(op, 0) for op in _APPENDS) * 2 > sum(calls.values()):
+            capacity //= _AUTO_APPEND_DIVISOR
+    if length > 0:
+        capacity = min(capacity, max(_AUTO_CAPACITY_MIN, 1 << (length - 1).bit_length()))
+    return capacity
+
+
+def _resolve_capacity(capacity: Optional[Capacity], length: int, dtype: Optional[DType]) -> int:
+    """``capacity`` as a number; ``"auto"`` uses the operations of an active ``profile_ops``."""
+    if capacity == "auto":
+        return auto_capacity(length, dtype, _profiler)
+    if isinstance(capacity, str):
+        raise ValueError(f"Unknown capacity {capacity!r}; expected a number or 'auto'")
+    return capacity or 1
+
+
+def _is_ndarray(values: Any) -> bool:
+    return np is not None and isinstance(values, np.ndarray)
+
+
+def _plain(values: Values) -> Values:
+    """``values``, with an ndarray block turned into a list of Python scalars."""
+    return values.tolist() if _is_ndarray(values) else values
+
+
+def _infer_dtype(lst: List[Any]) -> Optional[str]:
+    """Typecode for ``dtype="auto"``: ``"q"`` for ints, ``"d"`` for floats."""
+    if not lst:
+        return None
+    if all(type(value) is int for value in lst):
+        if -(1 << 63) <= min(lst) and max(lst) < (1 << 63):
+            return "q"
+        return None
+    if all(type(value) is float for value in lst):
+        return "d"
+    return None
+
+
+def _pack(values: Values, dtype: Optional[DType]) -> Values:
+    """Store ``values`` in a typed block when ``dtype`` fits every element."""
+    if dtype is None or not len(values) or isinstance(values, array) or _is_ndarray(values):
+        return values
+    kind: type = _kind(dtype)
+    if not all(type(value) is kind for value in values):
+        return values
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(values))
+    try:
+        if isinstance(dtype, str):
+            return array(dtype, values)
+        return np.array(values, dtype=dtype)
+    except OverflowError:
+        return values
+
+
+def _typecode(values: Values) -> str:
+    """The typecode of an ``array`` block, or the format of a memory-mapped one."""
+    return values.format if isinstance(values, memoryview) else values.typecode
+
+
+def _copied(values: Values) -> Values:
+    """A copy of an ``array`` block; a memory-mapped view is copied out of the file."""
+    if isinstance(values, memoryview):
+        return array(values.format, values.tobytes())
+    return values[:]
+
+
+def _like(values: Values, items: List[Any]) -> Values:
+    """Store ``items`` taken from ``values`` the same way ``values`` is stored.
+
+    A memory-mapped view is stored as an ``array`` of its format.
+    """
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(items))
+    if isinstance(values, (array, memoryview)):
+        return array(_typecode(values), items)
+    if _is_ndarray(values):
+        return np.array(items, dtype=values.dtype)
+    return items
+
+
+def _fits(values: Values, value: Any) -> bool:
+    if isinstance(values, (array, memoryview)):
+        return type(value) is _kind(_typecode(values))
+    return _is_ndarray(values) and type(value) is _kind(values.dtype)
+
+
+def _appended(values: Values, element: Any) -> Values:
+    """Copy of ``values`` with ``element`` appended."""
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(values) + 1)
+    if _fits(values, element):
+        try:
+            if _is_ndarray(values):
+                return np.concatenate((values, np.array([element], dtype=values.dtype)))
+            grown: Values = _copied(values)
+            grown.append(element)
+            return grown
+        except OverflowError:
+            pass
+    return list(_plain(values)) + [element]
+
+
+def _prepended(values: Values, element: Any) -> Values:
+    """Copy of ``values`` with ``element`` in front."""
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(values) + 1)
+    if _fits(values, element):
+        try:
+            if _is_ndarray(values):
+                return np.concatenate((np.array([element], dtype=values.dtype), values))
+            return array(_typecode(values), [element]) + _copied(values)
+        except OverflowError:
+            pass
+    return [element] + list(_plain(values))
+
+
+def _replaced(values: Values, offset: int, value: Any) -> Values:
+    """Copy of ``values`` with the element at ``offset`` replaced."""
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(values))
+    if _fits(values, value):
+        changed: Values = values.copy() if _is_ndarray(values) else _copied(values)
+        try:
+            changed[offset] = value
+            return changed
+        except OverflowError:
+            pass
+    changed = list(_plain(values))
+    changed[offset] = value
+    return changed
+
+
+def _accepts(node: UnrolledNode) -> bool:
+    """Whether ``add`` would put its element into ``node``."""
+    return node.values is not None and len(node.values) < node.capacity
+
+
+def _is_dense(url: UnrolledLinkedList) -> bool:
+    if url._dense is None:
+        dense: bool = True
+        previous: Optional[UnrolledNode] = None
+        for node in _leaves(url._tree):
+            if previous is not None and _accepts(previous):
+                dense = False
+                break
+            previous = node
+        url._dense = dense
+    return url._dense
+
+
+def _dense_join(first: Optional[bool], last: UnrolledNode, second: Optional[bool]) -> Optional[bool]:
+    """Whether two non-empty runs of blocks are dense together; ``last`` ends the first."""
+    if first is False or second is False or _accepts(last):
+        return False
+    return True if first and second else None
+
+
+# Fill policy.  Shrinking operations pass their new leaves through
+# ``_rebalance``: an underfull node is merged into the node before it, and
+# when the two do not fit in one node the first is filled up and the rest
+# carried on to the next, so only the last node of a run stays underfull.
+# Empty ``None`` nodes are positions of their own and are never merged.
+
+
+def _check_min_fill(min_fill: float) -> float:
+    if not 0.0 <= min_fill <= 1.0:
+        raise ValueError(f"min_fill must be between 0 and 1, got {min_fill!r}")
+    return min_fill
+
+
+def _underfull(node: UnrolledNode, min_fill: float) -> bool:
+    assert node.values is not None
+    return len(node.values) < min_fill * node.capacity
+
+
+def _mergeable(first: UnrolledNode, second: UnrolledNode, min_fill: float) -> bool:
+    if first.values is None or second.values is None or not len(first.values) or not len(second.values):
+        return False
+    if first.capacity != second.capacity or len(first.values) >= first.capacity:
+        return False
+    return _underfull(first, min_fill) or _underfull(second, min_fill)
+
+
+def _joined(first: Values, second: Values, dtype: Optional[DType]) -> Values:
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(first) + len(second))
+    if isinstance(first, array) and isinstance(second, array) and first.typecode == second.typecode:
+        return first + second
+    if _is_ndarray(first) and _is_ndarray(second) and first.dtype == second.dtype:
+        return np.concatenate((first, second))
+    return _pack(list(_plain(first)) + list(_plain(second)), dtype)
+
+
+def _rebalance(
+    leaves: List[UnrolledNode], min_fill: float, dtype: Optional[DType]
+) -> List[UnrolledNode]:
+    """Merge underfull neighbours in ``leaves``, in one pass."""
+    if not min_fill:
+        return leaves
+    result: List[UnrolledNode] = []
+    for leaf in leaves:
+        if not result or not _mergeable(result[-1], leaf, min_fill):
+            result.append(leaf)
+            continue
+        previous: UnrolledNode = result.pop()
+        assert previous.values is not None and leaf.values is not None
+        values: Values = _joined(previous.values, leaf.values, dtype)
+        capacity: int = leaf.capacity
+        if len(values) <= capacity:
+            result.append(_leaf(values, capacity))
+        else:
+            result.append(_leaf(values[:capacity], capacity))
+            result.append(_leaf(values[capacity:], capacity))
+    return result
+
+
+def _mend_back(tree: _Tree, min_fill: float, dtype: Optional[DType]) -> _Tree:
+    """Rebalance the last two leaves of ``tree``, in O(log n)."""
+    if not min_fill or not isinstance(tree, _Deep):
+        return tree
+    rest, last = _pop_back(tree)
+    rest, before = _pop_back(rest)
+    for leaf in _rebalance([before, last], min_fill, dtype):
+        rest = _push_back(rest, leaf)
+    return rest
+
+
+def _mend_front(tree: _Tree, min_fill: float, dtype: Optional[DType]) -> _Tree:
+    """Rebalance the first two leaves of ``tree``, in O(log n)."""
+    if not min_fill or not isinstance(tree, _Deep):
+        return tree
+    first, rest = _pop_front(tree)
+    after, rest = _pop_front(rest)
+    for leaf in reversed(_rebalance([first, after], min_fill, dtype)):
+        rest = _push_front(rest, leaf)
+    return rest
+
+
+def _items(node: UnrolledNode) -> Values:
+    """Elements a node contributes to ``to_list``; empty nodes read as ``None``."""
+    if node.values is not None and len(node.values):
+        return node.values
+    return [None]
+
+
+def _elements(node: UnrolledNode) -> Values:
+    """Like ``_items``, but ndarray blocks are read as Python scalars."""
+    return _plain(_items(node))
+
+
+@_instrumented
+def size(url: Optional[UnrolledLinkedList]) -> int:
+    if url is None:
+        return 0
+    return _tree_size(url._tree) - _tree_holes(url._tree)
+
+
+@_instrumented
+def add(url: UnrolledLinkedList, element: Any) -> UnrolledLinkedList:
+    if not _is_dense(url):
+        position: int = 0
+        for node in _leaves(url._tree):
+            if _accepts(node):
+                break
+            position += _leaf_size(node)
+
+        def _append(node: UnrolledNode, offset: int) -> UnrolledNode:
+            assert node.values is not None
+            return _leaf(_appended(node.values, element), node.capacity)
+        return _derive(url, _adjust(url._tree, position, _append))
+    tree: _Tree = url._tree
+    if tree is not None:
+        last: UnrolledNode = _last(tree)
+        if _accepts(last):
+            assert last.values is not None
+            changed: UnrolledNode = _leaf(_appended(last.values, element), last.capacity)
+            return _derive(url, _replace_last(tree, changed), dense=True)
+    new_leaf: UnrolledNode = _leaf(_pack([element], url.dtype), url.node_capacity)
+    return _derive(url, _push_back(tree, new_leaf), dense=True)
+
+
+@_instrumented
+def add_to_end(url: UnrolledLinkedList, element: Any) -> UnrolledLinkedList:
+    tree: _Tree = url._tree
+    if tree is None:
+        return _derive(url, _Single(_leaf(_pack([element], url.dtype), url.node_capacity)), dense=True)
+    last: UnrolledNode = _last(tree)
+    capacity: int = last.capacity
+    if element is not None and last.values is not None and len(last.values) < capacity:
+        tree = _replace_last(tree, _leaf(_appended(last.values, element), capacity))
+        return _derive(url, tree, url._dense)
+    if element is None:
+        tree = _push_back(tree, _leaf(None, capacity))
+    else:
+        tree = _push_back(tree, _leaf(_pack([element], url.dtype), capacity))
+    return _derive(url, tree, _dense_join(url._dense, last, True))
+
+
+# Deque operations.  Both ends of the block tree are reachable in O(1), so
+# each operation below does amortized O(1) tree work and shares every
+# block but the end one.  That block is copied with one element more or
+# less, as ``add_to_end`` does; the copy runs in C, and when it would
+# empty or overflow the block a block is popped or pushed instead.
+
+
+def _end_element(node: UnrolledNode, offset: int) -> Any:
+    values: Optional[Values] = node.values
+    if values is None or not len(values):
+        return None
+    if _is_ndarray(values):
+        return values[offset].item()
+    return values[offset]
+
+
+def _trimmed(node: UnrolledNode, start: int, stop: int) -> UnrolledNode:
+    assert node.values is not None
+    if _profiler is not None:
+        _profiler.count("elements_copied", stop - start)
+    return _leaf(node.values[start:stop], node.capacity)
+
+
+@_instrumented
+def push_front(url: UnrolledLinkedList, element: Any) -> UnrolledLinkedList:
+    """``url`` with ``element`` in front, filling the first block if it has room."""
+    tree: _Tree = url._tree
+    if tree is None:
+        return add_to_end(url, element)
+    head: UnrolledNode = _first(tree)
+    capacity: int = head.capacity
+    if element is not None and head.values is not None and 0 < len(head.values) < capacity:
+        changed: UnrolledNode = _leaf(_prepended(head.values, element), capacity)
+        if isinstance(tree, _Single):
+            return _derive(url, _Single(changed), True)
+        # The old first block took an ``add``; only the rest of ``url`` may still.
+        dense: Optional[bool] = False if _accepts(changed) else True if url._dense else None
+        return _derive(url, _replace_first(tree, changed), dense)
+    if element is None:
+        leaf: UnrolledNode = _leaf(None, capacity)
+    else:
+        leaf = _leaf(_pack([element], url.dtype), capacity)
+    return _derive(url, _push_front(tree, leaf), _dense_join(True, leaf, url._dense))
+
+
+@_instrumented
+def first(url: UnrolledLinkedList) -> Any:
+    if url._tree is None:
+        raise IndexError("first of an empty list")
+    return _end_element(_first(url._tree), 0)
+
+
+@_instrumented
+def last(url: UnrolledLinkedList) -> Any:
+    if url._tree is None:
+        raise IndexError("last of an empty list")
+    return _end_element(_last(url._tree), -1)
+
+
+@_instrumented
+def pop_front(url: UnrolledLinkedList) -> Tuple[Any, UnrolledLinkedList]:
+    """The first element of ``url`` and the list of the elements after it."""
+    tree: _Tree = url._tree
+    if tree is None:
+        raise IndexError("pop from an empty list")
+    head: UnrolledNode = _first(tree)
+    element: Any = _end_element(head, 0)
+    dense: Optional[bool] = True if url._dense else None
+    if _leaf_size(head) == 1:
+        _, tree = _pop_front(tree)
+    else:
+        assert head.values is not None
+        tree = _mend_front(_replace_first(tree, _trimmed(head, 1, len(head.values))),
+                           url.min_fill, url.dtype)
+        if not isinstance(tree, _Single):
+            dense = None if url.min_fill else False
+    return element, _derive(url, tree, dense)
+
+
+@_instrumented
+def pop_back(url: UnrolledLinkedList) -> Tuple[UnrolledLinkedList, Any]:
+    """The list of all but the last element of ``url``, and that element."""
+    tree: _Tree = url._tree
+    if tree is None:
+        raise IndexError("pop from an empty list")
+    tail: UnrolledNode = _last(tree)
+    element: Any = _end_element(tail, -1)
+    if _leaf_size(tail) == 1:
+        tree, _ = _pop_back(tree)
+    else:
+        assert tail.values is not None
+        tree = _mend_back(_replace_last(tree, _trimmed(tail, 0, len(tail.values) - 1)),
+                          url.min_fill, url.dtype)
+    return _derive(url, tree, True if url._dense else None), element
+
+
+@_instrumented
+def rest(url: UnrolledLinkedList) -> UnrolledLinkedList:
+    """Every element of ``url`` but the first."""
+    return pop_front(url)[1]
+
+
+def _vectorizes(values: Optional[Values], func: Callable[..., Any], vectorized: bool) -> bool:
+    """Whether ``func`` runs on the whole ndarray ``values`` at once.
+
+    NumPy ufuncs always do; other callables only when the caller passes
+    ``vectorized=True``.  Plain list and ``array`` blocks never do.
+    """
+    return _is_ndarray(values) and (vectorized or isinstance(func, np.ufunc))
+
+
+@_instrumented
+def find(
+    url: Optional[UnrolledLinkedList], predicate: Callable[[Any], bool], vectorized: bool = False
+) -> Optional[Any]:
+    """First element satisfying ``predicate``.
+
+    On ndarray blocks a ufunc (or, with ``vectorized=True``, any callable
+    returning a boolean mask) is applied to the whole block.
+    """
+    if url is None:
+        return None
+    if _profiler is not None:
+        predicate = _profiler.counted(predicate)
+    for node in _leaves(url._tree):
+        if _vectorizes(node.values, predicate, vectorized):
+            assert node.values is not None
+            hits: Any = np.flatnonzero(predicate(node.values))
+            if len(hits):
+                return node.values[hits[0]].item()
+            continue
+        for value in _elements(node):
+            if predicate(value):
+                return value
+    return None
+
+
+# Membership summaries.  ``member(..., summaries=True)`` gives every node
+# it scans a summary of its block: the block's elements as a frozenset for
+# small blocks, a Bloom filter for larger ones.  A node whose summary rules
+# the value out is skipped without looking at its block.  Nodes are never
+# modified, so the summary stays valid for every list sharing the node and
+# later calls use it whether or not they ask for summaries.  A block with
+# an unhashable element gets ``_UNSUMMARIZED`` and is always scanned.
+_SUMMARY_SET_SIZE: int = 16
+_BLOOM_BITS_PER_ELEMENT: int = 8
+_BLOOM_PROBES: int = 3
+_BLOOM_MULTIPLIER: int = 0x9E3779B97F4A7C15
+_UNSUMMARIZED: Any = object()
+
+
+def _bloom_mask(element: Any, shift: int) -> int:
+    """The bits ``element`` sets in a Bloom filter of ``2 ** shift`` bits."""
+    # Fibonacci hashing spreads runs of small ints, which hash to
+    # themselves; each probe takes the next ``shift`` bits of the product.
+    mixed: int = (hash(element) * _BLOOM_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF
+    low: int = (1 << shift) - 1
+    mask: int = 0
+    for _ in range(_BLOOM_PROBES):
+        mask |= 1 << (mixed & low)
+        mixed >>= shift
+    return mask
+
+
+class _Bloom:
+    """Bloom filter over the elements of a block."""
+
+    __slots__ = ("bits", "shift")
+
+    def __init__(self, elements: List[Any]) -> None:
+        self.shift: int = max(6, (len(elements) * _BLOOM_BITS_PER_ELEMENT - 1).bit_length())
+        self.bits: int = 0
+        for element in elements:
+            self.bits |= _bloom_mask(element, self.shift)
+
+
+def _summarize(node: UnrolledNode) -> Any:
+    elements: List[Any] = list(_elements(node))
+    try:
+        if len(elements) <= _SUMMARY_SET_SIZE:
+            return frozenset(elements)
+        return _Bloom(elements)
+    except TypeError:
+        return _UNSUMMARIZED
+
+
+def _may_hold(node: UnrolledNode, value: Any, summaries: bool, masks: Dict[int, int]) -> bool:
+    """False only when the node's summary proves ``value`` is not in its block.
+
+    ``value`` must be hashable; ``masks`` caches its Bloom filter bits by
+    filter size for the duration of one search.
+    """
+    summary: Any = node._summary
+    if summary is None:
+        if not summaries:
+            return True
+        summary = node._summary = _summarize(node)
+    if type(summary) is _Bloom:
+        mask: Optional[int] = masks.get(summary.shift)
+        if mask is None:
+            mask = masks[summary.shift] = _bloom_mask(value, summary.shift)
+        return summary.bits & mask == mask
+    return summary is _UNSUMMARIZED or value in summary
+
+
+def _in_block(node: UnrolledNode, value: Any) -> bool:
+    """Whether ``value`` equals an element of ``node``, as it would in a list.
+
+    ``in`` on an ndarray broadcasts a sequence ``value``, so only int and
+    float values are looked up in the array itself.
+    """
+    values: Values = _items(node)
+    if _is_ndarray(values) and type(value) not in (int, float):
+        values = values.tolist()
+    return value in values
+
+
+@_instrumented
+def member(url: Optional[UnrolledLinkedList], value: Optional[Any], summaries: bool = False) -> bool:
+    """Whether ``value`` is an element of ``url``; empty nodes hold ``None``.
+
+    A list returned by ``indexed`` answers in O(1) expected time.  With
+    ``summaries=True`` each node scanned caches a summary of its block
+    (see above), which pays off when the same nodes are searched again.
+    """
+    if url is None:
+        return False
+    try:
+        hash(value)
+    except TypeError:
+        return any(_in_block(node, value) for node in _leaves(url._tree))
+    if url._index is not None:
+        return value in url._index
+    masks: Dict[int, int] = {}
+    for node in _leaves(url._tree):
+        if _may_hold(node, value, summaries, masks) and _in_block(node, value):
+            return True
+    return False
+
+
+@_instrumented
+def indexed(url: UnrolledLinkedList) -> UnrolledLinkedList:
+    """The same list with a hash index of its elements, for O(1) ``member``.
+
+    The index is built once, in O(n), and belongs to the returned list
+    only; lists derived from it are not indexed.  Raises ``TypeError`` if
+    an element is unhashable.
+    """
+    result: UnrolledLinkedList = _derive(url, url._tree, url._dense)
+    result._index = frozenset(url)
+    return result
+
+
+@_instrumented
+def url_get(url: Optional[UnrolledLinkedList], index: int) -> Any:
+    if url is None:
+        raise IndexError("Index out of range")
+    node, offset = _locate(url._tree, index)
+    if node.values is None or not len(node.values):
+        return None
+    if _is_ndarray(node.values):
+        return node.values[offset].item()
+    return node.values[offset]
+
+
+@_instrumented
+def url_set(
+    url: Optional[UnrolledLinkedList], index: int, value: Any
+) -> UnrolledLinkedList:
+    if url is None:
+        return UnrolledLinkedList()
+    dense: Optional[bool] = url._dense
+
+    def _set(node: UnrolledNode, offset: int) -> UnrolledNode:
+        nonlocal dense
+        if node.values is None or not len(node.values):
+            changed: UnrolledNode = _leaf(
+                None if value is None else _pack([value], url.dtype), node.capacity)
+        elif value is None and node.capacity == 1:
+            changed = _leaf(None, node.capacity)
+        else:
+            changed = _leaf(_replaced(node.values, offset, value), node.capacity)
+        if _accepts(changed) != _accepts(node):
+            dense = None
+        return changed
+    tree: _Tree = _adjust(url._tree, index, _set)
+    return _derive(url, tree, dense)
+
+
+@_instrumented
+def from_list(
+    lst: List[Any],
+    capacity: Optional[Capacity] = 1,
+    dtype: Optional[DType] = None,
+    min_fill: float = 0.0,
+) -> UnrolledLinkedList:
+    """Build a list from ``lst``.
+
+    ``dtype`` is an ``array`` typecode for numeric blocks, a NumPy dtype for
+    ndarray blocks, or ``"auto"`` to pick ``"q"``/``"d"`` when ``lst`` holds
+    only ints or only floats.  ``capacity="auto"`` picks the node capacity
+    with ``auto_capacity``.  ``min_fill`` sets the fill policy.
+    """
+    if dtype == "auto":
+        dtype = _infer_dtype(lst)
+    dtype = _check_dtype(dtype)
+    min_fill = _check_min_fill(min_fill)
+    size: int = _resolve_capacity(capacity, len(lst), dtype)
+    if len(lst) == 0:
+        return UnrolledLinkedList(size if capacity == "auto" else 1, dtype=dtype, min_fill=min_fill)
+    leaves: List[UnrolledNode] = [
+        _chunk_leaf(lst[start:start + size], size, dtype)
+        for start in range(0, len(lst), size)
+    ]
+    return UnrolledLinkedList._from_tree(size, _build(leaves), True, dtype, min_fill)
+
+
+def _stream_builder(
+    capacity: Capacity, dtype: Optional[DType], max_items: Optional[int]
+) -> UnrolledLinkedListBuilder:
+    """Builder for a streamed list; ``"auto"`` dtypes are settled in ``_streamed``."""
+    if max_items is not None and max_items < 0:
+        raise ValueError("max_items must not be negative")
+    dtype = None if dtype == "auto" else _check_dtype(dtype)
+    return UnrolledLinkedListBuilder(_resolve_capacity(capacity, max_items or 0, dtype), dtype)
+
+
+def _streamed(
+    builder: UnrolledLinkedListBuilder, capacity: Capacity, dtype: Optional[DType], min_fill: float
+) -> UnrolledLinkedList:
+    """Finish a streamed list so that it matches what ``from_list`` builds."""
+    url: UnrolledLinkedList = builder.freeze()
+    tree: _Tree = url._tree
+    if dtype == "auto":
+        # ``_infer_dtype`` of the whole list agrees with every block's own.
+        leaves: List[UnrolledNode] = list(_leaves(tree))
+        codes: Set[Optional[str]] = {
+            None if leaf.values is None else _infer_dtype(leaf.values) for leaf in leaves}
+        dtype = codes.pop() if len(codes) == 1 else None
+        if dtype is not None:
+            tree = _build([_leaf(_pack(leaf.values, dtype), leaf.capacity) for leaf in leaves])
+    size: int = url.node_capacity if tree is not None or capacity == "auto" else 1
+    return UnrolledLinkedList._from_tree(size, tree, True, _check_dtype(dtype), _check_min_fill(min_fill))
+
+
+@_instrumented
+def from_iterable(
+    iterable: Iterable[Any],
+    capacity: Capacity = 1,
+    dtype: Optional[DType] = None,
+    min_fill: float = 0.0,
+    max_items: Optional[int] = None,
+) -> UnrolledLinkedList:
+    """Build a list from any iterable, filling one node at a time.
+
+    The result is the list ``from_list`` builds from the same elements, but
+    only the node being filled is held besides the list itself.  At most
+    ``max_items`` elements are taken.  ``capacity="auto"`` takes
+    ``max_items`` as the expected length; ``dtype="auto"`` stores plain
+    blocks and converts them at the end if every element fits.
+    """
+    builder: UnrolledLinkedListBuilder = _stream_builder(capacity, dtype, max_items)
+    builder.extend(iterable if max_items is None else islice(iterable, max_items))
+    return _streamed(builder, capacity, dtype, min_fill)
+
+
+async def from_async_iterable(
+    aiterable: AsyncIterable[Any],
+    capacity: Capacity = 1,
+    dtype: Optional[DType] = None,
+    min_fill: float = 0.0,
+    max_items: Optional[int] = None,
+) -> UnrolledLinkedList:
+    """``from_iterable`` for an async iterable, to be awaited in an event loop."""
+    builder: UnrolledLinkedListBuilder = _stream_builder(capacity, dtype, max_items)
+    if max_items != 0:
+        taken: int = 0
+        async for element in aiterable:
+            builder.append(element)
+            taken += 1
+            if taken == max_items:
+                break
+    return _streamed(builder, capacity, dtype, min_fill)
+
+
+@_instrumented
+def to_list(url: Optional[UnrolledLinkedList]) -> List[Any]:
+    if url is None:
+        return []
+    result: List[Any] = []
+    for node in _leaves(url._tree):
+        result.extend(_elements(node))
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(result))
+    return result
+
+
+@_instrumented
+def remove(
+    url: Optional[UnrolledLinkedList], element: Any
+) -> Optional[UnrolledLinkedList]:
+    if url is None:
+        return UnrolledLinkedList()
+    if url._tree is None:
+        return url
+    leaves: List[UnrolledNode] = []
+    for node in _leaves(url._tree):
+        if node.values is not None and len(node.values):
+            new_values: List[Any] = [value for value in _plain(node.values) if value != element]
+            if new_values:
+                leaves.append(_leaf(_like(node.values, new_values), node.capacity))
+        else:
+            leaves.append(_leaf(None, node.capacity))
+    return _derive(url, _build(_rebalance(leaves, url.min_fill, url.dtype)))
+
+
+@_instrumented
+def reverse(url: Optional[UnrolledLinkedList]) -> UnrolledLinkedList:
+    if url is None:
+        return UnrolledLinkedList()
+    if url._tree is None:
+        return url
+    leaves: List[UnrolledNode] = []
+    for node in _leaves(url._tree, backwards=True):
+        if node.values is not None and len(node.values):
+            if _profiler is not None:
+                _profiler.count("elements_copied", len(node.values))
+            leaves.append(_leaf(node.values[::-1], node.capacity))
+        else:
+            leaves.append(_leaf(None, node.capacity))
+    return _derive(url, _build(leaves))
+
+
+@_instrumented
+def m_concat(
+    url1: Optional[UnrolledLinkedList], url2: Optional[UnrolledLinkedList]
+) -> Optional[UnrolledLinkedList]:
+    if url1 is None:
+        return url2
+    if url2 is None:
+        return url1
+    capacity: int = max(url1.node_capacity, url2.node_capacity)
+    same: bool = type(url1.dtype) is type(url2.dtype) and url1.dtype == url2.dtype
+    dtype: Optional[DType] = url1.dtype if same else None
+    min_fill: float = max(url1.min_fill, url2.min_fill)
+    left: _Tree = url1._tree
+    right: _Tree = url2._tree
+    seam: Tuple[Any, ...] = ()
+    if min_fill and left is not None and right is not None:
+        left, last = _pop_back(left)
+        first, right = _pop_front(right)
+        seam = tuple(_rebalance([last, first], min_fill, dtype))
+    tree: _Tree = _concat(left, seam, right)
+    dense: Optional[bool] = None
+    if not min_fill and url1._tree is not None and url2._tree is not None:
+        dense = _dense_join(url1._dense, _last(url1._tree), url2._dense)
+    return UnrolledLinkedList._from_tree(capacity, tree, dense, dtype, min_fill)
+
+
+@_instrumented
+def split_at(
+    url: UnrolledLinkedList, index: int
+) -> Tuple[UnrolledLinkedList, UnrolledLinkedList]:
+    """The first ``index`` positions of ``url`` and the rest, in O(log n).
+
+    Both halves share every block except the one the split falls inside,
+    which is cut in two (and, under a fill policy, merged with a neighbour
+    if a piece is underfull).  ``index`` may be anything from 0 to
+    ``len(url)``.
+    """
+    if not 0 <= index <= len(url):
+        raise IndexError("Index out of range")
+    if index == len(url):
+        return url, _derive(url, None)
+    left, leaf, right, offset = _split(url._tree, index)
+    if offset:
+        if _profiler is not None:
+            _profiler.count("elements_copied", len(leaf.values))
+        left = _push_back(left, _leaf(leaf.values[:offset], leaf.capacity))
+        leaf = _leaf(leaf.values[offset:], leaf.capacity)
+        left = _mend_back(left, url.min_fill, url.dtype)
+    right = _mend_front(_push_front(right, leaf), url.min_fill, url.dtype)
+    # ``right`` keeps the blocks of ``url`` after the split, so only its
+    # first block can newly take an ``add``; mending may change two.
+    dense: Optional[bool] = None
+    if url._dense and not url.min_fill:
+        dense = True if isinstance(right, _Single) else not _accepts(_first(right))
+    return _derive(url, left, True if url._dense else None), _derive(url, right, dense)
+
+
+@_instrumented
+def compact(url: UnrolledLinkedList) -> UnrolledLinkedList:
+    """Repack the nodes of ``url`` as full as they go.
+
+    Every run of nodes between empty ``None`` nodes ends up full except for
+    its last node.  Elements keep their order.
+    """
+    leaves: List[UnrolledNode] = _rebalance(list(_leaves(url._tree)), 1.0, url.dtype)
+    return _derive(url, _build(leaves))
+
+
+# A ``batch_update`` edit: ``(op, index, payload)``.
+Edit = Tuple[str, int, Any]
+_EDIT_OPS: Tuple[str, ...] = ("set", "insert", "remove")
+
+
+@_instrumented
+def batch_update(url: UnrolledLinkedList, edits: Iterable[Edit]) -> UnrolledLinkedList:
+    """Apply many positional edits in one pass over the blocks of ``url``.
+
+    Each edit is ``("set", index, value)``, ``("insert", index, value)``
+    or ``("remove", index, None)``, and every ``index`` is a position in
+    ``url`` as given (``insert`` also takes ``len(url)``, to append).
+    Inserts at one position land before the element there, in the order
+    given; a later ``set`` of a position overrides an earlier one, and a
+    ``remove`` drops the element whatever was set.  The result is the list
+    obtained by applying the edits one at a time from the highest position
+    down, so that no edit shifts the position of another.
+
+    Blocks no edit falls in are reused; each touched block is rebuilt once
+    and cut into blocks of its capacity.
+    """
+    length: int = len(url)
+    inserts: Dict[int, List[Any]] = {}
+    changes: Dict[int, Tuple[bool, Any]] = {}
+    for op, index, payload in edits:
+        if op not in _EDIT_OPS:
+            raise ValueError(f"Unknown edit {op!r}; expected one of {_EDIT_OPS}")
+        if not 0 <= index < length + (op == "insert"):
+            raise IndexError("Index out of range")
+        if op == "insert":
+            inserts.setdefault(index, []).append(payload)
+        elif op == "set":
+            kept: bool = changes.get(index, (True, None))[0]
+            changes[index] = (kept, payload)
+        else:
+            changes[index] = (False, None)
+    touched: List[int] = sorted(set(inserts) | set(changes))
+    if not touched:
+        return url
+
+    def _edited(node: UnrolledNode, start: int) -> List[UnrolledNode]:
+        values: List[Any] = []
+        for position, element in enumerate(_elements(node), start):
+            values.extend(inserts.get(position, ()))
+            kept, value = changes.get(position, (True, element))
+            if kept:
+                values.append(value)
+        return [_chunk_leaf(values[i:i + node.capacity], node.capacity, url.dtype)
+                for i in range(0, len(values), node.capacity)]
+
+    # Usually every touched block still fits in one block: those are
+    # swapped in place, copying only the paths down to them.
+    misfits: int = 0
+
+    def _swap(node: UnrolledNode, start: int) -> UnrolledNode:
+        nonlocal misfits
+        if misfits:
+            return node
+        edited: List[UnrolledNode] = _edited(node, start)
+        if len(edited) != 1 or url.min_fill and edited[0].values is not None and _underfull(
+                edited[0], url.min_fill):
+            misfits += 1
+            return node
+        return edited[0]
+    inside: List[int] = touched[:-1] if touched[-1] == length else touched
+    tree: _Tree = _adjust_many(url._tree, inside, _swap)
+    if not misfits:
+        capacity: int = _last(tree).capacity if tree is not None else url.node_capacity
+        appended: List[Any] = inserts.get(length, [])
+        for i in range(0, len(appended), capacity):
+            tree = _push_back(tree, _chunk_leaf(appended[i:i + capacity], capacity, url.dtype))
+        return _derive(url, tree)
+
+    # Otherwise rebuild the tree from its leaves in one traversal.
+    leaves: List[UnrolledNode] = []
+    start: int = 0
+    cursor: int = 0
+    capacity = url.node_capacity
+    for node in _leaves(url._tree):
+        stop: int = start + _leaf_size(node)
+        capacity = node.capacity
+        if cursor == len(touched) or touched[cursor] >= stop:
+            leaves.append(node)
+        else:
+            leaves.extend(_edited(node, start))
+            while cursor < len(touched) and touched[cursor] < stop:
+                cursor += 1
+        start = stop
+    appended = inserts.get(length, [])
+    leaves.extend(_chunk_leaf(appended[i:i + capacity], capacity, url.dtype)
+                  for i in range(0, len(appended), capacity))
+    return _derive(url, _build(_rebalance(leaves, url.min_fill, url.dtype)))
+
+
+@_instrumented
+def retune(url: UnrolledLinkedList, capacity: Capacity) -> UnrolledLinkedList:
+    """Rechunk ``url`` into full nodes of ``capacity`` (or ``"auto"``) in one pass.
+
+    Returns ``url`` itself when its nodes are already laid out that way.
+    """
+    size: int = _resolve_capacity(capacity, len(url), url.dtype)
+    if url.node_capacity == size and _is_dense(url) and all(
+            node.capacity == size for node in _leaves(url._tree)):
+        return url
+    elements: Iterator[Any] = iter(url)
+    leaves: List[UnrolledNode] = []
+    chunk: List[Any] = list(islice(elements, size))
+    while chunk:
+        leaves.append(_chunk_leaf(chunk, size, url.dtype))
+        chunk = list(islice(elements, size))
+    return UnrolledLinkedList._from_tree(size, _build(leaves), True, url.dtype, url.min_fill)
+
+
+# Structural diff.  ``add``, ``url_set``, ``remove`` and the other
+# operations copy only the blocks and branches they change, so two
+# versions of a list share every untouched subtree.  ``diff`` walks both
+# trees side by side, skipping any piece the two hold by identity, and
+# only unfolds the pieces around a change down to their blocks; so its
+# cost follows the size of the change, not of the lists.
+
+
+class Hunk(NamedTuple):
+    """Replace positions ``start:stop`` of the old list by ``values``.
+
+    ``start == stop`` is an insertion and empty ``values`` a deletion.
+    ``blocks``, when given, is the layout to rebuild the hunk's region
+    in: one ``(length, capacity)`` per block, length 0 for a ``None``
+    node.  The region runs from the start of the block holding ``start``
+    to the end of the block holding ``stop - 1``, or only the block
+    holding ``start`` for an insertion, the last block at the end.
+    """
+
+    start: int
+    stop: int
+    values: List[Any]
+    blocks: Optional[Tuple[Tuple[int, int], ...]] = None
+
+
+def _same_element(left: Any, right: Any) -> bool:
+    return left is right or type(left) is type(right) and left == right
+
+
+def _shape(node: UnrolledNode) -> Tuple[int, int]:
+    return (0 if node.values is None else len(node.values), node.capacity)
+
+
+def _region(
+    length: int, start: int, stop: int, block: Callable[[int], Tuple[int, UnrolledNode]]
+) -> Tuple[int, int]:
+    """The bounds of the blocks a hunk over ``start:stop`` rebuilds.
+
+    ``block(position)`` is the start and the leaf of the block holding
+    ``position`` in a list of ``length`` elements.
+    """
+    if not length:
+        return 0, 0
+    lo: int = block(min(start, length - 1))[0]
+    first, leaf = block(max(stop - 1, lo))
+    return lo, first + _leaf_size(leaf)
+
+
+def _block_at(tree: _Tree, position: int) -> Tuple[int, UnrolledNode]:
+    leaf, offset = _locate(tree, position)
+    return position - offset, leaf
+
+
+def _next_leaf(stack: List[Any]) -> Optional[UnrolledNode]:
+    """Pop the next leaf of ``stack``, unfolding pieces as needed."""
+    while stack:
+        if stack[-1] is None:
+            stack.pop()
+        elif isinstance(stack[-1], UnrolledNode):
+            if _profiler is not None:
+                _profiler.count("nodes_visited")
+            return stack.pop()
+        else:
+            _expand(stack)
+    return None
+
+
+def _trim_limit(
+    removed: List[UnrolledNode], old_shapes: List[Tuple[int, int]], new_shapes: List[Tuple[int, int]]
+) -> int:
+    """How many elements a hunk may leave out before its first block laid out differently."""
+    limit: int = 0
+    for node, left, right in zip(removed, old_shapes, new_shapes):
+        if left != right:
+            return limit + _leaf_size(node) - 1
+        limit += _leaf_size(node)
+    return limit
+
+
+def _hunk(
+    old: UnrolledLinkedList, new: UnrolledLinkedList, start: int, shift: int,
+    removed: List[UnrolledNode], added: List[UnrolledNode],
+) -> Optional[Tuple[Hunk, int, int]]:
+    """The hunk turning the blocks ``removed``, at ``start``, into ``added``, and its region.
+
+    The run is trimmed of equal elements at both ends, but not past a
+    block laid out differently in the two versions; the region the hunk
+    rebuilds is then widened until its ends fall on block bounds of
+    ``new`` too, so that ``blocks`` can describe it.  ``shift`` is how far
+    ``start`` moved between the versions.
+    """
+    old_values: List[Any] = [element for node in removed for element in _elements(node)]
+    new_values: List[Any] = [element for node in added for element in _elements(node)]
+    old_shapes: List[Tuple[int, int]] = [_shape(node) for node in removed]
+    new_shapes: List[Tuple[int, int]] = [_shape(node) for node in added]
+    limit: int = min(len(old_values), len(new_values))
+    head: int = 0
+    while head < limit and _same_element(old_values[head], new_values[head]):
+        head += 1
+    if head == len(old_values) == len(new_values) and old_shapes == new_shapes:
+        return None
+    tail: int = 0
+    while tail < limit - head and _same_element(old_values[-1 - tail], new_values[-1 - tail]):
+        tail += 1
+    limit = _trim_limit(removed, old_shapes, new_shapes)
+    if limit == len(old_values) - 1 and start + len(old_values) == len(old):
+        # An insertion at the very end rebuilds the last block.
+        limit += 1
+    head = min(head, limit)
+    tail = min(tail, _trim_limit(removed[::-1], old_shapes[::-1], new_shapes[::-1]))
+    stop: int = start + len(old_values)
+    delta: int = len(new_values) - len(old_values)
+    # Block bounds inside the run are known from its blocks; outside it
+    # they are those of the shared neighbours, so only those are located.
+    bounds: List[int] = list(accumulate(map(_leaf_size, removed), initial=start))
+    new_bounds: List[int] = list(accumulate(map(_leaf_size, added), initial=start + shift))
+
+    def _block(position: int) -> Tuple[int, UnrolledNode]:
+        if not start <= position < stop:
+            return _block_at(old._tree, position)
+        index: int = _bisect.bisect_right(bounds, position) - 1
+        return bounds[index], removed[index]
+
+    def _on_bound(position: int) -> bool:
+        return not new_bounds[0] <= position <= new_bounds[-1] or position in new_bounds
+
+    while True:
+        lo, hi = _region(len(old), start + head, stop - tail, _block)
+        if not _on_bound(lo + shift):
+            head = lo - 1 - start
+        elif not _on_bound(hi + shift + delta):
+            tail = stop - hi - 1
+        else:
+            break
+    blocks: List[Tuple[int, int]] = []
+    if lo < start:
+        blocks.append(_shape(_block(lo)[1]))
+    for position, node in zip(new_bounds, added):
+        if lo + shift <= position < hi + shift + delta:
+            blocks.append(_shape(node))
+    if hi > stop:
+        blocks.append(_shape(_block(stop)[1]))
+    return Hunk(start + head, stop - tail, new_values[head:len(new_values) - tail], tuple(blocks)), lo, hi
+
+
+def _merged(old: UnrolledLinkedList, previous: Hunk, hunk: Hunk, overlap: int) -> Hunk:
+    """One hunk for two whose regions share ``overlap`` elements of blocks."""
+    gap: List[Any] = []
+    position: int = previous.stop
+    while position < hunk.start:
+        first, leaf = _block_at(old._tree, position)
+        gap.extend(_elements(leaf)[position - first:hunk.start - first])
+        position = first + _leaf_size(leaf)
+    assert previous.blocks is not None and hunk.blocks is not None
+    index: int = 0
+    while overlap > 0:
+        overlap -= hunk.blocks[index][0] or 1
+        index += 1
+    return Hunk(previous.start, hunk.stop, previous.values + gap + hunk.values,
+                previous.blocks + hunk.blocks[index:])
+
+
+def _resync(olds: List[Any], news: List[Any]) -> Tuple[List[UnrolledNode], List[UnrolledNode]]:
+    """Pop the runs of blocks before the two walks meet on a shared piece again.
+
+    Blocks are taken from whichever side is behind in elements, so both
+    runs stay about as long as the change.  A block taken from one side
+    that the other side's run already holds is where they meet: the other
+    run is cut there and its remainder, with that block, put back.
+    """
+    runs: Tuple[List[UnrolledNode], List[UnrolledNode]] = ([], [])
+    seen: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+    lengths: List[int] = [0, 0]
+    stacks: Tuple[List[Any], List[Any]] = (olds, news)
+    while True:
+        while olds and olds[-1] is None:
+            olds.pop()
+        while news and news[-1] is None:
+            news.pop()
+        if not olds and not news or olds and news and olds[-1] is news[-1]:
+            return runs
+        side: int = 0 if news == [] or olds and lengths[0] <= lengths[1] else 1
+        leaf: Optional[UnrolledNode] = _next_leaf(stacks[side])
+        assert leaf is not None
+        other: int = 1 - side
+        if id(leaf) in seen[other]:
+            cut: int = seen[other][id(leaf)]
+            stacks[side].append(leaf)
+            stacks[other].extend(reversed(runs[other][cut:]))
+            del runs[other][cut:]
+            return runs
+        seen[side][id(leaf)] = len(runs[side])
+        runs[side].append(leaf)
+        lengths[side] += _leaf_size(leaf)
+
+
+def _add_hunk(
+    old: UnrolledLinkedList, hunks: List[Hunk], reach: int, found: Optional[Tuple[Hunk, int, int]]
+) -> int:
+    """Append a hunk from ``_hunk`` to ``hunks``, merged with the last if their regions meet.
+
+    ``reach`` is where the region of the last hunk ends; the new one is
+    returned.  Only an insertion at the very end, which rebuilds the last
+    block, can reach back into the region before it.
+    """
+    if found is None:
+        return reach
+    hunk, lo, hi = found
+    if hunks and lo < reach:
+        hunk = _merged(old, hunks.pop(), hunk, reach - lo)
+    hunks.append(hunk)
+    return max(reach, hi)
+
+
+@_instrumented
+def diff(old: UnrolledLinkedList, new: UnrolledLinkedList) -> List[Hunk]:
+    """The hunks turning ``old`` into ``new``, in order of position.
+
+    Pieces shared by both versions are skipped by identity, so diffing a
+    version against the one it was derived from costs about the size of
+    the change.  Unrelated lists still diff correctly, as one hunk per
+    region their blocks differ in.  Each hunk carries the layout of the
+    blocks it rebuilds, so ``patch(old, diff(old, new))`` equals ``new``
+    block for block.
+    """
+    olds: List[Any] = [old._tree]
+    news: List[Any] = [new._tree]
+    hunks: List[Hunk] = []
+    position: int = 0
+    shift: int = 0
+    reach: int = 0
+    while True:
+        while olds and olds[-1] is None:
+            olds.pop()
+        while news and news[-1] is None:
+            news.pop()
+        if not olds or not news:
+            break
+        x: Any = olds[-1]
+        y: Any = news[-1]
+        if x is y or isinstance(x, UnrolledNode) and isinstance(y, UnrolledNode) and _same_block(x, y):
+            olds.pop()
+            news.pop()
+            position += _span(x)
+            continue
+        x_span: int = _span(x)
+        y_span: int = _span(y)
+        if isinstance(x, UnrolledNode) and isinstance(y, UnrolledNode):
+            removed, added = _resync(olds, news)
+        elif isinstance(y, UnrolledNode) or not isinstance(x, UnrolledNode) and x_span >= y_span:
+            _expand(olds)
+            continue
+        else:
+            _expand(news)
+            continue
+        reach = _add_hunk(old, hunks, reach, _hunk(old, new, position, shift, removed, added))
+        position += sum(map(_leaf_size, removed))
+        shift += sum(map(_leaf_size, added)) - sum(map(_leaf_size, removed))
+    rest: List[UnrolledNode] = []
+    while olds:
+        leaf: Optional[UnrolledNode] = _next_leaf(olds)
+        if leaf is not None:
+            rest.append(leaf)
+    added = []
+    while news:
+        leaf = _next_leaf(news)
+        if leaf is not None:
+            added.append(leaf)
+    _add_hunk(old, hunks, reach, _hunk(old, new, position, shift, rest, added))
+    return hunks
+
+
+def _attach(tree: _Tree, piece: _Tree, min_fill: float, dtype: Optional[DType]) -> _Tree:
+    """``tree`` followed by ``piece``, mending the seam under a fill policy."""
+    if min_fill and tree is not None and piece is not None:
+        first, piece = _pop_front(piece)
+        tree = _mend_back(_push_back(tree, first), min_fill, dtype)
+    return _concat(tree, (), piece)
+
+
+def _cut(tree: _Tree, index: int) -> Tuple[_Tree, _Tree]:
+    """Split ``tree`` at ``index``, which must fall on a block bound."""
+    if index == _tree_size(tree):
+        return tree, None
+    left, leaf, right, _ = _split(tree, index)
+    return left, _push_front(right, leaf)
+
+
+def _laid_out(
+    elements: List[Any], blocks: Tuple[Tuple[int, int], ...], dtype: Optional[DType]
+) -> List[UnrolledNode]:
+    """``elements`` cut into blocks of the lengths and capacities given."""
+    if sum(length or 1 for length, _ in blocks) != len(elements):
+        raise ValueError("Hunk blocks do not match the elements of its region")
+    leaves: List[UnrolledNode] = []
+    at: int = 0
+    for length, capacity in blocks:
+        if length:
+            if _profiler is not None:
+                _profiler.count("elements_copied", length)
+            leaves.append(_leaf(_pack(elements[at:at + length], dtype), capacity))
+        else:
+            leaves.append(_leaf(None, capacity))
+        at += length or 1
+    return leaves
+
+
+@_instrumented
+def patch(url: UnrolledLinkedList, hunks: Iterable[Hunk]) -> UnrolledLinkedList:
+    """Apply hunks, such as those from ``diff``, to ``url``.
+
+    Each hunk is ``(start, stop, values)`` in positions of ``url`` as given;
+    hunks must be in order and must not overlap.  Blocks outside every
+    hunk are reused, and the blocks a hunk falls in are rebuilt once: in
+    the hunk's ``blocks`` layout when it has one, else cut into blocks of
+    their capacity, so that an insertion at the end refills the last
+    block.  Hunks with a layout must not share a block with another hunk.
+    """
+    length: int = len(url)
+    out: _Tree = None
+    rest: _Tree = url._tree
+    # The region being rebuilt: its old elements, which start at ``lo``,
+    # and its new elements up to old position ``done``.  ``rest`` holds
+    # the old blocks from ``at`` on, the end of the region.
+    lo: int = 0
+    at: int = 0
+    done: int = 0
+    old: List[Any] = []
+    built: List[Any] = []
+    capacity: int = url.node_capacity
+    layout: Optional[Tuple[Tuple[int, int], ...]] = None
+    exact: bool = False
+    opened: bool = False
+
+    def _take(hi: int) -> None:
+        nonlocal rest, at, capacity
+        piece, rest = _cut(rest, hi - at)
+        for leaf in _leaves(piece):
+            if not old:
+                capacity = leaf.capacity
+            old.extend(_elements(leaf))
+        at = hi
+
+    def _close() -> None:
+        nonlocal out, exact
+        built.extend(old[done - lo:])
+        if layout is not None:
+            for leaf in _laid_out(built, layout, url.dtype):
+                out = _push_back(out, leaf)
+        else:
+            for i in range(0, len(built), capacity):
+                out = _push_back(out, _chunk_leaf(built[i:i + capacity], capacity, url.dtype))
+                out = _mend_back(out, url.min_fill, url.dtype)
+        exact = layout is not None
+
+    previous: int = 0
+    for hunk in hunks:
+        start, stop, values, blocks = hunk
+        if not previous <= start <= stop <= length:
+            raise IndexError(f"Hunk {start}:{stop} out of range or out of order")
+        previous = stop
+        first, last = _region(length, start, stop, functools.partial(_block_at, url._tree))
+        if opened and first < at:
+            if layout is not None or blocks is not None:
+                raise ValueError(f"Hunk {start}:{stop} shares a block with another hunk")
+            if last > at:
+                _take(last)
+        else:
+            if opened:
+                _close()
+            kept, rest = _cut(rest, first - at)
+            out = _attach(out, kept, 0.0 if exact or blocks is not None else url.min_fill, url.dtype)
+            lo = at = done = first
+            old, built = [], []
+            capacity, layout, opened = url.node_capacity, blocks, True
+            _take(last)
+        built.extend(old[done - lo:start - lo])
+        built.extend(values)
+        done = stop
+    if opened:
+        _close()
+    return _derive(url, _attach(out, rest, 0.0 if exact else url.min_fill, url.dtype))
+
+
+class Stats(NamedTuple):
+    """Node layout of a list, as reported by ``stats``."""
+
+    nodes: int
+    holes: int
+    elements: int
+    # Mean of ``len(values) / capacity`` over the non-empty nodes.
+    average_fill: float
+    # Number of nodes holding each element count; ``None`` nodes count as 0.
+    histogram: Dict[int, int]
+
+
+@_instrumented
+def stats(url: UnrolledLinkedList) -> Stats:
+    histogram: Dict[int, int] = {}
+    fill: float = 0.0
+    for node in _leaves(url._tree):
+        count: int = 0 if node.values is None else len(node.values)
+        histogram[count] = histogram.get(count, 0) + 1
+        fill += count / node.capacity
+    holes: int = _tree_holes(url._tree)
+    nodes: int = sum(histogram.values())
+    average: float = fill / (nodes - holes) if nodes > holes else 0.0
+    return Stats(nodes, holes, size(url), average, dict(sorted(histogram.items())))
+
+
+# Sorted lists.  Every leaf of a sorted tree is non-empty, so the last
+# element under a leaf or branch (its fence) is the largest one there.
+# Branches cache their fence on first use, which lets a search go down one
+# path of the tree comparing at most four fences per level, and then
+# bisect inside the leaf it lands on.  Only ``<`` is used to compare
+# elements, as in the ``bisect`` module.
+
+def _fence(item: Any) -> Any:
+    if type(item) is _Branch:
+        if item.fence is _NO_FENCE:
+            item.fence = _fence(item.items[-1])
+        return item.fence
+    return item.values[-1]
+
+
+def _tree_fence(tree: _Tree) -> Any:
+    if isinstance(tree, _Single):
+        return _fence(tree.item)
+    assert tree is not None
+    return _fence(tree.suffix[-1])
+
+
+def _past(fence: Any, value: Any, right: bool) -> bool:
+    """Whether a block ending in ``fence`` has an element ``>= value`` (``> value`` if ``right``)."""
+    return value < fence if right else not fence < value
+
+
+def _seek(tree: _Tree, value: Any, right: bool) -> Tuple[Optional[UnrolledNode], int]:
+    """First leaf of a sorted tree that ``_past`` accepts, and its position.
+
+    Returns ``None`` and the size of the tree when no leaf qualifies.
+    """
+    position: int = 0
+    item: Any = tree
+    while item is not None:
+        if isinstance(item, _Single):
+            parts: Tuple[Any, ...] = (item.item,)
+        elif isinstance(item, _Deep):
+            middle: Tuple[Any, ...] = () if item.middle is None else (item.middle,)
+            parts = item.prefix + middle + item.suffix
+        elif isinstance(item, _Branch):
+            parts = item.items
+        else:
+            if _profiler is not None:
+                _profiler.count("nodes_visited")
+            return item, position
+        item = None
+        for part in parts:
+            if isinstance(part, (_Single, _Deep)):
+                if _past(_tree_fence(part), value, right):
+                    item = part
+                    break
+                position += _tree_size(part)
+            elif _past(_fence(part), value, right):
+                item = part
+                break
+            else:
+                position += _size_of(part)
+    return None, position
+
+
+def _bisect_leaf(leaf: UnrolledNode, value: Any, right: bool) -> int:
+    values: Values = leaf.values
+    return _bisect.bisect_right(values, value) if right else _bisect.bisect_left(values, value)
+
+
+def _holds(leaf: Optional[UnrolledNode], value: Any) -> bool:
+    """Whether ``leaf``, found by a left ``_seek`` for ``value``, holds it."""
+    if leaf is None:
+        return False
+    values: Values = leaf.values
+    return not value < values[_bisect.bisect_left(values, value)]
+
+
+class SortedUnrolledLinkedList(UnrolledLinkedList):
+    """An ``UnrolledLinkedList`` kept in ascending order.
+
+    Searches bisect the fences of the tree and then one block, in
+    O(log n + log capacity); ``insert`` and ``remove`` rewrite one block,
+    and under a ``min_fill`` policy mend it with its neighbours, plus the
+    O(log n) tree nodes above, sharing everything else with the list they
+    came from.  Every module function accepts a sorted list; the
+    ones that build a new list return a plain ``UnrolledLinkedList``.
+    """
+
+    def __init__(
+        self,
+        values: Iterable[Any] = (),
+        node_capacity: int = 1,
+        dtype: Optional[DType] = None,
+        min_fill: float = 0.0,
+    ) -> None:
+        built: UnrolledLinkedList = from_list(sorted(values), node_capacity, dtype, min_fill)
+        super().__init__(node_capacity or 1, None, built.dtype, min_fill)
+        self._tree = built._tree
+        self._head = _UNLINKED
+
+    def _sorted(self, tree: _Tree) -> "SortedUnrolledLinkedList":
+        return self._from_tree(self.node_capacity, tree, None, self.dtype, self.min_fill)
+
+    def _with_block(self, position: int, leaves: Tuple[UnrolledNode, ...]) -> "SortedUnrolledLinkedList":
+        """This list with the block at ``position`` replaced by ``leaves``.
+
+        Under a fill policy the new blocks are mended with their
+        neighbours, as ``pop_front`` and ``pop_back`` mend theirs.
+        """
+        if len(leaves) == 1 and not self.min_fill:
+            return self._sorted(_adjust(self._tree, position, lambda node, offset: leaves[0]))
+        left, _, right, _ = _split(self._tree, position)
+        if not self.min_fill:
+            return self._sorted(_concat(left, leaves, right))
+        for leaf in leaves:
+            left = _mend_back(_push_back(left, leaf), self.min_fill, self.dtype)
+        return self._sorted(_attach(left, right, self.min_fill, self.dtype))
+
+    def bisect_left(self, value: Any) -> int:
+        """Position of the first element ``>= value``, or ``len(self)``."""
+        leaf, position = _seek(self._tree, value, False)
+        if leaf is None:
+            return position
+        return position + _bisect_leaf(leaf, value, False)
+
+    def bisect_right(self, value: Any) -> int:
+        """Position of the first element ``> value``, or ``len(self)``."""
+        leaf, position = _seek(self._tree, value, True)
+        if leaf is None:
+            return position
+        return position + _bisect_leaf(leaf, value, True)
+
+    bisect = bisect_right
+
+    def rank(self, value: Any) -> int:
+        """Number of elements less than ``value``."""
+        return self.bisect_left(value)
+
+    def contains(self, value: Any) -> bool:
+        return _holds(_seek(self._tree, value, False)[0], value)
+
+    __contains__ = contains
+
+    @_instrumented
+    def insert(self, value: Any) -> "SortedUnrolledLinkedList":
+        """A new list with ``value`` added after any elements equal to it."""
+        tree: _Tree = self._tree
+        if tree is None:
+            return self._sorted(_Single(_leaf(_pack([value], self.dtype), self.node_capacity)))
+        leaf, position = _seek(tree, value, True)
+        if leaf is None:
+            leaf = _last(tree)
+            position -= len(leaf.values)
+        values: List[Any] = _sorted_copy(leaf)
+        values.insert(_bisect.bisect_right(values, value), value)
+        if len(values) <= leaf.capacity:
+            return self._with_block(position, (_leaf(_pack(values, self.dtype), leaf.capacity),))
+        half: int = len(values) // 2
+        return self._with_block(position, (
+            _leaf(_pack(values[:half], self.dtype), leaf.capacity),
+            _leaf(_pack(values[half:], self.dtype), leaf.capacity),
+        ))
+
+    @_instrumented
+    def remove(self, value: Any) -> "SortedUnrolledLinkedList":
+        """A new list without the first element equal to ``value``.
+
+        Raises ``ValueError`` if there is none.
+        """
+        tree: _Tree = self._tree
+        leaf, position = _seek(tree, value, False)
+        if leaf is None or not _holds(leaf, value):
+            raise ValueError(f"{value!r} is not in the list")
+        values: List[Any] = _sorted_copy(leaf)
+        del values[_bisect.bisect_left(values, value)]
+        if values:
+            return self._with_block(position, (_leaf(_pack(values, self.dtype), leaf.capacity),))
+        return self._with_block(position, ())
+
+    @_instrumented
+    def range(self, lo: Any, hi: Any) -> "SortedUnrolledLinkedList":
+        """The elements ``x`` with ``lo <= x < hi``, sharing all but the end blocks."""
+        start: int = self.bisect_left(lo)
+        return self[start:self.bisect_left(hi)]
+
+
+def _sorted_copy(leaf: UnrolledNode) -> List[Any]:
+    """The elements of a sorted leaf as a list to edit."""
+    assert leaf.values is not None
+    if _profiler is not None:
+        _profiler.count("elements_copied", len(leaf.values))
+    return list(_plain(leaf.values))
+
+
+@_instrumented
+def iterator(lst: Optional[UnrolledLinkedList]):
+    if lst is None:
+        return None
+    return iter(lst)
+
+
+def _filter_node(
+    values: Optional[Values], capacity: int, predicate: Callable[[Any], bool], vectorized: bool = False
+) -> Optional[UnrolledNode]:
+    """Filtered copy of one node, or ``None`` when nothing in it survives."""
+    if _vectorizes(values, predicate, vectorized):
+        assert values is not None
+        kept: Any = values[np.asarray(predicate(values), dtype=bool)]
+        if _profiler is not None:
+            _profiler.count("elements_copied", len(kept))
+        return _leaf(kept, capacity) if len(kept) else None
+    if values is not None:
+        filtered_values: List[Any] = [value for value in _plain(values) if predicate(value)]
+        if filtered_values:
+            return _leaf(_like(values, filtered_values), capacity)
+        return None
+    if predicate(None):
+        return _leaf([], capacity)
+    return _leaf(None, capacity)
+
+
+@_instrumented
+def url_filter(
+    url: Optional[UnrolledLinkedList], predicate: Callable[[Any], bool], vectorized: bool = False
+) -> UnrolledLinkedList:
+    """Keep the elements satisfying ``predicate``.
+
+    On ndarray blocks a ufunc (or, with ``vectorized=True``, any callable
+    returning a boolean mask) selects from the whole block at once.
+    """
+    if url is None:
+        return UnrolledLinkedList()
+    if _profiler is not None:
+        predicate = _profiler.counted(predicate)
+    leaves: List[UnrolledNode] = []
+    for node in _leaves(url._tree):
+        filtered: Optional[UnrolledNode] = _filter_node(
+            node.values, node.capacity, predicate, vectorized)
+        if filtered is not None:
+            leaves.append(filtered)
+    return _derive(url, _build(_rebalance(leaves, url.min_fill, url.dtype)))
+
+
+def _map_node(
+    values: Optional[Values],
+    capacity: int,
+    func: Callable[[Any], Any],
+    dtype: Optional[DType],
+    vectorized: bool = False,
+) -> UnrolledNode:
+    if _profiler is not None and values is not None:
+        _profiler.count("elements_copied", len(values))
+    if _vectorizes(values, func, vectorized):
+        return _leaf(np.asarray(func(values)), capacity)
+    if values is None:
+        mapped: Any = func(None)
+        return _leaf(None if mapped is None else _pack([mapped], dtype), capacity)
+    return _leaf(_pack([func(value) for value in _plain(values)], dtype), capacity)
+
+
+def _mapped_dtype(dtype: Optional[DType], leaves: List[UnrolledNode]) -> Optional[DType]:
+    """The dtype of a list mapped into ``leaves`` from one of ``dtype``.
+
+    A ufunc may change the dtype (``np.sqrt`` of ints gives floats); the
+    result stores new elements the way its mapped blocks do.
+    """
+    mapped: Set[Any] = set()
+    for leaf in leaves:
+        values: Any = leaf.values
+        if _is_ndarray(values):
+            mapped.add(values.dtype)
+    if not mapped or mapped == {dtype}:
+        return dtype
+    found: Any = mapped.pop()
+    return found if not mapped and _exact(found) else None
+
+
+@_instrumented
+def url_map(
+    url: Optional[UnrolledLinkedList], func: Callable[[Any], Any], vectorized: bool = False
+) -> UnrolledLinkedList:
+    """Apply ``func`` to every element.
+
+    On ndarray blocks a ufunc (or, with ``vectorized=True``, any callable
+    mapping an array to an array of the same length) maps the whole block.
+    """
+    if url is None:
+        return UnrolledLinkedList()
+    if _profiler is not None:
+        func = _profiler.counted(func)
+    leaves: List[UnrolledNode] = [
+        _map_node(node.values, node.capacity, func, url.dtype, vectorized)
+        for node in _leaves(url._tree)
+    ]
+    return UnrolledLinkedList._from_tree(
+        url.node_capacity, _build(leaves), None, _mapped_dtype(url.dtype, leaves), url.min_fill
+    )
+
+
+@_instrumented
+def reduce(
     url: Optional[UnrolledLinkedList],
-    func: Callable[[Any, Any], Any],
+    func: Union[Callable[[Any, Any], Any], "Monoid"],
     init: Any
 ) -> Any:
+    """Fold ``func`` over the elements, starting from ``init``.
+
+    With a ``Monoid`` the cached block and subtree summaries of
+    ``summarize`` are combined instead of folding every element.
+    """
     if url is None:
         return None
     if Any is None:
         raise TypeError("Expected an integer value")
-    result: Any = init
-    current_node: Optional[UnrolledNode] = url.head
-    while current_node:
-        if current_node.values is not None:
-            for value in current_node.values:
-                result = func(result, value)
-        current_node = current_node.next
+    if isinstance(func, Monoid):
+        return func.combine(init, _tree_summary(url._tree, func))
+    if _profiler is not None:
+        func = _profiler.counted(func)
+    if np is not None and func in _ASSOCIATIVE_UFUNCS:
+        ufunc: Any = func
+        result: Any = init
+        for node in _leaves(url._tree):
+            values: Optional[Values] = node.values
+            if values is None:
+                continue
+            if _is_ndarray(values):
+                if len(values):
+                    result = ufunc(result, ufunc.reduce(values))
+            else:
+                result = functools.reduce(func, values, result)
+        return result
+    blocks: Iterator[Values] = (
+        _plain(node.values) for node in _leaves(url._tree) if node.values is not None)
+    return functools.reduce(func, chain.from_iterable(blocks), init)
+
+
+# Folding a block with ``ufunc.reduce`` and then into the running result
+# only matches an element-by-element fold when the ufunc is associative.
+_ASSOCIATIVE_UFUNCS: Any = () if np is None else (
+    np.add, np.multiply, np.maximum, np.minimum, np.fmax, np.fmin,
+    np.logical_and, np.logical_or, np.bitwise_and, np.bitwise_or, np.bitwise_xor,
+)
+
+
+# Monoid summaries.  A ``Monoid`` is an associative ``combine`` with an
+# ``identity``.  Its summary of a block folds the block's elements, and
+# its summary of a branch or deep node combines those of its children.
+# Nodes and branches are never modified, so each caches the summaries it
+# has computed, and a new version only recomputes the blocks and the
+# branches along the paths it copied.  Empty ``None`` nodes summarize to
+# the identity, as ``reduce`` skips them.
+
+
+class Monoid:
+    """An associative ``combine`` with an ``identity``.
+
+    ``lift`` maps each element to the value combined (the element itself
+    by default).  ``block``, if given, summarizes a whole non-empty block
+    at once and must agree with folding it.  Monoids compare by identity,
+    so create each one once, for example with ``register_monoid``.
+    """
+
+    __slots__ = ("name", "combine", "identity", "lift", "block")
+
+    def __init__(
+        self,
+        name: str,
+        combine: Callable[[Any, Any], Any],
+        identity: Any,
+        lift: Optional[Callable[[Any], Any]] = None,
+        block: Optional[Callable[[Values], Any]] = None,
+    ) -> None:
+        self.name: str = name
+        self.combine: Callable[[Any, Any], Any] = combine
+        self.identity: Any = identity
+        self.lift: Optional[Callable[[Any], Any]] = lift
+        self.block: Optional[Callable[[Values], Any]] = block
+
+    def __repr__(self) -> str:
+        return f"Monoid({self.name!r})"
+
+
+def _least(left: Any, right: Any) -> Any:
+    if left is None or right is None:
+        return right if left is None else left
+    return right if right < left else left
+
+
+def _greatest(left: Any, right: Any) -> Any:
+    if left is None or right is None:
+        return right if left is None else left
+    return right if left < right else left
+
+
+MONOIDS: Dict[str, Monoid] = {
+    "sum": Monoid("sum", operator.add, 0),
+    "count": Monoid("count", operator.add, 0, lambda element: 1, len),
+    # ``None`` is the identity: the minimum or maximum of no elements.
+    "min": Monoid("min", _least, None, block=min),
+    "max": Monoid("max", _greatest, None, block=max),
+}
+
+
+def register_monoid(
+    name: str,
+    combine: Callable[[Any, Any], Any],
+    identity: Any,
+    lift: Optional[Callable[[Any], Any]] = None,
+    block: Optional[Callable[[Values], Any]] = None,
+) -> Monoid:
+    """Create a ``Monoid`` and make it available to ``summarize`` by ``name``."""
+    monoid: Monoid = Monoid(name, combine, identity, lift, block)
+    MONOIDS[name] = monoid
+    return monoid
+
+
+def _fold(monoid: Monoid, values: Values) -> Any:
+    values = _plain(values)
+    if monoid.block is not None:
+        return monoid.block(values)
+    elements: Iterable[Any] = values if monoid.lift is None else map(monoid.lift, values)
+    return functools.reduce(monoid.combine, elements, monoid.identity)
+
+
+def _block_summary(node: UnrolledNode, monoid: Monoid) -> Any:
+    cached: Optional[Dict[Monoid, Any]] = node._monoids
+    if cached is not None and monoid in cached:
+        return cached[monoid]
+    values: Optional[Values] = node.values
+    result: Any = monoid.identity if values is None or not len(values) else _fold(monoid, values)
+    if _profiler is not None:
+        _profiler.count("nodes_visited")
+    if cached is None:
+        node._monoids = cached = {}
+    cached[monoid] = result
     return result
+
+
+def _tree_summary(item: Any, monoid: Monoid) -> Any:
+    """Summary of a tree, branch or leaf, cached on every branch and leaf."""
+    if item is None:
+        return monoid.identity
+    if isinstance(item, _Single):
+        return _tree_summary(item.item, monoid)
+    if isinstance(item, UnrolledNode):
+        return _block_summary(item, monoid)
+    cached: Optional[Dict[Monoid, Any]] = item.monoids
+    if cached is not None and monoid in cached:
+        return cached[monoid]
+    parts: Tuple[Any, ...] = (
+        item.items if isinstance(item, _Branch) else item.prefix + (item.middle,) + item.suffix)
+    result: Any = monoid.identity
+    for part in parts:
+        result = monoid.combine(result, _tree_summary(part, monoid))
+    if cached is None:
+        item.monoids = cached = {}
+    cached[monoid] = result
+    return result
+
+
+def _range_summary(item: Any, start: int, stop: int, monoid: Monoid) -> Any:
+    """Summary of positions ``start:stop`` of ``item``, which spans at least ``stop``."""
+    if start <= 0 and stop >= _span(item):
+        return _tree_summary(item, monoid)
+    if isinstance(item, UnrolledNode):
+        values: Optional[Values] = item.values
+        if values is None or not len(values):
+            return monoid.identity
+        return _fold(monoid, values[max(start, 0):stop])
+    if isinstance(item, _Single):
+        return _range_summary(item.item, start, stop, monoid)
+    parts: Tuple[Any, ...] = (
+        item.items if isinstance(item, _Branch) else item.prefix + (item.middle,) + item.suffix)
+    result: Any = monoid.identity
+    offset: int = 0
+    for part in parts:
+        span: int = _span(part)
+        if offset + span > start and offset < stop:
+            result = monoid.combine(result, _range_summary(part, start - offset, stop - offset, monoid))
+        offset += span
+        if offset >= stop:
+            break
+    return result
+
+
+@_instrumented
+def summarize(
+    url: UnrolledLinkedList,
+    monoid: Union[str, Monoid],
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+) -> Any:
+    """Combine the elements at positions ``start:stop`` with ``monoid``.
+
+    ``monoid`` is a ``Monoid`` or the name of a registered one.  Whole
+    blocks and subtrees use their cached summaries, so after a point
+    update only the rebuilt nodes are folded again, and a range costs
+    O(log n) cached summaries plus the two partial blocks at its ends.
+    Negative bounds count from the end, as in slicing; empty ``None``
+    nodes are skipped, as by ``reduce``.
+    """
+    if isinstance(monoid, str):
+        if monoid not in MONOIDS:
+            raise KeyError(f"No monoid registered as {monoid!r}")
+        monoid = MONOIDS[monoid]
+    first, last, _ = slice(start, stop).indices(_tree_size(url._tree))
+    if first >= last:
+        return monoid.identity
+    return _range_summary(url._tree, first, last, monoid)
+
+
+@_instrumented
+def from_ndarray(arr: Any, capacity: Optional[Capacity] = 1) -> UnrolledLinkedList:
+    """Build a list with ndarray blocks from a one-dimensional array.
+
+    ``arr`` is copied once and frozen; every block is a read-only view into
+    that copy, so only the nodes are created in Python.
+    """
+    if np is None:
+        raise ImportError("from_ndarray requires numpy")
+    frozen: Any = np.array(arr)
+    if frozen.ndim != 1:
+        raise ValueError("Expected a one-dimensional array")
+    dtype: Optional[DType] = _check_dtype(frozen.dtype)
+    frozen.flags.writeable = False
+    size: int = _resolve_capacity(capacity, len(frozen), dtype)
+    if len(frozen) == 0:
+        return UnrolledLinkedList(size if capacity == "auto" else 1, dtype=dtype)
+    leaves: List[UnrolledNode] = [
+        _leaf(frozen[start:start + size], size) for start in range(0, len(frozen), size)
+    ]
+    return UnrolledLinkedList._from_tree(size, _build(leaves), True, dtype)
+
+
+@_instrumented
+def to_ndarray(url: Optional[UnrolledLinkedList], dtype: Optional[DType] = None) -> Any:
+    """Concatenate the blocks of ``url`` into one flat ndarray.
+
+    Empty ``None`` nodes read as ``None``, which gives an object array.
+    """
+    if np is None:
+        raise ImportError("to_ndarray requires numpy")
+    if url is None or url._tree is None:
+        fallback: Any = None if url is None or url.dtype is None else np.dtype(url.dtype)
+        return np.empty(0, dtype=fallback if dtype is None else dtype)
+    result: Any = np.concatenate([np.asarray(chunk) for chunk in url.iter_chunks()])
+    return result if dtype is None else result.astype(dtype, copy=False)
+
+
+# Parallel variants.  The leaves are cut into chunks of ``chunk_nodes``
+# blocks, each chunk is handed to a worker as plain ``(values, capacity)``
+# pairs, and the results come back in order through ``Executor.map``.
+# With the default process pool, ``func`` must be picklable (a module
+# level function, not a lambda); pass ``executor="thread"`` or an
+# existing ``Executor`` otherwise.
+
+_Chunk = List[Tuple[Optional[Values], int]]
+
+
+def _map_chunk(func: Callable[[Any], Any], dtype: Optional[DType], chunk: _Chunk) -> List[UnrolledNode]:
+    return [_map_node(values, capacity, func, dtype) for values, capacity in chunk]
+
+
+def _filter_chunk(predicate: Callable[[Any], bool], chunk: _Chunk) -> List[UnrolledNode]:
+    nodes: List[Optional[UnrolledNode]] = [
+        _filter_node(values, capacity, predicate) for values, capacity in chunk]
+    return [node for node in nodes if node is not None]
+
+
+def _reduce_chunk(func: Callable[[Any, Any], Any], init: Any, chunk: _Chunk) -> Any:
+    blocks: Iterator[Values] = (_plain(values) for values, _ in chunk if values is not None)
+    return functools.reduce(func, chain.from_iterable(blocks), init)
+
+
+def _portable(values: Optional[Values]) -> Optional[Values]:
+    """``values`` in a form that pickles; memory-mapped views are copied."""
+    if isinstance(values, memoryview):
+        return array(values.format, values.tobytes())
+    return values
+
+
+def _run_chunks(
+    url: UnrolledLinkedList,
+    worker: Callable[[_Chunk], Any],
+    workers: Optional[int],
+    chunk_nodes: int,
+    executor: Union[str, Executor],
+) -> List[Any]:
+    blocks: _Chunk = [(_portable(node.values), node.capacity) for node in _leaves(url._tree)]
+    step: int = max(chunk_nodes, 1)
+    chunks: List[_Chunk] = [blocks[start:start + step] for start in range(0, len(blocks), step)]
+    if isinstance(executor, Executor):
+        return list(executor.map(worker, chunks))
+    pools = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+    if executor not in pools:
+        raise ValueError(f"Unknown executor: {executor!r}")
+    with pools[executor](max_workers=workers) as pool:
+        return list(pool.map(worker, chunks))
+
+
+@_instrumented
+def parallel_map(
+    url: Optional[UnrolledLinkedList],
+    func: Callable[[Any], Any],
+    workers: Optional[int] = None,
+    chunk_nodes: int = 256,
+    executor: Union[str, Executor] = "process",
+) -> UnrolledLinkedList:
+    """``url_map`` with the chunks of the list mapped on a worker pool."""
+    if url is None:
+        return UnrolledLinkedList()
+    worker = functools.partial(_map_chunk, func, url.dtype)
+    results: List[List[UnrolledNode]] = _run_chunks(url, worker, workers, chunk_nodes, executor)
+    leaves: List[UnrolledNode] = list(chain.from_iterable(results))
+    return UnrolledLinkedList._from_tree(
+        url.node_capacity, _build(leaves), None, _mapped_dtype(url.dtype, leaves), url.min_fill
+    )
+
+
+@_instrumented
+def parallel_filter(
+    url: Optional[UnrolledLinkedList],
+    predicate: Callable[[Any], bool],
+    workers: Optional[int] = None,
+    chunk_nodes: int = 256,
+    executor: Union[str, Executor] = "process",
+) -> UnrolledLinkedList:
+    """``url_filter`` with the chunks of the list filtered on a worker pool."""
+    if url is None:
+        return UnrolledLinkedList()
+    worker = functools.partial(_filter_chunk, predicate)
+    results: List[List[UnrolledNode]] = _run_chunks(url, worker, workers, chunk_nodes, executor)
+    leaves: List[UnrolledNode] = list(chain.from_iterable(results))
+    return _derive(url, _build(_rebalance(leaves, url.min_fill, url.dtype)))
+
+
+@_instrumented
+def parallel_reduce(
+    url: Optional[UnrolledLinkedList],
+    func: Callable[[Any, Any], Any],
+    init: Any,
+    combine: Optional[Callable[[Any, Any], Any]] = None,
+    workers: Optional[int] = None,
+    chunk_nodes: int = 256,
+    executor: Union[str, Executor] = "process",
+) -> Any:
+    """``reduce`` where every chunk is folded from ``init`` on a worker pool.
+
+    The partial results are then folded, in order, with ``combine``
+    (``func`` by default), which must be associative with ``init`` as its
+    identity for the result to match ``reduce``.
+    """
+    if url is None:
+        return None
+    worker = functools.partial(_reduce_chunk, func, init)
+    partials: List[Any] = _run_chunks(url, worker, workers, chunk_nodes, executor)
+    return functools.reduce(combine or func, partials, init)
+
+
+# Binary format.  A file header, then one record per node, in order:
+#
+#   header  b"ULLB", version, big-endian flag, capacity, min_fill and the
+#           length of the dtype name, then the name, padded to 8 bytes
+#   record  kind, element format, capacity and payload size (16 bytes),
+#           then the payload, padded to 8 bytes
+#
+# Numeric blocks are stored as their raw native-order bytes, so ``load``
+# can hand out views of a memory-mapped file without touching the
+# elements; other blocks are pickled lists.  Only load files you trust.
+_MAGIC: bytes = b"ULLB"
+_VERSION: int = 1
+_HEADER = struct.Struct("<4sBBxxIdI")
+_RECORD = struct.Struct("<BcxxIQ")
+_HOLE, _ARRAY, _NDARRAY, _PICKLED = range(4)
+_Path = Union[str, "os.PathLike[str]"]
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % 8)
+
+
+def _encode_dtype(dtype: Optional[DType]) -> bytes:
+    if dtype is None:
+        return b""
+    if isinstance(dtype, str):
+        return dtype.encode()
+    return b"numpy:" + dtype.str.encode()
+
+
+def _decode_dtype(raw: bytes) -> Optional[DType]:
+    name: str = raw.decode()
+    if not name:
+        return None
+    return _check_dtype(name[len("numpy:"):] if name.startswith("numpy:") else name)
+
+
+def _write_header(file: Any, capacity: int, dtype: Optional[DType], min_fill: float) -> None:
+    name: bytes = _encode_dtype(dtype)
+    header: bytes = _HEADER.pack(
+        _MAGIC, _VERSION, sys.byteorder == "big", capacity, min_fill, len(name)) + name
+    file.write(header + _padding(len(header)))
+
+
+def _write_node(file: Any, node: UnrolledNode) -> None:
+    values: Optional[Values] = node.values
+    kind: int = _PICKLED
+    fmt: bytes = b"\0"
+    if values is None:
+        kind, payload = _HOLE, b""
+    elif isinstance(values, array):
+        kind, fmt, payload = _ARRAY, values.typecode.encode(), values.tobytes()
+    elif isinstance(values, memoryview):
+        kind, fmt, payload = _ARRAY, values.format.encode(), values.tobytes()
+    elif _is_ndarray(values):
+        native: Any = values.dtype.newbyteorder("=")
+        kind, fmt = _NDARRAY, native.char.encode()
+        payload = np.ascontiguousarray(values, dtype=native).tobytes()
+    else:
+        payload = pickle.dumps(list(values))
+    file.write(_RECORD.pack(kind, fmt, node.capacity, len(payload)) + payload + _padding(len(payload)))
+
+
+def _read_header(file: Any) -> Tuple[int, Optional[DType], float, bool]:
+    """Capacity, dtype, fill factor, and whether the payloads need byte swapping."""
+    header: bytes = file.read(_HEADER.size)
+    if len(header) < _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("Not an unrolled linked list file")
+    _, version, big, capacity, min_fill, name_size = _HEADER.unpack(header)
+    if version != _VERSION:
+        raise ValueError(f"Unsupported file version: {version}")
+    name: bytes = file.read(name_size + len(_padding(_HEADER.size + name_size)))[:name_size]
+    return capacity, _decode_dtype(name), min_fill, bool(big) != (sys.byteorder == "big")
+
+
+def _block(kind: int, fmt: str, raw: Any, swap: bool, view: bool) -> Optional[Values]:
+    """Decode one payload; with ``view``, numeric blocks share ``raw``'s memory."""
+    if kind == _HOLE:
+        return None
+    if kind == _PICKLED:
+        return pickle.loads(raw)
+    if kind == _NDARRAY:
+        if np is None:
+            raise ImportError("numpy is required to load ndarray blocks")
+        block: Any = np.frombuffer(raw, dtype=fmt)
+        if swap:
+            return block.byteswap()
+        return block if view else block.copy()
+    if view and not swap:
+        shared: Any = memoryview(raw)
+        return shared.cast(fmt)
+    block = array(fmt)
+    block.frombytes(raw)
+    if swap:
+        block.byteswap()
+    return block
+
+
+def _read_nodes(file: Any, swap: bool, buffer: Optional[memoryview] = None) -> Iterator[UnrolledNode]:
+    """Decode records from ``file`` one at a time.
+
+    With ``buffer`` (a view of the whole of ``file``) the payloads are not
+    read but sliced out of ``buffer``, so numeric blocks become views.
+    """
+    while True:
+        record: bytes = file.read(_RECORD.size)
+        if not record:
+            return
+        if len(record) < _RECORD.size:
+            raise ValueError("Truncated record")
+        kind, fmt, capacity, payload_size = _RECORD.unpack(record)
+        padded: int = payload_size + len(_padding(payload_size))
+        raw: Any
+        if buffer is None:
+            raw = file.read(padded)[:payload_size]
+        else:
+            start: int = file.tell()
+            raw = buffer[start:start + payload_size]
+            file.seek(start + padded)
+        if len(raw) < payload_size:
+            raise ValueError("Truncated record")
+        yield _leaf(_block(kind, fmt.decode(), raw, swap, buffer is not None), capacity)
+
+
+@_instrumented
+def dump(url: UnrolledLinkedList, path: _Path) -> None:
+    """Write ``url`` to ``path``, one record per node."""
+    with open(path, "wb") as file:
+        _write_header(file, url.node_capacity, url.dtype, url.min_fill)
+        for node in _leaves(url._tree):
+            _write_node(file, node)
+
+
+@_instrumented
+def dump_stream(
+    iterable: Iterable[Any],
+    path: _Path,
+    capacity: int = 1,
+    dtype: Optional[DType] = None,
+    min_fill: float = 0.0,
+) -> None:
+    """Write the elements of ``iterable`` to ``path``, one node at a time.
+
+    The file matches ``dump(from_list(list(iterable), capacity, dtype), path)``
+    but only one node is held in memory.
+    """
+    capacity = capacity or 1
+    dtype = _check_dtype(dtype)
+    source: Iterator[Any] = iter(iterable)
+    with open(path, "wb") as file:
+        _write_header(file, capacity, dtype, _check_min_fill(min_fill))
+        while True:
+            chunk: List[Any] = list(islice(source, capacity))
+            if not chunk:
+                return
+            _write_node(file, _chunk_leaf(chunk, capacity, dtype))
+
+
+@_instrumented
+def load(path: _Path, mmap: bool = True) -> UnrolledLinkedList:
+    """Read a list written by ``dump`` or ``dump_stream``.
+
+    With ``mmap`` the file is memory-mapped and every numeric block is a
+    read-only view into it (a ``memoryview``, or an ``ndarray`` for NumPy
+    lists), so loading costs O(nodes) whatever the number of elements.
+    """
+    with open(path, "rb") as file:
+        capacity, dtype, min_fill, swap = _read_header(file)
+        if not mmap:
+            leaves: List[UnrolledNode] = list(_read_nodes(file, swap))
+        else:
+            offset: int = file.tell()
+            mapped: Any = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ)
+            mapped.seek(offset)
+            leaves = list(_read_nodes(mapped, swap, memoryview(mapped)))
+    dense: bool = not any(_accepts(node) for node in leaves[:-1])
+    return UnrolledLinkedList._from_tree(capacity, _build(leaves), dense, dtype, min_fill)
+
+
+def load_stream(path: _Path) -> Iterator[Any]:
+    """Yield the elements stored at ``path``, reading one node at a time."""
+    with open(path, "rb") as file:
+        _, _, _, swap = _read_header(file)
+        for node in _read_nodes(file, swap):
+            yield from _elements(node)
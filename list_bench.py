@@ -0,0 +1,894 @@
+"""Benchmarks for `list.py`.
+
+Run one benchmark by name, for example::
+
+    python list_bench.py traversal --max-size 10000000
+
+Every benchmark prints one row per measurement so runs are easy to diff.
+The ``grid`` benchmark times every operation over sizes and capacities
+and can save the results, and ``compare`` checks two saved runs::
+
+    python list_bench.py grid --max-size 1000000 --output before.json
+    python list_bench.py grid --max-size 1000000 --output after.json
+    python list_bench.py compare before.json after.json --threshold 0.2
+
+and ``auto`` checks that ``capacity="auto"`` kept up with the best fixed
+capacity in a saved grid::
+
+    python list_bench.py auto after.json
+"""
+import argparse
+import asyncio
+import collections
+import functools
+import json
+import operator
+import os
+import pickle
+import platform
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+from list import (
+    UnrolledLinkedList,
+    add,
+    add_to_end,
+    from_list,
+    find,
+    iterator,
+    reduce,
+    size,
+    url_get,
+    url_set,
+    to_list,
+    reverse,
+    remove,
+    url_map,
+    url_filter,
+    m_concat,
+    split_at,
+    compact,
+    stats,
+    dump,
+    load,
+    load_stream,
+    parallel_map,
+    parallel_reduce,
+    member,
+    from_ndarray,
+    to_ndarray,
+    profile_ops,
+    indexed,
+    SortedUnrolledLinkedList,
+    batch_update,
+    from_iterable,
+    from_async_iterable,
+    Atom,
+    MONOIDS,
+    summarize,
+    diff,
+    patch,
+    push_front,
+    pop_front,
+)
+
+
+def measure(func: Callable[[], Any], repeat: int = 1) -> float:
+    """Best wall time of ``repeat`` calls to ``func``, in seconds."""
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name: str, n: int, seconds: float, calls: int = 0) -> None:
+    """Print one row; with ``calls`` the rate is per call instead of per element."""
+    count: int = calls or n
+    unit: str = "ns/call" if calls else "ns/elem"
+    per_unit: float = seconds / count * 1e9 if count else 0.0
+    print(f"{name:<24}{n:>12}{seconds:>12.4f} s{per_unit:>10.1f} {unit}")
+
+
+def sizes_up_to(max_size: int, start: int = 1000) -> List[int]:
+    sizes: List[int] = []
+    n: int = start
+    while n <= max_size:
+        sizes.append(n)
+        n *= 10
+    return sizes
+
+
+def bench_traversal(args: argparse.Namespace) -> None:
+    """Whole-list operations should cost the same time per element at any size."""
+    for n in sizes_up_to(args.max_size):
+        values: List[int] = list(range(n))
+        lst = from_list(values, args.capacity)
+        report("from_list", n, measure(lambda: from_list(values, args.capacity)))
+        report("size", n, measure(lambda: size(lst)))
+        report("to_list", n, measure(lambda: to_list(lst)))
+        report("reverse", n, measure(lambda: reverse(lst)))
+        report("remove", n, measure(lambda: remove(lst, -1)))
+        report("url_map", n, measure(lambda: url_map(lst, abs)))
+        report("url_filter", n, measure(lambda: url_filter(lst, bool)))
+        report("m_concat", n, measure(lambda: m_concat(lst, lst)))
+        report("__eq__", n, measure(lambda: lst == from_list(values, args.capacity)))
+
+
+def bench_append(args: argparse.Namespace) -> None:
+    """Repeated ``add``/``add_to_end`` should cost O(1) per call at any size."""
+    for n in sizes_up_to(args.max_size):
+        for name, append in (("add", add), ("add_to_end", add_to_end)):
+            def build() -> None:
+                lst = UnrolledLinkedList(args.capacity)
+                for i in range(n):
+                    lst = append(lst, i)
+            report(name, n, measure(build))
+
+
+def bench_index(args: argparse.Namespace) -> None:
+    """``url_get``/``url_set`` should cost O(log n), so the per-call time stays flat."""
+    calls: int = 1000
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        positions: List[int] = [(i * 7919) % n for i in range(calls)]
+        report("size", n, measure(lambda: [size(lst) for _ in positions]), calls)
+        report("url_get", n, measure(lambda: [url_get(lst, i) for i in positions]), calls)
+        report("url_set", n, measure(lambda: [url_set(lst, i, -1) for i in positions]), calls)
+
+
+def bench_equality(args: argparse.Namespace) -> None:
+    """``==`` and ``hash`` between versions that share all but one block."""
+    calls: int = 100
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        changed = url_set(lst, 0, -1)
+        copy = from_list(list(range(n)), args.capacity)
+        report("== shared", n, measure(lambda: [changed == lst for _ in range(calls)]), calls)
+        report("== unshared", n, measure(lambda: copy == lst))
+        report("hash first", n, measure(lambda: hash(from_list(list(range(n)), args.capacity))))
+        hash(lst)
+        report("hash url_set", n,
+               measure(lambda: [hash(url_set(lst, n // 2, -1)) for _ in range(calls)]), calls)
+
+
+def bench_membership(args: argparse.Namespace) -> None:
+    """Repeated ``member`` misses: plain scans, node summaries and a whole-list index."""
+    calls: int = 20
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        misses: List[int] = list(range(n, n + calls))
+        report("member scan", n, measure(_each(lambda v: member(lst, v), misses)), calls)
+        member(lst, -1, summaries=True)
+        report("member summaries", n,
+               measure(_each(lambda v: member(lst, v, summaries=True), misses)), calls)
+        index = indexed(lst)
+        report("member indexed", n, measure(_each(lambda v: member(index, v), misses)), calls)
+        report("indexed build", n, measure(lambda: indexed(lst)))
+
+
+def bench_sorted(args: argparse.Namespace) -> None:
+    """``SortedUnrolledLinkedList`` searches and updates against scanning with ``find``."""
+    calls: int = 100
+    for n in sizes_up_to(args.max_size):
+        ordered = SortedUnrolledLinkedList(range(0, 2 * n, 2), args.capacity)
+        plain = from_list(list(range(0, 2 * n, 2)), args.capacity)
+        keys: List[int] = [(i * 7919) % n * 2 for i in range(calls)]
+        report("find >= key", n, measure(_each(lambda k: find(plain, lambda x: x >= k), keys[:10])), 10)
+        report("bisect", n, measure(_each(ordered.bisect, keys)), calls)
+        report("contains", n, measure(_each(ordered.contains, keys)), calls)
+        report("range 100", n, measure(_each(lambda k: ordered.range(k, k + 200), keys)), calls)
+        report("insert", n, measure(_each(ordered.insert, [k + 1 for k in keys])), calls)
+        report("remove", n, measure(_each(ordered.remove, keys)), calls)
+
+
+def bench_slice(args: argparse.Namespace) -> None:
+    """``url[i:j]`` views against copying the range through ``to_list``/``from_list``."""
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        middle: slice = slice(n // 4, 3 * n // 4)
+        report("copy half", n, measure(lambda: from_list(to_list(lst)[middle], args.capacity)))
+        report("slice half", n, measure(lambda: lst[middle]))
+        report("slice 100", n, measure(lambda: lst[n // 2:n // 2 + 100]))
+        report("iterate half", n, measure(lambda: sum(lst[middle])))
+
+
+def bench_batch(args: argparse.Namespace) -> None:
+    """10k edits applied by ``batch_update`` against one ``url_set`` at a time, for example::
+
+        python list_bench.py batch --max-size 1000000
+    """
+    count: int = 10000
+    for n in sizes_up_to(args.max_size, start=100000):
+        lst = from_list(list(range(n)), args.capacity)
+        positions: List[int] = [(i * 7919) % n for i in range(count)]
+        sets: List[Tuple[str, int, Any]] = [("set", i, -i) for i in positions]
+        mixed: List[Tuple[str, int, Any]] = [
+            (("set", "insert", "remove")[k % 3], i, -i) for k, i in enumerate(positions)]
+
+        def one_at_a_time() -> None:
+            result = lst
+            for _, index, value in sets:
+                result = url_set(result, index, value)
+        report("url_set x10k", n, measure(one_at_a_time, args.repeat), count)
+        report("batch sets", n, measure(lambda: batch_update(lst, sets), args.repeat), count)
+        report("batch mixed", n, measure(lambda: batch_update(lst, mixed), args.repeat), count)
+
+
+def bench_concat(args: argparse.Namespace) -> None:
+    """Joining many small lists, and ``m_concat``/``split_at`` at growing sizes."""
+    count: int = 100000
+    parts = [from_list(list(range(i % 7)), args.capacity) for i in range(count)]
+
+    def join() -> Any:
+        joined: Any = UnrolledLinkedList(args.capacity)
+        for part in parts:
+            joined = m_concat(joined, part)
+        return joined
+    report("m_concat 100k lists", count, measure(join), count)
+    calls: int = 1000
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        positions: List[int] = [(i * 7919) % n for i in range(calls)]
+
+        def concats() -> None:
+            for _ in positions:
+                m_concat(lst, lst)
+
+        def splits() -> None:
+            for i in positions:
+                split_at(lst, i)
+        report("m_concat", n, measure(concats), calls)
+        report("split_at", n, measure(splits), calls)
+
+
+def bench_fill(args: argparse.Namespace) -> None:
+    """Node layout and iteration cost after a filter/remove churn, by fill policy."""
+    for n in sizes_up_to(args.max_size):
+        for min_fill in (0.0, 0.5, 1.0):
+            lst = from_list(list(range(n)), args.capacity, min_fill=min_fill)
+            for step in range(2, 6):
+                lst = url_filter(remove(lst, step), lambda x: x % step != 1)
+            layout = stats(lst)
+            print(f"min_fill={min_fill:<4}{layout.elements:>12}{layout.nodes:>10} nodes"
+                  f"{layout.average_fill:>8.2f} fill")
+            report(f"iterate min_fill={min_fill}", layout.elements, measure(lambda: sum(1 for _ in lst)))
+        report("compact", size(lst), measure(lambda: compact(lst)))
+
+
+class _DictNode:
+    """Node layout before ``__slots__``: an instance dict plus a values list."""
+
+    def __init__(self, values: List[Any], next_node: Any, capacity: int) -> None:
+        self.values = values
+        self.next = next_node
+        self.capacity = capacity
+
+
+def _dict_chain(values: List[int], capacity: int) -> Any:
+    head: Any = None
+    for start in reversed(range(0, len(values), capacity)):
+        head = _DictNode(values[start:start + capacity], head, capacity)
+    return head
+
+
+def allocated(func: Callable[[], Any]) -> int:
+    """Bytes still allocated by the object ``func`` returns."""
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        kept: Any = func()
+        after: int = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Bytes per element for each storage layout, measured with ``tracemalloc``."""
+    for n in sizes_up_to(args.max_size):
+        ints: List[int] = list(range(1000, 1000 + n))
+        floats: List[float] = [i + 0.5 for i in range(n)]
+        layouts: Dict[str, Callable[[], Any]] = {
+            "list (int)": lambda: [int(str(i)) for i in ints],
+            "dict nodes (int)": lambda: _dict_chain([int(str(i)) for i in ints], args.capacity),
+            "slots nodes (int)": lambda: from_list([int(str(i)) for i in ints], args.capacity),
+            "array nodes (int)": lambda: from_list(ints, args.capacity, dtype="q"),
+            "list (float)": lambda: [x * 1.0 for x in floats],
+            "slots nodes (float)": lambda: from_list([x * 1.0 for x in floats], args.capacity),
+            "array nodes (float)": lambda: from_list(floats, args.capacity, dtype="d"),
+        }
+        for name, build in layouts.items():
+            print(f"{name:<24}{n:>12}{allocated(build) / n:>12.1f} bytes/elem")
+
+
+def bench_iteration(args: argparse.Namespace) -> None:
+    """Per-element iteration cost must not grow with ``node_capacity``."""
+    n: int = args.max_size
+    for capacity in (1, 8, 64, 512):
+        lst = from_list(list(range(n)), capacity)
+        report(f"iterator c={capacity}", n, measure(lambda: sum(1 for _ in iterator(lst))))
+        report(f"reversed c={capacity}", n, measure(lambda: sum(1 for _ in reversed(lst))))
+        report(f"to_list c={capacity}", n, measure(lambda: to_list(lst)))
+        report(f"reduce c={capacity}", n, measure(lambda: reduce(lst, max, 0)))
+        report(f"find c={capacity}", n, measure(lambda: find(lst, lambda x: x < 0)))
+
+
+def bench_build(args: argparse.Namespace) -> None:
+    """Bulk construction: ``from_list`` against the builder and repeated ``add``."""
+    for n in sizes_up_to(args.max_size):
+        values: List[int] = list(range(n))
+
+        def extend() -> Any:
+            return UnrolledLinkedList.builder(args.capacity).extend(iter(values)).freeze()
+
+        def append() -> Any:
+            builder = UnrolledLinkedList.builder(args.capacity)
+            for value in values:
+                builder.append(value)
+            return builder.freeze()
+
+        def adds() -> None:
+            lst = UnrolledLinkedList(args.capacity)
+            for value in values:
+                lst = add(lst, value)
+        report("from_list", n, measure(lambda: from_list(values, args.capacity)))
+        report("builder.extend", n, measure(extend))
+        report("builder.append", n, measure(append))
+        report("add", n, measure(adds))
+
+
+def bench_streaming(args: argparse.Namespace) -> None:
+    """``from_iterable`` over a generator against materializing it for ``from_list``."""
+    for n in sizes_up_to(args.max_size):
+        def stream() -> Any:
+            return from_iterable((i for i in range(n)), args.capacity)
+
+        def materialize() -> Any:
+            return from_list(list(i for i in range(n)), args.capacity)
+
+        def pull() -> Any:
+            async def produce() -> AsyncIterator[int]:
+                for i in range(n):
+                    yield i
+            return asyncio.run(from_async_iterable(produce(), args.capacity))
+        for name, func in (("from_iterable", stream), ("from_list(list())", materialize),
+                           ("from_async_iterable", pull)):
+            print(f"{name:>20} n={n:>9}: {measure(func) * 1e3:9.2f} ms, "
+                  f"peak {peak_memory(func) / 1e6:8.2f} MB")
+
+
+def bench_query(args: argparse.Namespace) -> None:
+    """Fused ``query()`` pipelines against the same chain of eager calls."""
+    def double(x: int) -> int:
+        return x * 2
+
+    def keep(x: int) -> bool:
+        return x % 3 == 0
+
+    def plus(x: int, y: int) -> int:
+        return x + y
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        report("eager reduce", n, measure(lambda: reduce(url_filter(url_map(lst, double), keep), plus, 0)))
+        report("fused reduce", n, measure(lambda: lst.query().map(double).filter(keep).reduce(plus, 0)))
+        report("eager collect", n, measure(lambda: url_filter(url_map(lst, double), keep)))
+        report("fused collect", n, measure(lambda: lst.query().map(double).filter(keep).collect()))
+        report("fused take(10)", n, measure(lambda: list(lst.query().map(double).filter(keep).take(10))))
+
+
+def _busy(x: int) -> int:
+    """A deliberately CPU-bound pure-Python mapping function."""
+    total: int = x
+    for i in range(200):
+        total = (total * 31 + i) % 1000003
+    return total
+
+
+def _plus(x: int, y: int) -> int:
+    return x + y
+
+
+def bench_parallel(args: argparse.Namespace) -> None:
+    """Process-pool map/reduce speedup over ``url_map`` as workers are added."""
+    n: int = args.max_size
+    lst = from_list(list(range(n)), args.capacity)
+    report("url_map", n, measure(lambda: url_map(lst, _busy)))
+    for workers in (1, 2, 4, 8):
+        report(f"parallel_map w={workers}", n,
+               measure(lambda: parallel_map(lst, _busy, workers=workers)))
+    mapped = url_map(lst, _busy)
+    report("reduce", n, measure(lambda: reduce(mapped, _plus, 0)))
+    for workers in (1, 2, 4, 8):
+        report(f"parallel_reduce w={workers}", n,
+               measure(lambda: parallel_reduce(mapped, _plus, 0, workers=workers)))
+
+
+def bench_summary(args: argparse.Namespace) -> None:
+    """Sums through cached monoid summaries against ``reduce`` after each point update."""
+    total = MONOIDS["sum"]
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        summarize(lst, total)
+        versions = [url_set(lst, (i * 7919) % n, -i) for i in range(100)]
+        report("reduce(add) after url_set", n,
+               measure(lambda: [reduce(v, operator.add, 0) for v in versions]) / 100)
+        report("reduce(sum) after url_set", n,
+               measure(lambda: [reduce(v, total, 0) for v in versions[::-1]]) / 100)
+        report("sum(to_list()[range])", n,
+               measure(lambda: sum(to_list(lst)[n // 4:3 * n // 4])))
+        report("summarize(range)", n, measure(lambda: summarize(lst, total, n // 4, 3 * n // 4)))
+
+
+def _flat_diff(old: Any, new: Any) -> List[int]:
+    """Positions where two lists of equal length differ, found by flattening both."""
+    return [i for i, (x, y) in enumerate(zip(to_list(old), to_list(new))) if x != y]
+
+
+def bench_diff(args: argparse.Namespace) -> None:
+    """``diff`` of a version against its parent after one ``url_set``, against flattening both."""
+    for n in sizes_up_to(args.max_size):
+        old = from_list(list(range(n)), args.capacity)
+        new = url_set(old, n // 2, -1)
+        report("to_list + compare", n, measure(lambda: _flat_diff(old, new)))
+        report("diff", n, measure(lambda: diff(old, new)))
+        hunks = diff(old, new)
+        report("patch", n, measure(lambda: patch(old, hunks)))
+
+
+def bench_deque(args: argparse.Namespace) -> None:
+    """Queue and stack workloads with the front and back operations, against ``collections.deque``."""
+    for n in sizes_up_to(args.max_size):
+        def queue() -> None:
+            lst = UnrolledLinkedList(args.capacity)
+            for i in range(n):
+                lst = add_to_end(lst, i)
+            while len(lst):
+                _, lst = pop_front(lst)
+
+        def stack() -> None:
+            lst = UnrolledLinkedList(args.capacity)
+            for i in range(n):
+                lst = push_front(lst, i)
+            while len(lst):
+                _, lst = pop_front(lst)
+
+        def deque_queue() -> None:
+            dq: Any = collections.deque()
+            for i in range(n):
+                dq.append(i)
+            while dq:
+                dq.popleft()
+
+        def deque_stack() -> None:
+            dq: Any = collections.deque()
+            for i in range(n):
+                dq.appendleft(i)
+            while dq:
+                dq.popleft()
+        report("queue", n, measure(queue))
+        report("deque queue", n, measure(deque_queue))
+        report("stack", n, measure(stack))
+        report("deque stack", n, measure(deque_stack))
+
+
+class _LockedRef:
+    """A shared list behind one lock, held by readers and by whole updates."""
+
+    def __init__(self, value: Any) -> None:
+        self._value: Any = value
+        self._lock = threading.Lock()
+
+    def deref(self) -> Any:
+        with self._lock:
+            return self._value
+
+    def swap(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._value = func(self._value, *args)
+            return self._value
+
+
+def _contended(ref: Any, writers: int, seconds: float) -> Tuple[int, int]:
+    """Reads by one reader and swaps by ``writers`` writers within ``seconds``."""
+    done = threading.Event()
+    writes: List[int] = [0] * writers
+
+    def write(slot: int) -> None:
+        while not done.is_set():
+            ref.swap(url_set, writes[slot] % 64, slot)
+            writes[slot] += 1
+    threads = [threading.Thread(target=write, args=(slot,)) for slot in range(writers)]
+    for thread in threads:
+        thread.start()
+    reads: int = 0
+    deadline: float = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        url_get(ref.deref(), reads % 64)
+        reads += 1
+    done.set()
+    for thread in threads:
+        thread.join()
+    return reads, sum(writes)
+
+
+def bench_atom(args: argparse.Namespace) -> None:
+    """Reader throughput on a shared list as writers are added, ``Atom`` against one lock."""
+    n: int = args.max_size
+    lst = from_list(list(range(n)), args.capacity)
+    for writers in (0, 1, 2, 4):
+        for name, ref in (("Atom", Atom(lst, counters=True)), ("lock", _LockedRef(lst))):
+            reads, writes = _contended(ref, writers, 0.5)
+            retries: str = f", {ref.contention().retries} retries" if isinstance(ref, Atom) else ""
+            print(f"{name:>5} writers={writers}: {reads * 2:>9} reads/s, {writes * 2:>7} writes/s{retries}")
+
+
+def _positive(x: float) -> bool:
+    return x > 0
+
+
+def bench_numpy(args: argparse.Namespace) -> None:
+    """ndarray blocks against plain float blocks, for example on 10M floats::
+
+        python list_bench.py numpy --max-size 10000000 --capacity 4096
+    """
+    if np is None:
+        raise SystemExit("the numpy benchmark needs numpy installed")
+    n: int = args.max_size
+    floats: Any = np.random.default_rng(0).standard_normal(n)
+    values: List[float] = floats.tolist()
+    plain = from_list(values, args.capacity)
+    vector = from_ndarray(floats, args.capacity)
+    report("from_list", n, measure(lambda: from_list(values, args.capacity)))
+    report("from_ndarray", n, measure(lambda: from_ndarray(floats, args.capacity)))
+    report("to_list", n, measure(lambda: to_list(plain)))
+    report("to_ndarray", n, measure(lambda: to_ndarray(vector)))
+    report("url_map abs", n, measure(lambda: url_map(plain, abs)))
+    report("url_map np.abs", n, measure(lambda: url_map(vector, np.abs)))
+    report("url_filter", n, measure(lambda: url_filter(plain, _positive)))
+    report("url_filter mask", n, measure(lambda: url_filter(vector, _positive, vectorized=True)))
+    report("reduce add", n, measure(lambda: reduce(plain, operator.add, 0.0)))
+    report("reduce np.add", n, measure(lambda: reduce(vector, np.add, 0.0)))
+    report("member", n, measure(lambda: member(plain, 1e9)))
+    report("member ndarray", n, measure(lambda: member(vector, 1e9)))
+    report("find", n, measure(lambda: find(plain, lambda x: x > 1e9)))
+    report("find mask", n, measure(lambda: find(vector, lambda a: a > 1e9, vectorized=True)))
+
+
+def bench_serialize(args: argparse.Namespace) -> None:
+    """``dump``/``load`` of float lists against pickling ``to_list``."""
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, "list.ull")
+        pickled: str = os.path.join(directory, "list.pickle")
+        for n in sizes_up_to(args.max_size):
+            lst = from_list([i + 0.5 for i in range(n)], args.capacity, dtype="d")
+
+            def pickle_dump() -> None:
+                with open(pickled, "wb") as file:
+                    pickle.dump(to_list(lst), file)
+
+            def pickle_load() -> Any:
+                with open(pickled, "rb") as file:
+                    return from_list(pickle.load(file), args.capacity, dtype="d")
+            report("pickle dump", n, measure(pickle_dump))
+            report("pickle load", n, measure(pickle_load))
+            report("dump", n, measure(lambda: dump(lst, path)))
+            report("load mmap", n, measure(lambda: load(path)))
+            report("load copy", n, measure(lambda: load(path, mmap=False)))
+            report("load_stream", n, measure(lambda: sum(1 for _ in load_stream(path))))
+
+
+def bench_profile(args: argparse.Namespace) -> None:
+    """Operations with ``profile_ops`` off and on.
+
+    The ``off`` rows run the code every other benchmark runs; to check that
+    instrumentation costs nothing while disabled, ``compare`` a ``grid`` run
+    against one saved before the change.
+    """
+    for n in sizes_up_to(args.max_size):
+        lst = from_list(list(range(n)), args.capacity)
+        calls: Dict[str, Tuple[int, Callable[[], Any]]] = {
+            "size": (_GRID_CALLS, lambda: [size(lst) for _ in range(_GRID_CALLS)]),
+            "url_get": (_GRID_CALLS, lambda: [url_get(lst, i) for i in range(_GRID_CALLS)]),
+            "add": (_GRID_CALLS, lambda: [add(lst, i) for i in range(_GRID_CALLS)]),
+            "to_list": (0, lambda: to_list(lst)),
+            "url_map": (0, lambda: url_map(lst, _double)),
+        }
+        for name, (count, run) in calls.items():
+            report(f"{name} off", n, measure(run, args.repeat), count)
+            with profile_ops():
+                report(f"{name} on", n, measure(run, args.repeat), count)
+
+
+# The grid: every operation, for ``UnrolledLinkedList`` at each capacity
+# and for the closest ``list`` and ``tuple`` code, at every size.  Point
+# operations run ``_GRID_CALLS`` times per measurement; the rest run once.
+# The parallel functions have their own benchmark (worker start-up would
+# dominate here), and the NumPy ones are left out to stay stdlib-only.
+_GRID_CALLS: int = 100
+_GRID_CAPACITIES: Tuple[int, ...] = (1, 8, 64, 512)
+_Operation = Tuple[int, Callable[[], Any]]
+
+
+def _each(func: Callable[[Any], Any], inputs: List[Any]) -> Callable[[], None]:
+    """Call ``func`` on every input, dropping the results."""
+    def run() -> None:
+        for item in inputs:
+            func(item)
+    return run
+
+
+def _double(x: int) -> int:
+    return x * 2
+
+
+def _odd(x: int) -> bool:
+    return x % 2 == 1
+
+
+def _unrolled_operations(values: List[int], capacity: Any) -> Dict[str, _Operation]:
+    n: int = len(values)
+    lst = from_list(values, capacity)
+    copy = from_list(values, capacity)
+    positions: List[int] = [(i * 7919) % n for i in range(_GRID_CALLS)]
+
+    def build() -> Any:
+        return UnrolledLinkedList.builder(capacity).extend(values).freeze()
+    return {
+        "from_list": (1, lambda: from_list(values, capacity)),
+        "builder": (1, build),
+        "to_list": (1, lambda: to_list(lst)),
+        "iterator": (1, lambda: sum(1 for _ in iterator(lst))),
+        "size": (_GRID_CALLS, _each(lambda _: size(lst), positions)),
+        "add": (_GRID_CALLS, _each(lambda i: add(lst, i), positions)),
+        "add_to_end": (_GRID_CALLS, _each(lambda i: add_to_end(lst, i), positions)),
+        "url_get": (_GRID_CALLS, _each(lambda i: url_get(lst, i), positions)),
+        "url_set": (_GRID_CALLS, _each(lambda i: url_set(lst, i, -1), positions)),
+        "split_at": (_GRID_CALLS, _each(lambda i: split_at(lst, i), positions)),
+        "m_concat": (_GRID_CALLS, _each(lambda _: m_concat(lst, copy), positions)),
+        "find": (1, lambda: find(lst, lambda x: x < 0)),
+        "member": (1, lambda: member(lst, -1)),
+        "reduce": (1, lambda: reduce(lst, operator.add, 0)),
+        "remove": (1, lambda: remove(lst, 0)),
+        "reverse": (1, lambda: reverse(lst)),
+        "url_map": (1, lambda: url_map(lst, _double)),
+        "url_filter": (1, lambda: url_filter(lst, _odd)),
+        "query": (1, lambda: lst.query().map(_double).filter(_odd).reduce(operator.add, 0)),
+        "compact": (1, lambda: compact(lst)),
+        "stats": (1, lambda: stats(lst)),
+        "__eq__": (1, lambda: lst == copy),
+    }
+
+
+def _list_operations(values: List[int]) -> Dict[str, _Operation]:
+    """``list`` baselines, mutating in place where a list would."""
+    n: int = len(values)
+    lst: List[int] = list(values)
+    copy: List[int] = list(values)
+    positions: List[int] = [(i * 7919) % n for i in range(_GRID_CALLS)]
+
+    def assign(i: int) -> None:
+        lst[i] = lst[i]
+    return {
+        "from_list": (1, lambda: list(values)),
+        "to_list": (1, lambda: list(lst)),
+        "iterator": (1, lambda: sum(1 for _ in iter(lst))),
+        "size": (_GRID_CALLS, _each(lambda _: len(lst), positions)),
+        "add": (_GRID_CALLS, _each(copy.append, positions)),
+        "url_get": (_GRID_CALLS, _each(lst.__getitem__, positions)),
+        "url_set": (_GRID_CALLS, _each(assign, positions)),
+        "split_at": (_GRID_CALLS, _each(lambda i: (lst[:i], lst[i:]), positions)),
+        "m_concat": (_GRID_CALLS, _each(lambda _: lst + lst, positions)),
+        "find": (1, lambda: next((x for x in lst if x < 0), None)),
+        "member": (1, lambda: -1 in lst),
+        "reduce": (1, lambda: functools.reduce(operator.add, lst, 0)),
+        "remove": (1, lambda: [x for x in lst if x != 0]),
+        "reverse": (1, lambda: lst[::-1]),
+        "url_map": (1, lambda: list(map(_double, lst))),
+        "url_filter": (1, lambda: list(filter(_odd, lst))),
+        "__eq__": (1, lambda: lst == values),
+    }
+
+
+def _tuple_operations(values: List[int]) -> Dict[str, _Operation]:
+    """``tuple`` baselines: persistent like the unrolled list, so updates copy."""
+    n: int = len(values)
+    tup: Tuple[int, ...] = tuple(values)
+    copy: Tuple[int, ...] = tuple(values)
+    positions: List[int] = [(i * 7919) % n for i in range(_GRID_CALLS)]
+    return {
+        "from_list": (1, lambda: tuple(values)),
+        "to_list": (1, lambda: list(tup)),
+        "iterator": (1, lambda: sum(1 for _ in iter(tup))),
+        "size": (_GRID_CALLS, _each(lambda _: len(tup), positions)),
+        "add": (_GRID_CALLS, _each(lambda i: tup + (i,), positions)),
+        "url_get": (_GRID_CALLS, _each(tup.__getitem__, positions)),
+        "url_set": (_GRID_CALLS, _each(lambda i: tup[:i] + (-1,) + tup[i + 1:], positions)),
+        "split_at": (_GRID_CALLS, _each(lambda i: (tup[:i], tup[i:]), positions)),
+        "m_concat": (_GRID_CALLS, _each(lambda _: tup + copy, positions)),
+        "find": (1, lambda: next((x for x in tup if x < 0), None)),
+        "member": (1, lambda: -1 in tup),
+        "reduce": (1, lambda: functools.reduce(operator.add, tup, 0)),
+        "remove": (1, lambda: tuple(x for x in tup if x != 0)),
+        "reverse": (1, lambda: tup[::-1]),
+        "url_map": (1, lambda: tuple(map(_double, tup))),
+        "url_filter": (1, lambda: tuple(filter(_odd, tup))),
+        "__eq__": (1, lambda: tup == copy),
+    }
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Peak bytes allocated while ``func`` runs, measured with ``tracemalloc``."""
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        func()
+        peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - before
+
+
+def bench_grid(args: argparse.Namespace) -> None:
+    """Time and peak memory of every operation over sizes and capacities."""
+    rows: List[Dict[str, Any]] = []
+    for n in sizes_up_to(args.max_size, start=100):
+        values: List[int] = list(range(n))
+        cases: List[Tuple[str, Any, Dict[str, _Operation]]] = [
+            ("list", None, _list_operations(values)),
+            ("tuple", None, _tuple_operations(values)),
+        ]
+        cases += [("unrolled", c, _unrolled_operations(values, c)) for c in _GRID_CAPACITIES + ("auto",)]
+        for implementation, capacity, operations in cases:
+            for operation, (calls, func) in operations.items():
+                seconds: float = measure(func, args.repeat) / calls
+                peak: int = peak_memory(func)
+                name: str = implementation if capacity is None else f"{implementation} c={capacity}"
+                report(f"{operation} {name}", n, seconds * calls, calls if calls > 1 else 0)
+                rows.append({
+                    "implementation": implementation, "capacity": capacity, "operation": operation,
+                    "size": n, "calls": calls, "seconds": seconds, "peak_bytes": peak,
+                })
+    if args.output:
+        meta: Dict[str, Any] = {
+            "python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": args.repeat,
+        }
+        with open(args.output, "w") as file:
+            json.dump({"meta": meta, "results": rows}, file, indent=1)
+
+
+def _keyed(path: str) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+    with open(path) as file:
+        rows: List[Dict[str, Any]] = json.load(file)["results"]
+    return {(row["implementation"], row["capacity"], row["operation"], row["size"]): row for row in rows}
+
+
+def compare(baseline: str, current: str, threshold: float, min_time: float = 0.0) -> List[str]:
+    """Rows of ``current`` slower or larger than ``baseline`` by more than ``threshold``.
+
+    Timings whose baseline measurement took less than ``min_time`` seconds
+    are too noisy to judge and are skipped.
+    """
+    before: Dict[Tuple[Any, ...], Dict[str, Any]] = _keyed(baseline)
+    after: Dict[Tuple[Any, ...], Dict[str, Any]] = _keyed(current)
+    regressions: List[str] = []
+    for key in sorted(before.keys() & after.keys(), key=str):
+        implementation, capacity, operation, n = key
+        for metric in ("seconds", "peak_bytes"):
+            old: float = before[key][metric]
+            new: float = after[key][metric]
+            if metric == "seconds" and old * before[key]["calls"] < min_time:
+                continue
+            if old > 0 and new > old * (1 + threshold):
+                name: str = implementation if capacity is None else f"{implementation} c={capacity}"
+                regressions.append(f"{operation} {name} n={n}: {metric} {old:.4g} -> {new:.4g} "
+                                   f"(+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def check_auto(path: str, threshold: float, min_time: float = 0.0) -> List[str]:
+    """Rows of a grid where ``capacity="auto"`` is slower than the best fixed capacity by over ``threshold``.
+
+    Timings where the best fixed capacity took less than ``min_time``
+    seconds are skipped, as in ``compare``.
+    """
+    rows: Dict[Tuple[Any, ...], Dict[str, Any]] = _keyed(path)
+    misses: List[str] = []
+    for (implementation, capacity, operation, n), row in sorted(rows.items(), key=str):
+        if implementation != "unrolled" or capacity != "auto":
+            continue
+        fixed: List[Dict[str, Any]] = [
+            rows[key] for key in rows
+            if key[0] == "unrolled" and key[1] != "auto" and key[2:] == (operation, n)]
+        best: Dict[str, Any] = min(fixed, key=lambda r: r["seconds"])
+        if best["seconds"] * best["calls"] < min_time:
+            continue
+        if row["seconds"] > best["seconds"] * (1 + threshold):
+            misses.append(f"{operation} n={n}: auto {row['seconds']:.4g} s, c={best['capacity']} "
+                          f"{best['seconds']:.4g} s (+{(row['seconds'] / best['seconds'] - 1) * 100:.0f}%)")
+    return misses
+
+
+def bench_auto(args: argparse.Namespace) -> None:
+    """Check a ``grid --output`` file; exits with status 1 if auto misses the best capacity."""
+    if len(args.files) != 1:
+        raise SystemExit("auto needs one grid results file")
+    misses: List[str] = check_auto(args.files[0], args.threshold, args.min_time)
+    for line in misses:
+        print(line)
+    print(f"{len(misses)} operations beyond {args.threshold:.0%} of the best fixed capacity")
+    if misses:
+        raise SystemExit(1)
+
+
+def bench_compare(args: argparse.Namespace) -> None:
+    """Compare two ``grid --output`` files; exits with status 1 on regressions."""
+    if len(args.files) != 2:
+        raise SystemExit("compare needs a baseline and a current result file")
+    regressions: List[str] = compare(args.files[0], args.files[1], args.threshold, args.min_time)
+    for line in regressions:
+        print(line)
+    print(f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+    if regressions:
+        raise SystemExit(1)
+
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "traversal": bench_traversal,
+    "append": bench_append,
+    "deque": bench_deque,
+    "index": bench_index,
+    "equality": bench_equality,
+    "membership": bench_membership,
+    "sorted": bench_sorted,
+    "slice": bench_slice,
+    "batch": bench_batch,
+    "diff": bench_diff,
+    "concat": bench_concat,
+    "fill": bench_fill,
+    "memory": bench_memory,
+    "iteration": bench_iteration,
+    "build": bench_build,
+    "streaming": bench_streaming,
+    "query": bench_query,
+    "summary": bench_summary,
+    "parallel": bench_parallel,
+    "atom": bench_atom,
+    "numpy": bench_numpy,
+    "serialize": bench_serialize,
+    "profile": bench_profile,
+    "grid": bench_grid,
+    "compare": bench_compare,
+    "auto": bench_auto,
+}
+
+
+def main(argv: Any = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("files", nargs="*", help="baseline and current results, for compare")
+    parser.add_argument("--max-size", type=int, default=100000)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs, for grid")
+    parser.add_argument("--output", help="JSON file for the grid results")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown or growth flagged by compare")
+    parser.add_argument("--min-time", type=float, default=0.001,
+                        help="compare skips timings whose baseline took less (seconds)")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
+import asyncio
+import collections
+import copy
+import operator
+import os
+import pickle
+import sys
+import tempfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from array import array
 from hypothesis import given
 from typing import List, Optional
 import hypothesis.strategies as st
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
 from list import (
     cons,
     UnrolledNode,
@@ -20,8 +35,45 @@ from list import (
     m_concat,
     url_filter,
     url_map,
+    url_get,
     url_set,
     url_empty,
+    parallel_map,
+    parallel_filter,
+    parallel_reduce,
+    from_ndarray,
+    to_ndarray,
+    split_at,
+    compact,
+    stats,
+    Stats,
+    dump,
+    dump_stream,
+    load,
+    load_stream,
+    profile_ops,
+    indexed,
+    SortedUnrolledLinkedList,
+    batch_update,
+    auto_capacity,
+    retune,
+    from_iterable,
+    from_async_iterable,
+    Atom,
+    Contention,
+    Monoid,
+    MONOIDS,
+    register_monoid,
+    summarize,
+    Hunk,
+    diff,
+    patch,
+    push_front,
+    pop_front,
+    pop_back,
+    first,
+    last,
+    rest,
 )
 
 
@@ -73,6 +125,26 @@ class Test(unittest.TestCase):
         self.assertTrue(member(lst, 3))
         self.assertFalse(member(lst, 5))
 
+    @given(values=st.lists(st.one_of(st.none(), st.integers(-3, 40), st.sampled_from(["", "a", 0.0]))),
+           capacity=st.integers(min_value=1, max_value=40),
+           probes=st.lists(st.one_of(st.none(), st.integers(-5, 45), st.sampled_from(["", "a", "b"]))))
+    def test_member_summaries(self, values: List, capacity: int, probes: List) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        index: UnrolledLinkedList = indexed(lst)
+        for value in probes + values:
+            expected: bool = value in list(lst)
+            self.assertEqual(member(lst, value), expected)
+            self.assertEqual(member(lst, value, summaries=True), expected)
+            self.assertEqual(member(index, value), expected)
+        self.assertEqual(indexed(lst), lst)
+        self.assertIsNone(add(index, 1)._index)
+        unhashable: UnrolledLinkedList = from_list([[1], 2, [3]] * 10, 20)
+        self.assertTrue(member(unhashable, [3], summaries=True))
+        self.assertTrue(member(unhashable, 2, summaries=True))
+        self.assertFalse(member(unhashable, [4], summaries=True))
+        with self.assertRaises(TypeError):
+            indexed(unhashable)
+
     @given(values=st.lists(st.integers()), capacity=st.integers(min_value=1))
     def test_url_set(self, values: List[int], capacity: int) -> None:
         lst1: UnrolledLinkedList = UnrolledLinkedList(capacity)
@@ -256,3 +328,924 @@ class Test(unittest.TestCase):
         self.assertEqual(to_list(url_filter(l1, lambda x: x is None)), [None])
 
         self.assertEqual(to_list(url_map(l1, lambda x: None)), [None, None])
+
+    def test_long_chain(self) -> None:
+        n: int = sys.getrecursionlimit() * 5
+        values: List[int] = list(range(n))
+        lst: UnrolledLinkedList = from_list(values, 1)
+        self.assertEqual(size(lst), n)
+        self.assertEqual(to_list(lst), values)
+        self.assertEqual(lst, from_list(values, 1))
+        self.assertEqual(to_list(add(lst, n)), values + [n])
+        self.assertEqual(to_list(add_to_end(lst, n)), values + [n])
+        self.assertEqual(to_list(url_set(lst, n - 1, -1)), values[:-1] + [-1])
+        self.assertEqual(to_list(remove(lst, 0)), values[1:])
+        self.assertEqual(to_list(reverse(lst)), values[::-1])
+        self.assertEqual(to_list(m_concat(lst, lst)), values + values)
+        self.assertEqual(to_list(url_filter(lst, lambda x: x % 2 == 0)), values[::2])
+        self.assertEqual(to_list(url_map(lst, lambda x: -x)), [-x for x in values])
+
+    def test_regressions_with_None(self) -> None:
+        self.assertEqual(to_list(from_list([None, 1, 2], 2)), [None, 1, 2])
+        self.assertEqual(to_list(add_to_end(from_list([1], 1), 2)), [1, 2])
+        self.assertEqual(to_list(url_map(from_list([None], 1), lambda x: 0)), [0])
+        self.assertEqual(to_list(url_set(from_list([None], 1), 0, 5)), [5])
+
+    @given(values=st.lists(st.integers()), capacity=st.integers(min_value=1, max_value=8))
+    def test_add_is_persistent(self, values: List[int], capacity: int) -> None:
+        for append in (add, add_to_end):
+            versions: List[UnrolledLinkedList] = [UnrolledLinkedList(capacity)]
+            for value in values:
+                versions.append(append(versions[-1], value))
+            for i, version in enumerate(versions):
+                self.assertEqual(to_list(version), values[:i])
+            self.assertEqual(versions[-1], from_list(values, capacity))
+
+    @given(values=st.lists(st.integers()), capacity=st.integers(min_value=1))
+    def test_head_chain(self, values: List[int], capacity: int) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        head: Optional[UnrolledNode] = lst.head
+        rebuilt: UnrolledLinkedList = UnrolledLinkedList(capacity, head)
+        self.assertIs(rebuilt.head, head)
+        self.assertEqual(rebuilt, lst)
+        self.assertEqual(to_list(add(rebuilt, 0)), values + [0])
+
+    @given(values=st.lists(st.integers()), capacity=st.integers(min_value=1, max_value=16),
+           data=st.data())
+    def test_url_get_set(self, values: List[int], capacity: int, data) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        for i, value in enumerate(values):
+            self.assertEqual(url_get(lst, i), value)
+        for outside in (-1, len(values)):
+            with self.assertRaises(IndexError):
+                url_get(lst, outside)
+        if values:
+            index: int = data.draw(st.integers(min_value=0, max_value=len(values) - 1))
+            updated: UnrolledLinkedList = url_set(lst, index, -1)
+            self.assertEqual(to_list(updated), values[:index] + [-1] + values[index + 1:])
+            self.assertEqual(url_get(updated, index), -1)
+            self.assertEqual(to_list(lst), values)
+            self.assertEqual(size(updated), len(values))
+
+    @given(values=st.lists(st.integers(min_value=-2 ** 63, max_value=2 ** 63 - 1)),
+           capacity=st.integers(min_value=1, max_value=16))
+    def test_typed_blocks(self, values: List[int], capacity: int) -> None:
+        plain: UnrolledLinkedList = from_list(values, capacity)
+        typed: UnrolledLinkedList = from_list(values, capacity, dtype="auto")
+        self.assertEqual(typed, plain)
+        self.assertEqual(to_list(typed), values)
+        self.assertEqual(to_list(add(typed, 1)), values + [1])
+        self.assertEqual(to_list(add(typed, None)), values + [None])
+        self.assertEqual(to_list(reverse(typed)), values[::-1])
+        self.assertEqual(to_list(url_filter(typed, lambda x: x > 0)), [x for x in values if x > 0])
+        self.assertEqual(to_list(url_map(typed, float)), [float(x) for x in values])
+        self.assertEqual(to_list(url_map(typed, str)), [str(x) for x in values])
+        if values:
+            self.assertEqual(to_list(url_set(typed, 0, 0.5)), [0.5] + values[1:])
+            self.assertEqual(to_list(remove(typed, values[0])), [x for x in values if x != values[0]])
+
+    def test_dtype(self) -> None:
+        head: Optional[UnrolledNode] = from_list([1, 2], 2, dtype="auto").head
+        assert head is not None
+        self.assertIsInstance(head.values, array)
+        self.assertEqual(from_list([1.5, 2.0], 2, dtype="auto").dtype, "d")
+        self.assertIsNone(from_list([1, 2.0], 2, dtype="auto").dtype)
+        self.assertEqual(to_list(from_list([1, 2.0], 2, dtype="d")), [1, 2.0])
+        self.assertEqual(to_list(add(UnrolledLinkedList(4, dtype="q"), 2 ** 64)), [2 ** 64])
+        self.assertFalse(hasattr(cons([1], None, 1), "__dict__"))
+        with self.assertRaises(ValueError):
+            UnrolledLinkedList(4, dtype="x")
+        # Single precision would round 0.1; only exact storage is allowed.
+        with self.assertRaises(ValueError):
+            from_list([0.1], 2, dtype="f")
+        self.assertEqual(from_list([0.1], 2, dtype="d"), from_list([0.1], 2))
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=16))
+    def test_iteration_protocol(self, values: List[Optional[int]], capacity: int) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        self.assertEqual(list(lst), values)
+        self.assertEqual(list(reversed(lst)), values[::-1])
+        self.assertEqual(len(lst), len(values))
+        self.assertEqual([x for chunk in lst.iter_chunks() for x in chunk], values)
+        self.assertTrue(all(len(chunk) <= capacity for chunk in lst.iter_chunks()))
+        self.assertEqual(list(iterator(lst)), values)
+
+    def test_iter_chunks_does_not_copy(self) -> None:
+        lst: UnrolledLinkedList = from_list(list(range(10)), 4, dtype="q")
+        head: Optional[UnrolledNode] = lst.head
+        assert head is not None
+        self.assertIs(next(lst.iter_chunks()), head.values)
+        self.assertEqual(list(iterator(UnrolledLinkedList(1, cons([1], cons(None, None, 1), 1)))), [1, None])
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=16))
+    def test_builder(self, values: List[Optional[int]], capacity: int) -> None:
+        builder = UnrolledLinkedList.builder(capacity)
+        half: int = len(values) // 2
+        for value in values[:half]:
+            builder.append(value)
+        builder.extend(iter(values[half:]))
+        lst: UnrolledLinkedList = builder.freeze()
+        self.assertEqual(lst, from_list(values, capacity))
+        self.assertEqual(to_list(add(lst, 0)), values + [0])
+        with self.assertRaises(RuntimeError):
+            builder.append(1)
+        with self.assertRaises(RuntimeError):
+            builder.freeze()
+
+    def test_builder_owner_thread(self) -> None:
+        builder = UnrolledLinkedList.builder(4, dtype="q")
+        errors: List[Exception] = []
+
+        def _use() -> None:
+            try:
+                builder.append(1)
+            except RuntimeError as error:
+                errors.append(error)
+        thread = threading.Thread(target=_use)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(to_list(builder.extend(range(6)).freeze()), list(range(6)))
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=16),
+           count=st.integers(min_value=0, max_value=40))
+    def test_query(self, values: List[Optional[int]], capacity: int, count: int) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+
+        def double(x):
+            return None if x is None else x * 2
+
+        def even(x):
+            return x is None or x % 4 == 0
+        eager: UnrolledLinkedList = url_filter(url_map(lst, double), even)
+        query = lst.query().map(double).filter(even)
+        self.assertEqual(list(query), to_list(eager))
+        self.assertEqual(to_list(query.collect()), to_list(eager))
+        self.assertEqual(query.reduce(lambda x, y: x + (y or 0), 0),
+                         reduce(eager, lambda x, y: x + (y or 0), 0))
+        self.assertEqual(list(query.take(count)), to_list(eager)[:count])
+        self.assertEqual(to_list(query.take(count).collect(capacity=3)), to_list(eager)[:count])
+        self.assertEqual(list(lst.query()), values)
+        policed: UnrolledLinkedList = from_list(values, capacity, min_fill=0.5).query().map(double).collect()
+        self.assertEqual(policed.min_fill, 0.5)
+        self.assertEqual(to_list(policed), to_list(url_map(lst, double)))
+
+    def test_query_is_lazy(self) -> None:
+        calls: List[int] = []
+
+        def record(x: int) -> int:
+            calls.append(x)
+            return x
+        query = from_list(list(range(1000)), 8).query().map(record)
+        self.assertEqual(calls, [])
+        self.assertEqual(list(query.take(3)), [0, 1, 2])
+        self.assertEqual(calls, list(range(8)))
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=8),
+           chunk_nodes=st.integers(min_value=1, max_value=4))
+    def test_parallel_threads(self, values: List[Optional[int]], capacity: int, chunk_nodes: int) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+
+        def negate(x):
+            return None if x is None else -x
+
+        def positive(x):
+            return x is not None and x > 0
+
+        def plus(x, y):
+            return x + (y or 0)
+        self.assertEqual(parallel_map(lst, negate, 4, chunk_nodes, "thread"), url_map(lst, negate))
+        with ThreadPoolExecutor(4) as pool:
+            self.assertEqual(parallel_filter(lst, positive, chunk_nodes=chunk_nodes, executor=pool),
+                             url_filter(lst, positive))
+            self.assertEqual(parallel_reduce(lst, plus, 0, chunk_nodes=chunk_nodes, executor=pool),
+                             reduce(lst, plus, 0))
+
+    def test_parallel_processes(self) -> None:
+        values: List[int] = list(range(-50, 50))
+        lst: UnrolledLinkedList = from_list(values, 4, dtype="q")
+        self.assertEqual(to_list(parallel_map(lst, abs, workers=2, chunk_nodes=5)), list(map(abs, values)))
+        self.assertEqual(to_list(parallel_filter(lst, bool, workers=2, chunk_nodes=5)),
+                         [x for x in values if x])
+        self.assertEqual(parallel_reduce(lst, operator.add, 0, workers=2, chunk_nodes=5), sum(values))
+        self.assertEqual(parallel_reduce(lst, max, -100, workers=2, chunk_nodes=5), 49)
+        with self.assertRaises(ValueError):
+            parallel_map(lst, abs, executor="gpu")
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=8))
+    def test_hash(self, values: List[Optional[int]], capacity: int) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        built: UnrolledLinkedList = UnrolledLinkedList.builder(capacity).extend(values).freeze()
+        self.assertEqual(built, lst)
+        self.assertEqual(hash(built), hash(lst))
+        self.assertEqual(hash(from_list(values, capacity, dtype="auto")), hash(lst))
+        self.assertEqual({lst: 1}[built], 1)
+        self.assertEqual(hash(UnrolledLinkedList(capacity, lst.head)), hash(lst))
+        head: Optional[UnrolledNode] = from_list(values, capacity).head
+        self.assertEqual(hash(head), hash(lst.head))
+        if values:
+            changed: UnrolledLinkedList = url_set(lst, 0, "x")
+            self.assertNotEqual(changed, lst)
+            self.assertEqual(url_set(changed, 0, values[0]), lst)
+
+    def test_equality_skips_shared_blocks(self) -> None:
+        compared: List[int] = []
+
+        class Counted:
+            def __eq__(self, other) -> bool:
+                compared.append(1)
+                return self is other
+
+            __hash__ = object.__hash__
+        lst: UnrolledLinkedList = from_list([Counted() for _ in range(10000)], 4)
+        changed: UnrolledLinkedList = url_set(lst, 0, "x")
+        self.assertNotEqual(changed, lst)
+        self.assertEqual(url_set(lst, 5000, lst), url_set(lst, 5000, lst))
+        self.assertEqual(add(lst, 1), add(lst, 1))
+        self.assertLess(len(compared), 100)
+        hash(lst)
+        self.assertNotEqual(hash(changed), hash(lst))
+        with self.assertRaises(TypeError):
+            hash(from_list([[1]]))
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=8),
+           data=st.data())
+    def test_split_at(self, values: List[Optional[int]], capacity: int, data) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        flat: List[Optional[int]] = to_list(lst)
+        index: int = data.draw(st.integers(min_value=0, max_value=len(flat)))
+        left, right = split_at(lst, index)
+        self.assertEqual(to_list(left), flat[:index])
+        self.assertEqual(to_list(right), flat[index:])
+        self.assertEqual(size(left) + size(right), size(lst))
+        self.assertEqual(to_list(add(left, 0)), flat[:index] + [0])
+        self.assertEqual(to_list(m_concat(left, right)), flat)
+        self.assertEqual(to_list(lst), flat)
+        for outside in (-1, len(flat) + 1):
+            with self.assertRaises(IndexError):
+                split_at(lst, outside)
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=8),
+           bounds=st.tuples(st.none() | st.integers(-30, 30), st.none() | st.integers(-30, 30),
+                            st.none() | st.sampled_from([1, 1, 2, -1, -3])))
+    def test_getitem(self, values: List[Optional[int]], capacity: int, bounds) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        flat: List[Optional[int]] = to_list(lst)
+        part: UnrolledLinkedList = lst[slice(*bounds)]
+        self.assertEqual(to_list(part), flat[slice(*bounds)])
+        self.assertEqual(len(part), len(flat[slice(*bounds)]))
+        self.assertEqual(part.node_capacity, lst.node_capacity)
+        for index in range(-len(flat), len(flat)):
+            self.assertEqual(lst[index], flat[index])
+        with self.assertRaises(IndexError):
+            lst[len(flat)]
+
+    def test_slice_view(self) -> None:
+        lst: UnrolledLinkedList = from_list(list(range(1000)), 10, dtype="q")
+        part: UnrolledLinkedList = lst[95:512]
+        blocks: List = list(part.iter_chunks())
+        shared = {id(block) for block in lst.iter_chunks()}
+        self.assertEqual([len(block) for block in blocks], [5] + [10] * 41 + [2])
+        self.assertTrue(all(id(block) in shared for block in blocks[1:-1]))
+        self.assertEqual(list(part), list(range(95, 512)))
+        self.assertEqual(to_list(part[400:][:3]), [495, 496, 497])
+        sorted_part = SortedUnrolledLinkedList(range(50), 4)[10:20]
+        self.assertIsInstance(sorted_part, SortedUnrolledLinkedList)
+        self.assertEqual(sorted_part.rank(15), 5)
+        if np is not None:
+            vector: UnrolledLinkedList = from_ndarray(np.arange(100), 16)
+            self.assertTrue(all(block.base is not None for block in vector[3:90].iter_chunks()))
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers(0, 9)), max_size=30),
+           capacity=st.integers(min_value=1, max_value=6),
+           min_fill=st.sampled_from([0.0, 0.5]),
+           data=st.data())
+    def test_batch_update(self, values: List[Optional[int]], capacity: int, min_fill: float, data) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity, min_fill=min_fill)
+        flat: List[Optional[int]] = to_list(lst)
+        edit = st.one_of(
+            st.tuples(st.just("insert"), st.integers(0, len(flat)), st.integers(10, 19)),
+            *([st.tuples(st.sampled_from(["set", "remove"]), st.integers(0, len(flat) - 1),
+                         st.none() | st.integers(20, 29))] if flat else []))
+        edits = data.draw(st.lists(edit, max_size=12))
+        expected: List[Optional[int]] = list(flat)
+        removed: set = set()
+        for op, index, payload in sorted(edits, key=lambda e: (e[0] == "insert", -e[1])):
+            if op == "set" and index not in removed:
+                expected[index] = payload
+            elif op == "remove" and index not in removed:
+                del expected[index]
+                removed.add(index)
+        for index, group in sorted(((i, [e[2] for e in edits if e[:2] == ("insert", i)])
+                                    for i in {e[1] for e in edits if e[0] == "insert"}), reverse=True):
+            shift: int = sum(1 for r in removed if r < index)
+            expected[index - shift:index - shift] = group
+        updated: UnrolledLinkedList = batch_update(lst, edits)
+        self.assertEqual(to_list(updated), expected)
+        self.assertEqual(to_list(lst), flat)
+        self.assertTrue(all(len(block) <= capacity for block in updated.iter_chunks()))
+
+    def test_batch_update_sharing(self) -> None:
+        lst: UnrolledLinkedList = from_list(list(range(1000)), 10, dtype="q")
+        updated: UnrolledLinkedList = batch_update(
+            lst, [("set", 5, -5), ("insert", 505, -1), ("remove", 999, None)])
+        sequential: UnrolledLinkedList = url_set(lst, 5, -5)
+        self.assertEqual(to_list(updated), to_list(sequential)[:505] + [-1] + list(range(505, 999)))
+        shared = {id(block) for block in lst.iter_chunks()}
+        self.assertEqual(sum(id(block) not in shared for block in updated.iter_chunks()), 4)
+        self.assertIs(batch_update(lst, []), lst)
+        self.assertEqual(to_list(batch_update(url_empty(), [("insert", 0, 1), ("insert", 0, 2)])), [1, 2])
+        with self.assertRaises(IndexError):
+            batch_update(lst, [("set", 1000, 0)])
+        with self.assertRaises(ValueError):
+            batch_update(lst, [("append", 0, 0)])
+
+    def test_auto_capacity(self) -> None:
+        self.assertEqual(auto_capacity(), 512)
+        self.assertEqual(auto_capacity(100), 128)
+        self.assertEqual(auto_capacity(3), 16)
+        self.assertEqual(from_list(list(range(10000)), "auto").node_capacity, 512)
+        self.assertEqual(url_empty("auto").node_capacity, 512)
+        self.assertEqual(UnrolledLinkedList("auto", cons([1, 2], None, 2)).node_capacity, 16)
+        self.assertEqual(UnrolledLinkedList.builder("auto").extend(range(600)).freeze().node_capacity, 512)
+        with profile_ops() as profile:
+            grown: UnrolledLinkedList = url_empty("auto")
+            for i in range(10):
+                grown = add_to_end(grown, i)
+            self.assertEqual(auto_capacity(profile=profile), 64)
+            self.assertEqual(from_list([1], "auto").node_capacity, 16)
+            self.assertEqual(from_list(list(range(1000)), "auto").node_capacity, 64)
+        if np is not None:
+            self.assertEqual(auto_capacity(dtype=np.float64), 4096)
+            self.assertEqual(from_ndarray(np.arange(10000), "auto").node_capacity, 4096)
+        with self.assertRaises(ValueError):
+            from_list([1], "big")
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers())),
+           capacity=st.integers(min_value=1, max_value=8),
+           new_capacity=st.integers(min_value=1, max_value=8) | st.just("auto"))
+    def test_retune(self, values: List[Optional[int]], capacity: int, new_capacity) -> None:
+        lst: UnrolledLinkedList = url_filter(from_list(values, capacity, min_fill=0.5), lambda x: x != 0)
+        tuned: UnrolledLinkedList = retune(lst, new_capacity)
+        self.assertEqual(list(tuned), list(lst))
+        self.assertEqual(tuned.min_fill, 0.5)
+        size: int = tuned.node_capacity
+        self.assertEqual(size, auto_capacity(len(lst)) if new_capacity == "auto" else new_capacity)
+        blocks: List = list(tuned.iter_chunks())
+        self.assertTrue(all(len(block) == size for block in blocks[:-1]))
+        self.assertIs(retune(tuned, size), tuned)
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers(), st.floats(allow_nan=False))),
+           capacity=st.integers(min_value=1, max_value=8) | st.just("auto"),
+           dtype=st.sampled_from([None, "auto"]),
+           max_items=st.none() | st.integers(min_value=0, max_value=20))
+    def test_from_iterable(self, values: List, capacity, dtype: Optional[str],
+                           max_items: Optional[int]) -> None:
+        kept: List = values if max_items is None else values[:max_items]
+        if capacity == "auto":
+            capacity = auto_capacity(max_items or 0)
+        expected: UnrolledLinkedList = from_list(kept, capacity, dtype)
+
+        async def produce():
+            for value in values:
+                yield value
+
+        for built in (from_iterable(iter(values), capacity, dtype, max_items=max_items),
+                      asyncio.run(from_async_iterable(produce(), capacity, dtype, max_items=max_items))):
+            self.assertEqual(built, expected)
+            self.assertEqual(to_list(built), to_list(expected))
+            self.assertEqual(built.dtype, expected.dtype)
+            self.assertEqual(built.node_capacity, expected.node_capacity if kept else 1)
+
+        async def blocks() -> List:
+            return [block async for block in expected.aiter_chunks()]
+        self.assertEqual(asyncio.run(blocks()), list(expected.iter_chunks()))
+        self.assertEqual(from_iterable(iter(values), "auto", max_items=max_items).node_capacity,
+                         auto_capacity(max_items or 0))
+        with self.assertRaises(ValueError):
+            from_iterable(values, max_items=-1)
+
+    @given(values=st.lists(st.integers(min_value=-50, max_value=50)),
+           capacity=st.integers(min_value=1, max_value=6),
+           start=st.none() | st.integers(min_value=-60, max_value=60),
+           stop=st.none() | st.integers(min_value=-60, max_value=60))
+    def test_summarize(self, values: List[int], capacity: int,
+                       start: Optional[int], stop: Optional[int]) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        part: List[int] = values[start:stop]
+        self.assertEqual(summarize(lst, "sum", start, stop), sum(part))
+        self.assertEqual(summarize(lst, "count", start, stop), len(part))
+        self.assertEqual(summarize(lst, "min", start, stop), min(part, default=None))
+        self.assertEqual(summarize(lst, MONOIDS["max"], start, stop), max(part, default=None))
+        self.assertEqual(reduce(lst, MONOIDS["sum"], 7), 7 + sum(values))
+        if values:
+            changed: UnrolledLinkedList = url_set(lst, len(values) // 2, 1000)
+            self.assertEqual(summarize(changed, "sum"), sum(values) - values[len(values) // 2] + 1000)
+            self.assertEqual(summarize(lst, "sum"), sum(values))
+
+    def test_summarize_reuses_nodes(self) -> None:
+        words: Monoid = register_monoid("concat", operator.add, "", str)
+        self.assertIs(MONOIDS["concat"], words)
+        lst: UnrolledLinkedList = from_list(list(range(4096)), 16)
+        self.assertEqual(summarize(lst, "concat", 8, 12), "891011")
+        with profile_ops() as profile:
+            summarize(lst, "sum")
+            summarize(lst, "sum")
+        self.assertEqual(profile.as_dict()["summarize"]["nodes_visited"], 256)
+        changed: UnrolledLinkedList = add_to_end(url_set(lst, 1000, 0), 1)
+        with profile_ops() as profile:
+            self.assertEqual(reduce(changed, MONOIDS["sum"], 0), sum(range(4096)) - 1000 + 1)
+        self.assertEqual(profile.as_dict()["reduce"]["nodes_visited"], 2)
+        with self.assertRaises(KeyError):
+            summarize(lst, "median")
+        if np is not None:
+            vector: UnrolledLinkedList = from_ndarray(np.arange(100), 16)
+            self.assertIs(type(summarize(vector, "sum")), int)
+            self.assertIs(type(summarize(vector, "min", 3, 40)), int)
+        del MONOIDS["concat"]
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers(min_value=0, max_value=5)), max_size=40),
+           capacity=st.integers(min_value=1, max_value=6),
+           min_fill=st.sampled_from([0.0, 0.5, 1.0]),
+           cuts=st.lists(st.integers(min_value=0, max_value=40), max_size=6),
+           inserted=st.lists(st.lists(st.integers(min_value=6, max_value=9), max_size=4),
+                             min_size=3, max_size=3))
+    def test_diff_patch(self, values: List, capacity: int, min_fill: float, cuts: List[int],
+                        inserted: List[List[int]]) -> None:
+        old: UnrolledLinkedList = from_list(values, capacity, min_fill=min_fill)
+        flat: List = to_list(old)
+        bounds: List[int] = sorted(min(cut, len(flat)) for cut in cuts[:len(cuts) // 2 * 2])
+        hunks: List[Hunk] = [Hunk(bounds[i], bounds[i + 1], inserted[i // 2])
+                             for i in range(0, len(bounds), 2)]
+        expected: List = list(flat)
+        for start, stop, part, _ in reversed(hunks):
+            expected[start:stop] = part
+        new: UnrolledLinkedList = patch(old, hunks)
+        self.assertEqual(to_list(new), expected)
+        self.assertEqual(to_list(old), flat)
+        for other in (new, from_list(expected, capacity), add_to_end(old, 1), old):
+            script: List[Hunk] = diff(old, other)
+            self.assertEqual(patch(old, script), other)
+            self.assertTrue(all(h.stop <= k.start for h, k in zip(script, script[1:])))
+        self.assertEqual(diff(old, old), [])
+        self.assertEqual(patch(old, [Hunk(len(flat), len(flat), [1])]), add_to_end(old, 1))
+        with self.assertRaises(IndexError):
+            patch(old, [Hunk(1, 0, [])])
+
+    def test_diff_patch_layout(self) -> None:
+        old: UnrolledLinkedList = from_list(list(range(10)), 4)
+        new: UnrolledLinkedList = add_to_end(old, 99)
+        self.assertEqual(diff(old, new), [Hunk(10, 10, [99], ((3, 4),))])
+        self.assertEqual(patch(old, diff(old, new)), new)
+        for other in (push_front(old, -1), batch_update(old, [("insert", 0, -1)]),
+                      from_list(list(range(10)), 3), add(push_front(add_to_end(old, 99), -1), 7)):
+            script: List[Hunk] = diff(old, other)
+            self.assertEqual(patch(old, script), other)
+            self.assertEqual(patch(other, diff(other, old)), old)
+        with self.assertRaises(ValueError):
+            patch(old, [Hunk(0, 1, [5], ((3, 4),))])
+        with self.assertRaises(ValueError):
+            patch(old, [Hunk(0, 1, [5], ((4, 4),)), Hunk(2, 3, [5], ((4, 4),))])
+
+    def test_diff_shared_nodes(self) -> None:
+        old: UnrolledLinkedList = from_list(list(range(10000)), 16)
+        new: UnrolledLinkedList = url_set(url_set(old, 5000, -1), 9000, -2)
+        new = batch_update(new, [("insert", 20, -3), ("remove", 9999, None)])
+        with profile_ops() as profile:
+            script: List[Hunk] = diff(old, new)
+        self.assertEqual(script, [Hunk(20, 20, [-3], ((16, 16), (1, 16))),
+                                  Hunk(5000, 5001, [-1], ((16, 16),)),
+                                  Hunk(9000, 9001, [-2], ((16, 16),)),
+                                  Hunk(9999, 10000, [], ((15, 16),))])
+        self.assertLess(profile.as_dict()["diff"]["nodes_visited"], 20)
+        with profile_ops() as profile:
+            patched: UnrolledLinkedList = patch(old, script)
+        self.assertEqual(patched, new)
+        self.assertLess(profile.as_dict()["patch"]["nodes_created"], 12)
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers(min_value=0, max_value=9)), max_size=20),
+           capacity=st.integers(min_value=1, max_value=6),
+           dtype=st.sampled_from([None, "q"]),
+           min_fill=st.sampled_from([0.0, 0.5, 1.0]),
+           ops=st.lists(st.tuples(st.sampled_from(["push", "append", "pop", "popleft"]),
+                                  st.none() | st.integers(min_value=0, max_value=9)), max_size=40))
+    def test_deque_ops(self, values: List, capacity: int, dtype: Optional[str], min_fill: float,
+                       ops: List) -> None:
+        if dtype is not None:
+            values = [value for value in values if value is not None]
+        lst: UnrolledLinkedList = from_list(values, capacity, dtype, min_fill=min_fill)
+        model = collections.deque(to_list(lst))
+        versions: List = []
+        for op, value in ops:
+            versions.append((lst, list(model)))
+            if dtype is not None and value is None:
+                value = 0
+            if op == "push":
+                lst = push_front(lst, value)
+                model.appendleft(value)
+            elif op == "append":
+                lst = add_to_end(lst, value)
+                model.append(value)
+            elif not model:
+                with self.assertRaises(IndexError):
+                    pop_front(lst) if op == "popleft" else pop_back(lst)
+            elif op == "popleft":
+                element, lst = pop_front(lst)
+                self.assertEqual(element, model.popleft())
+            else:
+                lst, element = pop_back(lst)
+                self.assertEqual(element, model.pop())
+            self.assertEqual(to_list(lst), list(model))
+            self.assertEqual(len(lst), len(model))
+            if model:
+                self.assertEqual((first(lst), last(lst)), (model[0], model[-1]))
+                self.assertEqual(to_list(rest(lst)), list(model)[1:])
+        for version, expected in versions:
+            self.assertEqual(to_list(version), expected)
+        self.assertEqual(lst.dtype, dtype)
+
+    @given(values=st.lists(st.integers(min_value=0, max_value=9), max_size=30),
+           capacity=st.integers(min_value=1, max_value=5),
+           ops=st.lists(st.tuples(st.sampled_from(["end", "front", "pop", "split", "concat"]),
+                                  st.integers(min_value=0, max_value=30)), max_size=12))
+    def test_add_after_appends(self, values: List[int], capacity: int, ops: List) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity)
+        for op, arg in ops:
+            if op == "end":
+                lst = add_to_end(lst, arg)
+            elif op == "front":
+                lst = push_front(lst, arg)
+            elif op == "pop" and len(lst):
+                lst = pop_front(lst)[1]
+            elif op == "split":
+                lst = split_at(lst, min(arg, len(lst)))[1]
+            elif op == "concat":
+                joined: Optional[UnrolledLinkedList] = m_concat(lst, from_list(values[:arg], capacity))
+                assert joined is not None
+                lst = joined
+            # A list rebuilt from the same nodes knows nothing about its layout.
+            fresh: UnrolledLinkedList = UnrolledLinkedList(lst.node_capacity, lst.head)
+            self.assertEqual(to_list(add(lst, -1)), to_list(add(fresh, -1)))
+
+    def test_pickle_round_trip(self) -> None:
+        lst: UnrolledLinkedList = from_list(list(range(20)), 4)
+        for linked in (False, True):
+            if linked:
+                self.assertIsNotNone(lst.head)
+            for restored in (pickle.loads(pickle.dumps(lst)), copy.deepcopy(lst), copy.copy(lst)):
+                self.assertEqual(restored, lst)
+                assert restored.head is not None and restored.head.next is not None
+                self.assertEqual(list(restored.head.next.values or ()), [4, 5, 6, 7])
+                self.assertEqual(to_list(add(restored, 20)), list(range(21)))
+        sorted_list = pickle.loads(pickle.dumps(SortedUnrolledLinkedList([3, 1, 2], 2)))
+        self.assertEqual(list(sorted_list.insert(0)), [0, 1, 2, 3])
+
+    def test_add_after_add_to_end(self) -> None:
+        lst: UnrolledLinkedList = add_to_end(from_list(list(range(100000)), 8), 1)
+        with profile_ops() as profile:
+            add(lst, 2)
+        self.assertEqual(profile.as_dict()["add"]["nodes_visited"], 0)
+        # The block ``push_front`` starts has room, and is the one ``add`` fills.
+        front: UnrolledLinkedList = push_front(lst, 0)
+        with profile_ops() as profile:
+            self.assertEqual(to_list(add(front, 3))[:2], [0, 3])
+        self.assertLess(profile.as_dict()["add"]["nodes_visited"], 4)
+
+    def test_deque_sharing(self) -> None:
+        lst: UnrolledLinkedList = from_list(list(range(10000)), 64)
+        with profile_ops() as profile:
+            element, tail = pop_front(lst)
+            shorter, end = pop_back(tail)
+            grown: UnrolledLinkedList = push_front(shorter, -1)
+        self.assertEqual((element, end), (0, 9999))
+        self.assertEqual(to_list(grown), [-1] + list(range(1, 9999)))
+        ops = profile.as_dict()
+        self.assertEqual((ops["pop_front"]["nodes_created"], ops["pop_front"]["elements_copied"]), (1, 63))
+        self.assertEqual((ops["pop_back"]["nodes_created"], ops["pop_back"]["elements_copied"]), (1, 15))
+        self.assertEqual(ops["push_front"]["nodes_created"], 1)
+        with self.assertRaises(IndexError):
+            first(UnrolledLinkedList(4))
+        with self.assertRaises(IndexError):
+            last(UnrolledLinkedList(4))
+        self.assertIsNone(first(from_list([None, 1])))
+
+    def test_atom(self) -> None:
+        start: UnrolledLinkedList = from_list([1, 2, 3], 2)
+        atom: Atom = Atom(start, counters=True)
+        self.assertIs(atom.deref(), start)
+        grown: UnrolledLinkedList = atom.swap(add_to_end, 4)
+        self.assertIs(atom.deref(), grown)
+        self.assertEqual(to_list(grown), [1, 2, 3, 4])
+        self.assertEqual(to_list(start), [1, 2, 3])
+        self.assertFalse(atom.compare_and_set(start, from_list([], 2)))
+        self.assertIs(atom.deref(), grown)
+        self.assertTrue(atom.compare_and_set(grown, start))
+        self.assertIs(atom.deref(), start)
+        self.assertEqual(atom.contention(), Contention(1, 0, 1))
+        self.assertIs(atom.reset(grown), grown)
+        self.assertIs(atom.deref(), grown)
+        with self.assertRaises(ValueError):
+            Atom(start).contention()
+
+        calls: List[int] = []
+
+        def interfere(lst: UnrolledLinkedList) -> UnrolledLinkedList:
+            calls.append(size(lst))
+            if len(calls) == 1:
+                atom.reset(add_to_end(lst, 0))
+            return add_to_end(lst, 5)
+        self.assertEqual(to_list(atom.swap(interfere)), [1, 2, 3, 4, 0, 5])
+        self.assertEqual(calls, [4, 5])
+        self.assertEqual(atom.contention().retries, 1)
+
+    def test_atom_stress(self) -> None:
+        writers, per_writer = 4, 300
+        atom: Atom = Atom(UnrolledLinkedList(4), counters=True)
+        done: threading.Event = threading.Event()
+        errors: List[str] = []
+        interval: float = sys.getswitchinterval()
+
+        def write(writer: int) -> None:
+            for i in range(per_writer):
+                atom.swap(add_to_end, (writer, i))
+
+        def read() -> None:
+            while not done.is_set():
+                seen: List = to_list(atom.deref())
+                for writer in range(writers):
+                    mine: List[int] = [i for w, i in seen if w == writer]
+                    if mine != list(range(len(mine))):
+                        errors.append(f"writer {writer} out of order in a snapshot")
+                        return
+
+        sys.setswitchinterval(1e-6)
+        try:
+            readers: List[threading.Thread] = [threading.Thread(target=read) for _ in range(2)]
+            for reader in readers:
+                reader.start()
+            with ThreadPoolExecutor(writers) as pool:
+                list(pool.map(write, range(writers)))
+            done.set()
+            for reader in readers:
+                reader.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        final: List = to_list(atom.deref())
+        self.assertEqual(sorted(final), [(w, i) for w in range(writers) for i in range(per_writer)])
+        self.assertEqual(atom.contention().swaps, writers * per_writer)
+
+    @given(parts=st.lists(st.lists(st.integers(), max_size=5), max_size=60),
+           capacity=st.integers(min_value=1, max_value=4))
+    def test_concat_many(self, parts: List[List[int]], capacity: int) -> None:
+        joined: Optional[UnrolledLinkedList] = UnrolledLinkedList(capacity)
+        for part in parts:
+            joined = m_concat(joined, from_list(part, capacity))
+        expected: List[int] = [x for part in parts for x in part]
+        assert joined is not None
+        self.assertEqual(to_list(joined), expected)
+        self.assertEqual(size(joined), len(expected))
+        self.assertEqual(list(reversed(joined)), expected[::-1])
+        for i, value in enumerate(expected):
+            self.assertEqual(url_get(joined, i), value)
+
+    def assertFilled(self, lst: UnrolledLinkedList, min_fill: float) -> None:
+        """Only a last node, or one before an empty node, may be underfull."""
+        node: Optional[UnrolledNode] = lst.head
+        while node is not None and node.next is not None:
+            if node.values and node.next.values:
+                self.assertGreaterEqual(len(node.values), min_fill * node.capacity)
+            node = node.next
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers(min_value=0, max_value=3))),
+           capacity=st.integers(min_value=1, max_value=8),
+           min_fill=st.sampled_from([0.25, 0.5, 1.0]),
+           data=st.data())
+    def test_fill_policy(self, values: List[Optional[int]], capacity: int, min_fill: float, data) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity, min_fill=min_fill)
+        plain: UnrolledLinkedList = from_list(values, capacity)
+        for removed in (remove(lst, 0), url_filter(lst, lambda x: x != 1)):
+            assert removed is not None
+            self.assertEqual(removed.min_fill, min_fill)
+            self.assertFilled(removed, min_fill)
+        self.assertEqual(to_list(remove(lst, 0)), to_list(remove(plain, 0)))
+        self.assertEqual(to_list(url_filter(lst, lambda x: x != 1)),
+                         to_list(url_filter(plain, lambda x: x != 1)))
+        index: int = data.draw(st.integers(min_value=0, max_value=len(lst)))
+        left, right = split_at(lst, index)
+        joined: Optional[UnrolledLinkedList] = m_concat(right, left)
+        self.assertEqual(to_list(joined), to_list(right) + to_list(left))
+        self.assertEqual(to_list(compact(plain)), values)
+        self.assertFilled(compact(url_filter(plain, lambda x: x != 1)), 1.0)
+
+    def test_stats(self) -> None:
+        self.assertEqual(stats(from_list(list(range(10)), 4)),
+                         Stats(nodes=3, holes=0, elements=10, average_fill=2.5 / 3, histogram={2: 1, 4: 2}))
+        self.assertEqual(stats(url_empty()), Stats(0, 0, 0, 0.0, {}))
+        self.assertEqual(stats(from_list([1, None, 2])).holes, 1)
+        fragmented: UnrolledLinkedList = url_filter(from_list(list(range(100)), 8), lambda x: x % 8 == 0)
+        self.assertEqual(stats(fragmented).histogram, {1: 13})
+        self.assertEqual(stats(compact(fragmented)).histogram, {5: 1, 8: 1})
+        with self.assertRaises(ValueError):
+            from_list([1], 1, min_fill=1.5)
+
+    @given(values=st.lists(st.one_of(st.none(), st.integers(), st.text(max_size=3))),
+           capacity=st.integers(min_value=1, max_value=8),
+           dtype=st.sampled_from([None, "q", "auto"]))
+    def test_dump_load(self, values: List, capacity: int, dtype: Optional[str]) -> None:
+        lst: UnrolledLinkedList = from_list(values, capacity, dtype=dtype)
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "list.ull")
+            dump(lst, path)
+            with open(path, "rb") as file:
+                dumped: bytes = file.read()
+            for mapped in (True, False):
+                loaded: UnrolledLinkedList = load(path, mmap=mapped)
+                self.assertEqual(loaded, lst)
+                self.assertEqual(loaded.dtype, lst.dtype)
+                self.assertEqual(to_list(loaded), to_list(lst))
+            self.assertEqual(list(load_stream(path)), to_list(lst))
+            dump_stream(iter(values), path, lst.node_capacity, lst.dtype)
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), dumped)
+
+    def test_load_views(self) -> None:
+        values: List[float] = [i / 4 for i in range(100)]
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "list.ull")
+            dump(from_list(values, 16, dtype="d"), path)
+            loaded: UnrolledLinkedList = load(path)
+            self.assertIsInstance(next(loaded.iter_chunks()), memoryview)
+            self.assertEqual(to_list(add(url_set(loaded, 3, 0.0), 1.5)),
+                             values[:3] + [0.0] + values[4:] + [1.5])
+            self.assertEqual(to_list(reverse(loaded)), values[::-1])
+            self.assertEqual(to_list(remove(loaded, 0.25)), values[:1] + values[2:])
+            self.assertEqual(hash(loaded), hash(from_list(values, 16, dtype="d")))
+            for edited in (url_set(loaded, 1, 9.0), remove(loaded, 0.25), add_to_end(loaded, 1.0),
+                           push_front(loaded, 1.0), batch_update(loaded, [("insert", 20, 1.0)])):
+                assert edited is not None
+                self.assertTrue(all(isinstance(block, (array, memoryview)) for block in edited.iter_chunks()))
+            for copied in (pickle.loads(pickle.dumps(loaded)), copy.deepcopy(loaded)):
+                self.assertEqual(copied, loaded)
+                self.assertIsInstance(next(copied.iter_chunks()), array)
+            self.assertEqual(parallel_reduce(loaded, operator.add, 0.0, workers=2, chunk_nodes=2),
+                             sum(values))
+            if np is not None:
+                dump(from_list(values, 16, dtype=np.float64), path)
+                block = next(load(path).iter_chunks())
+                self.assertIsInstance(block, np.ndarray)
+                self.assertFalse(block.flags.writeable)
+            del loaded
+            with open(path, "wb") as file:
+                file.write(b"not a list")
+            with self.assertRaises(ValueError):
+                load(path)
+
+    def test_profile_ops(self) -> None:
+        lst: UnrolledLinkedList = from_list(list(range(10)), 4)
+        with profile_ops() as profile:
+            add(lst, 1)
+            url_map(lst, lambda x: x + 1)
+            find(lst, lambda x: x == 5)
+            url_get(lst, 5)
+            stats(lst)
+            list(lst)
+        ops = profile.as_dict()
+        self.assertEqual(ops["add"], dict(ops["add"], calls=1, nodes_created=1, elements_copied=3,
+                                          nodes_visited=0, func_calls=0))
+        self.assertEqual(ops["url_map"], dict(ops["url_map"], nodes_created=3, elements_copied=10,
+                                              nodes_visited=3, func_calls=10))
+        self.assertEqual((ops["find"]["func_calls"], ops["find"]["nodes_visited"]), (6, 2))
+        self.assertEqual(ops["url_get"]["nodes_visited"], 1)
+        self.assertNotIn("size", ops)
+        self.assertEqual(ops["(other)"]["nodes_visited"], 3)
+        self.assertGreater(ops["url_map"]["seconds"], 0)
+        with profile_ops() as outer:
+            with profile_ops() as inner:
+                to_list(lst)
+            size(lst)
+        self.assertEqual(list(inner.as_dict()), ["to_list"])
+        self.assertEqual(list(outer.as_dict()), ["size"])
+        to_list(lst)
+        self.assertEqual(list(outer.as_dict()), ["size"])
+
+    @given(values=st.lists(st.integers(-20, 20)),
+           capacity=st.integers(min_value=1, max_value=6),
+           edits=st.lists(st.tuples(st.booleans(), st.integers(-25, 25))),
+           probes=st.lists(st.integers(-25, 25), max_size=5),
+           min_fill=st.sampled_from([0.0, 0.5, 1.0]))
+    def test_sorted_list(self, values: List[int], capacity: int, edits: List, probes: List[int],
+                         min_fill: float) -> None:
+        import bisect
+        lst: SortedUnrolledLinkedList = SortedUnrolledLinkedList(values, capacity, min_fill=min_fill)
+        expected: List[int] = sorted(values)
+        for insert, value in edits:
+            if insert:
+                lst = lst.insert(value)
+                bisect.insort(expected, value)
+            elif value in expected:
+                lst = lst.remove(value)
+                expected.remove(value)
+            else:
+                with self.assertRaises(ValueError):
+                    lst.remove(value)
+            self.assertIsInstance(lst, SortedUnrolledLinkedList)
+        self.assertEqual(list(lst), expected)
+        self.assertEqual(to_list(lst), expected)
+        self.assertEqual(size(lst), len(expected))
+        self.assertTrue(all(0 < len(block) <= capacity for block in lst.iter_chunks()))
+        for value in probes:
+            self.assertEqual(lst.bisect_left(value), bisect.bisect_left(expected, value))
+            self.assertEqual(lst.bisect(value), bisect.bisect_right(expected, value))
+            self.assertEqual(lst.rank(value), bisect.bisect_left(expected, value))
+            self.assertEqual(value in lst, value in expected)
+            self.assertEqual(list(lst.range(value, value + 7)),
+                             [x for x in expected if value <= x < value + 7])
+
+    def test_sorted_list_sharing(self) -> None:
+        lst: SortedUnrolledLinkedList = SortedUnrolledLinkedList(range(0, 2000, 2), 8, dtype="q")
+        for changed in (lst.insert(1001), lst.insert(-1), lst.insert(5000), lst.remove(1000)):
+            before = {id(block) for block in lst.iter_chunks()}
+            fresh = [block for block in changed.iter_chunks() if id(block) not in before]
+            self.assertLessEqual(len(fresh), 2)
+            self.assertIsInstance(fresh[0], array)
+        part: SortedUnrolledLinkedList = lst.range(100, 200)
+        self.assertEqual(list(part), list(range(100, 200, 2)))
+        self.assertEqual(part.insert(150).rank(151), 27)
+        self.assertEqual(to_list(add_to_end(part, -1))[-1], -1)
+        self.assertNotIsInstance(add_to_end(part, -1), SortedUnrolledLinkedList)
+        self.assertEqual(SortedUnrolledLinkedList([], 4).insert(3).node_capacity, 4)
+        mended: SortedUnrolledLinkedList = SortedUnrolledLinkedList(range(16), 4, min_fill=0.75)
+        for value in (1, 2, 5, 6, 9, 10):
+            mended = mended.remove(value)
+        self.assertEqual([list(block) for block in mended.iter_chunks()],
+                         [[0, 3, 4, 7], [8, 11, 12, 13], [14, 15]])
+        self.assertEqual(mended.insert(5).min_fill, 0.75)
+
+    @unittest.skipUnless(np is not None, "numpy is not installed")
+    @given(values=st.lists(st.integers(min_value=-1000, max_value=1000)),
+           capacity=st.integers(min_value=1, max_value=16))
+    def test_ndarray_blocks(self, values: List[int], capacity: int) -> None:
+        source = np.array(values, dtype=np.int64)
+        lst: UnrolledLinkedList = from_ndarray(source, capacity)
+        source[:] = 0
+        self.assertEqual(lst, from_list(values, capacity))
+        self.assertEqual(list(lst), values)
+        self.assertEqual(to_ndarray(lst).tolist(), values)
+        self.assertEqual(to_list(url_map(lst, np.negative)), [-x for x in values])
+        self.assertEqual(to_list(url_map(lst, lambda a: a * 2, vectorized=True)), [x * 2 for x in values])
+        if values:
+            roots: UnrolledLinkedList = url_map(lst, np.cbrt)
+            self.assertEqual(roots.dtype, np.float64)
+            self.assertEqual(parallel_map(lst, np.cbrt, 2, 3, "thread"), roots)
+            self.assertEqual(parallel_map(lst, np.cbrt, 2, 3, "thread").dtype, np.float64)
+            self.assertEqual(to_list(add(url_set(roots, 0, 0.5), 2.5)), [0.5] + to_list(roots)[1:] + [2.5])
+            self.assertTrue(all(isinstance(block, np.ndarray) for block in add(roots, 2.5).iter_chunks()))
+            self.assertIsNone(url_map(lst, lambda a: a > 0, vectorized=True).dtype)
+        self.assertEqual(to_list(url_filter(lst, lambda a: a > 0, vectorized=True)),
+                         [x for x in values if x > 0])
+        self.assertEqual(reduce(lst, np.add, 0), sum(values))
+        self.assertEqual(reduce(lst, np.subtract, 0), reduce(from_list(values, capacity), operator.sub, 0))
+        self.assertEqual(find(lst, lambda a: a > 0, vectorized=True), find(lst, lambda x: x > 0))
+        self.assertEqual(member(lst, 7), 7 in values)
+        self.assertEqual(member(lst, [values[0] if values else 0]), False)
+        self.assertEqual(member(lst, [values[0] if values else 0], summaries=True), False)
+        doubled: UnrolledLinkedList = url_map(lst, lambda x: x * 2)
+        self.assertEqual(to_list(doubled), [x * 2 for x in values])
+        self.assertTrue(all(type(x) is int for x in doubled))
+        self.assertTrue(all(isinstance(block, np.ndarray) for block in doubled.iter_chunks()))
+        self.assertEqual(to_list(url_map(lst, lambda x: x * 2 ** 70)), [x * 2 ** 70 for x in values])
+        self.assertTrue(all(type(x) is int for x in url_filter(lst, lambda x: x > 0)))
+        self.assertIs(type(reduce(lst, operator.add, 0)), int)
+        self.assertEqual(reduce(lst, lambda a, x: a + x * 2 ** 70, 0), sum(values) * 2 ** 70)
+        self.assertEqual(to_list(add(lst, 5)), values + [5])
+        self.assertEqual(to_list(reverse(lst)), values[::-1])
+        if values:
+            self.assertEqual(url_get(lst, 0), values[0])
+            self.assertEqual(to_list(url_set(lst, 0, 2 ** 70)), [2 ** 70] + values[1:])
+            self.assertEqual(to_list(remove(lst, values[0])), [x for x in values if x != values[0]])
+            self.assertEqual(to_list(lst), values)
+
+    @unittest.skipUnless(np is not None, "numpy is not installed")
+    def test_numpy_dtype(self) -> None:
+        lst: UnrolledLinkedList = from_list([1.5, 2.5, 3.5], 2, dtype=np.float64)
+        blocks = list(lst.iter_chunks())
+        self.assertIsInstance(blocks[0], np.ndarray)
+        self.assertEqual(to_list(add(lst, 4.5)), [1.5, 2.5, 3.5, 4.5])
+        self.assertEqual(to_list(add(lst, "x")), [1.5, 2.5, 3.5, "x"])
+        self.assertEqual(to_ndarray(url_empty()).shape, (0,))
+        view = next(from_ndarray(np.arange(4), 2).iter_chunks())
+        with self.assertRaises(ValueError):
+            view[0] = 1
+        for bad in ("complex128", "U", object, np.float32, np.float16):
+            with self.assertRaises(ValueError):
+                from_list([1], 1, dtype=bad)
+        with self.assertRaises(ValueError):
+            from_ndarray(np.zeros((2, 2)))